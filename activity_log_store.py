@@ -0,0 +1,278 @@
+import threading
+from datetime import datetime
+
+from resident_state import connect_sqlite
+
+
+class ActivityLog:
+    """Bounded activity log with O(1) append and hourly counters.
+
+    Entries live in a fixed-size ring buffer and get an increasing `seq` id; the
+    entry with id `seq` sits at slot `seq % max_entries`, so both appends and
+    cursor lookups are O(1). Hourly buckets count every appended entry (including
+    ones later evicted from the buffer) so recent-activity totals never scan it.
+    """
+
+    def __init__(self, max_entries=500, counter_retention_hours=24 * 7):
+        self.max_entries = max_entries
+        self.counter_retention_hours = counter_retention_hours
+        self._buffer = [None] * max_entries
+        self._next_seq = 1
+        self._hourly_counts = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return self._retained()
+
+    def _retained(self):
+        return min(self._next_seq - 1, self.max_entries)
+
+    @staticmethod
+    def _hour_of(timestamp):
+        return int(timestamp.timestamp() // 3600)
+
+    def append(self, message, type='general', timestamp=None):
+        """Adds an entry and returns it."""
+        timestamp = timestamp or datetime.now()
+        with self._lock:
+            entry = {
+                'seq': self._next_seq,
+                'timestamp': timestamp,
+                'message': message,
+                'type': type
+            }
+            # JSON-ready form, built once instead of on every read
+            entry['serialized'] = {
+                'seq': entry['seq'],
+                'timestamp': timestamp.astimezone().isoformat(),
+                'message': message,
+                'type': type
+            }
+            self._buffer[self._next_seq % self.max_entries] = entry
+            self._next_seq += 1
+
+            hour = self._hour_of(timestamp)
+            if hour not in self._hourly_counts:
+                self._prune_counters(hour)
+            self._hourly_counts[hour] = self._hourly_counts.get(hour, 0) + 1
+        return entry
+
+    def _prune_counters(self, current_hour):
+        # Only runs when a new hour bucket is opened, so it stays amortized O(1).
+        oldest = current_hour - self.counter_retention_hours
+        for hour in [h for h in self._hourly_counts if h <= oldest]:
+            del self._hourly_counts[hour]
+
+    def count_recent(self, hours=24, now=None):
+        """Counts entries logged in the last `hours` hour buckets, including the current one."""
+        current_hour = self._hour_of(now or datetime.now())
+        with self._lock:
+            return sum(self._hourly_counts.get(current_hour - i, 0) for i in range(hours))
+
+    def latest_seq(self):
+        """Returns the id of the newest entry, which is also the number of entries ever logged."""
+        with self._lock:
+            return self._next_seq - 1
+
+    def page(self, cursor=None, limit=50):
+        """Returns (entries, next_cursor), newest first, for entries older than `cursor`.
+
+        `next_cursor` is None when there are no older retained entries.
+        """
+        with self._lock:
+            oldest_seq = self._next_seq - self._retained()
+            start = self._next_seq - 1 if cursor is None else min(int(cursor) - 1, self._next_seq - 1)
+            stop = max(start - limit, oldest_seq - 1)
+            entries = [self._buffer[seq % self.max_entries] for seq in range(start, stop, -1)]
+            next_cursor = stop + 1 if stop >= oldest_seq else None
+        return entries, next_cursor
+
+    def since(self, seq=None, timestamp=None, limit=None):
+        """Returns (entries, latest_seq, complete) for entries newer than `seq` or `timestamp`.
+
+        Entries are newest first. `complete` is False when older matching entries
+        were already evicted or cut off by `limit`, so the caller should resync.
+        """
+        with self._lock:
+            latest = self._next_seq - 1
+            oldest_seq = self._next_seq - self._retained()
+            entries = []
+            complete = True
+            for s in range(latest, oldest_seq - 1, -1):
+                entry = self._buffer[s % self.max_entries]
+                if (seq is not None and s <= seq) or (timestamp is not None and entry['timestamp'] <= timestamp):
+                    break
+                if limit is not None and len(entries) >= limit:
+                    complete = False
+                    break
+                entries.append(entry)
+            else:
+                # Walked past the oldest retained entry without reaching the cursor.
+                if oldest_seq > 1 and (seq is None or seq < oldest_seq - 1):
+                    complete = False
+        return entries, latest, complete
+
+    def __iter__(self):
+        """Iterates over a snapshot of the retained entries, newest first."""
+        entries, _ = self.page(limit=self.max_entries)
+        return iter(entries)
+
+
+class SQLiteActivityLogStore:
+    """Activity logs for every resident in a SQLite database shared by worker processes.
+
+    Same bounds and semantics as ActivityLog: each resident keeps the newest
+    `max_entries` entries with increasing `seq` ids, and hourly counters cover
+    every appended entry. `log(resident_id)` returns a handle with the
+    ActivityLog interface.
+    """
+
+    def __init__(self, path, max_entries=500, counter_retention_hours=24 * 7):
+        self.path = path
+        self.max_entries = max_entries
+        self.counter_retention_hours = counter_retention_hours
+        self._local = threading.local()
+        connection = self._connection()
+        connection.execute('CREATE TABLE IF NOT EXISTS activity_log_seq (resident_id TEXT PRIMARY KEY, latest INTEGER)')
+        connection.execute(
+            'CREATE TABLE IF NOT EXISTS activity_log (resident_id TEXT, seq INTEGER, timestamp REAL, message TEXT, '
+            'type TEXT, PRIMARY KEY (resident_id, seq)) WITHOUT ROWID'
+        )
+        connection.execute(
+            'CREATE TABLE IF NOT EXISTS activity_log_hours (resident_id TEXT, hour INTEGER, count INTEGER, '
+            'PRIMARY KEY (resident_id, hour)) WITHOUT ROWID'
+        )
+
+    def _connection(self):
+        # sqlite3 connections cannot be shared between threads, so keep one per thread.
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = self._local.connection = connect_sqlite(self.path)
+        return connection
+
+    def log(self, resident_id):
+        return SQLiteActivityLog(self, resident_id)
+
+    def summaries(self, resident_ids, hours=24, now=None):
+        """Returns {resident_id: (latest_seq, entries in the last `hours` hours)} in two queries."""
+        resident_ids = list(resident_ids)
+        current_hour = ActivityLog._hour_of(now or datetime.now())
+        latest, recent = {}, {}
+        connection = self._connection()
+        # Stay under SQLite's bound-parameter limit.
+        for start in range(0, len(resident_ids), 500):
+            chunk = resident_ids[start:start + 500]
+            placeholders = ', '.join('?' * len(chunk))
+            latest.update(connection.execute(
+                f'SELECT resident_id, latest FROM activity_log_seq WHERE resident_id IN ({placeholders})', chunk))
+            recent.update(connection.execute(
+                f'SELECT resident_id, SUM(count) FROM activity_log_hours WHERE resident_id IN ({placeholders}) '
+                f'AND hour BETWEEN ? AND ? GROUP BY resident_id', chunk + [current_hour - hours + 1, current_hour]))
+        return {rid: (latest.get(rid, 0), recent.get(rid, 0)) for rid in resident_ids}
+
+
+def _entry(seq, timestamp, message, type):
+    timestamp = datetime.fromtimestamp(timestamp)
+    return {
+        'seq': seq,
+        'timestamp': timestamp,
+        'message': message,
+        'type': type,
+        'serialized': {'seq': seq, 'timestamp': timestamp.astimezone().isoformat(), 'message': message, 'type': type}
+    }
+
+
+class SQLiteActivityLog:
+    """One resident's log in a SQLiteActivityLogStore, with the ActivityLog interface."""
+
+    def __init__(self, store, resident_id):
+        self.store = store
+        self.resident_id = resident_id
+        self.max_entries = store.max_entries
+
+    def __len__(self):
+        return min(self.latest_seq(), self.max_entries)
+
+    def append(self, message, type='general', timestamp=None):
+        """Adds an entry and returns it."""
+        timestamp = timestamp or datetime.now()
+        hour = ActivityLog._hour_of(timestamp)
+        connection = self.store._connection()
+        # IMMEDIATE takes the write lock up front so concurrent appends get distinct seq ids.
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            row = connection.execute('SELECT latest FROM activity_log_seq WHERE resident_id = ?',
+                                     (self.resident_id,)).fetchone()
+            seq = (row[0] if row else 0) + 1
+            connection.execute('INSERT OR REPLACE INTO activity_log_seq VALUES (?, ?)', (self.resident_id, seq))
+            connection.execute('INSERT INTO activity_log VALUES (?, ?, ?, ?, ?)',
+                               (self.resident_id, seq, timestamp.timestamp(), message, type))
+            connection.execute('DELETE FROM activity_log WHERE resident_id = ? AND seq <= ?',
+                               (self.resident_id, seq - self.max_entries))
+            connection.execute(
+                'INSERT INTO activity_log_hours VALUES (?, ?, 1) '
+                'ON CONFLICT (resident_id, hour) DO UPDATE SET count = count + 1', (self.resident_id, hour))
+            connection.execute('DELETE FROM activity_log_hours WHERE resident_id = ? AND hour <= ?',
+                               (self.resident_id, hour - self.store.counter_retention_hours))
+            connection.execute('COMMIT')
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+        return _entry(seq, timestamp.timestamp(), message, type)
+
+    def count_recent(self, hours=24, now=None):
+        """Counts entries logged in the last `hours` hour buckets, including the current one."""
+        return self.store.summaries([self.resident_id], hours, now)[self.resident_id][1]
+
+    def latest_seq(self):
+        """Returns the id of the newest entry, which is also the number of entries ever logged."""
+        row = self.store._connection().execute('SELECT latest FROM activity_log_seq WHERE resident_id = ?',
+                                               (self.resident_id,)).fetchone()
+        return row[0] if row else 0
+
+    def _entries(self, newest, oldest, limit=None):
+        """Entries with oldest <= seq <= newest, newest first."""
+        rows = self.store._connection().execute(
+            'SELECT seq, timestamp, message, type FROM activity_log WHERE resident_id = ? AND seq BETWEEN ? AND ? '
+            'ORDER BY seq DESC LIMIT ?', (self.resident_id, oldest, newest, -1 if limit is None else limit))
+        return [_entry(*row) for row in rows]
+
+    def page(self, cursor=None, limit=50):
+        """Returns (entries, next_cursor), newest first, for entries older than `cursor` (see ActivityLog.page)."""
+        latest = self.latest_seq()
+        oldest_seq = latest - min(latest, self.max_entries) + 1
+        start = latest if cursor is None else min(int(cursor) - 1, latest)
+        stop = max(start - limit, oldest_seq - 1)
+        entries = self._entries(start, stop + 1) if start > stop else []
+        return entries, (stop + 1 if stop >= oldest_seq else None)
+
+    def since(self, seq=None, timestamp=None, limit=None):
+        """Returns (entries, latest_seq, complete) for entries newer than `seq` or `timestamp` (see ActivityLog.since)."""
+        # One snapshot of the retained entries (at most max_entries), walked like ActivityLog does.
+        connection = self.store._connection()
+        connection.execute('BEGIN')
+        try:
+            latest = self.latest_seq()
+            retained = self._entries(latest, (seq or 0) + 1)
+        finally:
+            connection.execute('COMMIT')
+        oldest_seq = latest - min(latest, self.max_entries) + 1
+        entries = []
+        complete = True
+        for entry in retained:
+            if timestamp is not None and entry['timestamp'] <= timestamp:
+                break
+            if limit is not None and len(entries) >= limit:
+                complete = False
+                break
+            entries.append(entry)
+        else:
+            if oldest_seq > 1 and (seq is None or seq < oldest_seq - 1):
+                complete = False
+        return entries, latest, complete
+
+    def __iter__(self):
+        """Iterates over a snapshot of the retained entries, newest first."""
+        entries, _ = self.page(limit=self.max_entries)
+        return iter(entries)
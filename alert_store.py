@@ -0,0 +1,285 @@
+import json
+import os
+import threading
+import uuid
+from datetime import datetime
+
+from resident_state import connect_sqlite
+
+DEFAULT_ARCHIVE_PATH = os.environ.get(
+    'ALERT_ARCHIVE_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'alert_archive.jsonl'),
+)
+
+
+class AlertStore:
+    """Emergency alerts with stable ids and an indexed set of active alerts.
+
+    Only unresolved alerts stay in memory; resolving one moves it to an
+    append-only JSON-lines archive on disk, so the hot structure stays small
+    however long the process runs. Counts are kept as counters, never scanned,
+    and are rebuilt from the archive when the store is created, so they survive
+    a restart (alerts still active at shutdown are not persisted).
+    """
+
+    def __init__(self, archive_path=DEFAULT_ARCHIVE_PATH):
+        self.archive_path = archive_path
+        self._active = {}
+        self._total = 0
+        self._resolved = 0
+        # Active alerts per resident (oldest first) and per-resident totals
+        self._active_by_resident = {}
+        self._total_by_resident = {}
+        self._lock = threading.Lock()
+        self._load_counts()
+
+    def _load_counts(self):
+        for alert in self.iter_archive():
+            resident_id = alert['resident_id']
+            self._total += 1
+            self._resolved += 1
+            self._total_by_resident[resident_id] = self._total_by_resident.get(resident_id, 0) + 1
+
+    @property
+    def active_count(self):
+        return len(self._active)
+
+    @property
+    def total_count(self):
+        return self._total
+
+    @property
+    def resolved_count(self):
+        return self._resolved
+
+    def active_count_for(self, resident_id):
+        return len(self._active_by_resident.get(resident_id, ()))
+
+    def total_count_for(self, resident_id):
+        return self._total_by_resident.get(resident_id, 0)
+
+    def counts_for(self, resident_ids):
+        """Returns {resident_id: (active alerts, total alerts)} for many residents."""
+        with self._lock:
+            return {rid: (len(self._active_by_resident.get(rid, ())), self._total_by_resident.get(rid, 0))
+                    for rid in resident_ids}
+
+    def raise_alert(self, message, severity='high', timestamp=None, resident_id=None):
+        """Records a new unresolved alert and returns it."""
+        alert = {
+            'id': uuid.uuid4().hex,
+            'resident_id': resident_id,
+            'timestamp': timestamp or datetime.now(),
+            'message': message,
+            'severity': severity,
+            'acknowledged': False,
+            'acknowledged_at': None,
+            'acknowledged_by': None,
+            'resolved': False,
+            'resolved_at': None
+        }
+        with self._lock:
+            self._active[alert['id']] = alert
+            self._total += 1
+            self._active_by_resident.setdefault(resident_id, {})[alert['id']] = alert
+            self._total_by_resident[resident_id] = self._total_by_resident.get(resident_id, 0) + 1
+        return alert
+
+    def get(self, alert_id):
+        """Returns an active alert, or None."""
+        with self._lock:
+            return self._active.get(alert_id)
+
+    def active(self, resident_id=None):
+        """Returns the active alerts, oldest first, optionally for one resident only."""
+        with self._lock:
+            if resident_id is None:
+                return list(self._active.values())
+            return list(self._active_by_resident.get(resident_id, {}).values())
+
+    def acknowledge(self, alert_id, by=None):
+        """Marks an active alert as seen by a caregiver; returns it, or None if it is not active."""
+        with self._lock:
+            alert = self._active.get(alert_id)
+            if alert is not None and not alert['acknowledged']:
+                alert['acknowledged'] = True
+                alert['acknowledged_at'] = datetime.now()
+                alert['acknowledged_by'] = by
+            return alert
+
+    def resolve(self, alert_id):
+        """Resolves an active alert and archives it; returns it, or None if it is not active."""
+        with self._lock:
+            alert = self._active.pop(alert_id, None)
+            if alert is None:
+                return None
+            alert['resolved'] = True
+            alert['resolved_at'] = datetime.now()
+            self._resolved += 1
+            by_resident = self._active_by_resident[alert['resident_id']]
+            del by_resident[alert_id]
+            if not by_resident:
+                del self._active_by_resident[alert['resident_id']]
+            if self.archive_path:
+                with open(self.archive_path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(serialize_alert(alert), ensure_ascii=False) + '\n')
+        return alert
+
+    def iter_archive(self):
+        """Yields archived (resolved) alerts from disk, oldest first."""
+        if not self.archive_path or not os.path.exists(self.archive_path):
+            return
+        with open(self.archive_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+class SQLiteAlertStore:
+    """AlertStore over a SQLite database shared by worker processes.
+
+    Active and resolved alerts live in one table; resolved rows are the
+    archive. Counts are indexed queries, so every worker sees the same alerts
+    and counters, and they survive a restart.
+    """
+
+    COLUMNS = ('id', 'resident_id', 'timestamp', 'message', 'severity', 'acknowledged', 'acknowledged_at',
+               'acknowledged_by', 'resolved', 'resolved_at')
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        connection = self._connection()
+        connection.execute(
+            'CREATE TABLE IF NOT EXISTS alerts (id TEXT PRIMARY KEY, resident_id TEXT, timestamp REAL, message TEXT, '
+            'severity TEXT, acknowledged INTEGER, acknowledged_at REAL, acknowledged_by TEXT, resolved INTEGER, '
+            'resolved_at REAL)'
+        )
+        connection.execute('CREATE INDEX IF NOT EXISTS ix_alerts_resident ON alerts (resident_id, resolved, timestamp)')
+        connection.execute('CREATE INDEX IF NOT EXISTS ix_alerts_resolved ON alerts (resolved, timestamp)')
+
+    def _connection(self):
+        # sqlite3 connections cannot be shared between threads, so keep one per thread.
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = self._local.connection = connect_sqlite(self.path)
+        return connection
+
+    def _count(self, where='', args=()):
+        return self._connection().execute(f'SELECT COUNT(*) FROM alerts {where}', args).fetchone()[0]
+
+    @property
+    def active_count(self):
+        return self._count('WHERE resolved = 0')
+
+    @property
+    def total_count(self):
+        return self._count()
+
+    @property
+    def resolved_count(self):
+        return self._count('WHERE resolved = 1')
+
+    def active_count_for(self, resident_id):
+        return self._count('WHERE resident_id IS ? AND resolved = 0', (resident_id,))
+
+    def total_count_for(self, resident_id):
+        return self._count('WHERE resident_id IS ?', (resident_id,))
+
+    def counts_for(self, resident_ids):
+        """Returns {resident_id: (active alerts, total alerts)} for many residents, one query per 500 ids."""
+        resident_ids = list(resident_ids)
+        counts = {}
+        connection = self._connection()
+        # Stay under SQLite's bound-parameter limit.
+        for start in range(0, len(resident_ids), 500):
+            chunk = resident_ids[start:start + 500]
+            placeholders = ', '.join('?' * len(chunk))
+            counts.update((rid, (active, total)) for rid, active, total in connection.execute(
+                f'SELECT resident_id, SUM(resolved = 0), COUNT(*) FROM alerts WHERE resident_id IN ({placeholders}) '
+                f'GROUP BY resident_id', chunk))
+        return {rid: counts.get(rid, (0, 0)) for rid in resident_ids}
+
+    @staticmethod
+    def _to_row(alert):
+        row = [alert[name] for name in SQLiteAlertStore.COLUMNS]
+        for i, name in enumerate(SQLiteAlertStore.COLUMNS):
+            if isinstance(row[i], datetime):
+                row[i] = row[i].timestamp()
+        return row
+
+    @staticmethod
+    def _from_row(row):
+        alert = dict(zip(SQLiteAlertStore.COLUMNS, row))
+        for key in ('timestamp', 'acknowledged_at', 'resolved_at'):
+            if alert[key] is not None:
+                alert[key] = datetime.fromtimestamp(alert[key])
+        alert['acknowledged'] = bool(alert['acknowledged'])
+        alert['resolved'] = bool(alert['resolved'])
+        return alert
+
+    def _select(self, where, args=()):
+        rows = self._connection().execute(f"SELECT {', '.join(self.COLUMNS)} FROM alerts {where}", args)
+        return [self._from_row(row) for row in rows]
+
+    def raise_alert(self, message, severity='high', timestamp=None, resident_id=None):
+        """Records a new unresolved alert and returns it."""
+        alert = {
+            'id': uuid.uuid4().hex,
+            'resident_id': resident_id,
+            'timestamp': timestamp or datetime.now(),
+            'message': message,
+            'severity': severity,
+            'acknowledged': False,
+            'acknowledged_at': None,
+            'acknowledged_by': None,
+            'resolved': False,
+            'resolved_at': None
+        }
+        self._connection().execute(f"INSERT INTO alerts VALUES ({', '.join('?' * len(self.COLUMNS))})",
+                                   self._to_row(alert))
+        return alert
+
+    def get(self, alert_id):
+        """Returns an active alert, or None."""
+        if alert_id is None:
+            return None
+        alerts = self._select('WHERE id = ? AND resolved = 0', (alert_id,))
+        return alerts[0] if alerts else None
+
+    def active(self, resident_id=None):
+        """Returns the active alerts, oldest first, optionally for one resident only."""
+        if resident_id is None:
+            return self._select('WHERE resolved = 0 ORDER BY timestamp')
+        return self._select('WHERE resident_id IS ? AND resolved = 0 ORDER BY timestamp', (resident_id,))
+
+    def acknowledge(self, alert_id, by=None):
+        """Marks an active alert as seen by a caregiver; returns it, or None if it is not active."""
+        self._connection().execute(
+            'UPDATE alerts SET acknowledged = 1, acknowledged_at = ?, acknowledged_by = ? '
+            'WHERE id = ? AND resolved = 0 AND acknowledged = 0', (datetime.now().timestamp(), by, alert_id))
+        return self.get(alert_id)
+
+    def resolve(self, alert_id):
+        """Resolves an active alert; returns it, or None if it is not active."""
+        resolved_at = datetime.now()
+        # The resolved = 0 guard makes exactly one worker win when two resolve the same alert.
+        cursor = self._connection().execute('UPDATE alerts SET resolved = 1, resolved_at = ? WHERE id = ? AND resolved = 0',
+                                            (resolved_at.timestamp(), alert_id))
+        if cursor.rowcount == 0:
+            return None
+        return self._select('WHERE id = ?', (alert_id,))[0]
+
+    def iter_archive(self):
+        """Yields resolved alerts, oldest first, in their JSON form."""
+        for alert in self._select('WHERE resolved = 1 ORDER BY resolved_at'):
+            yield serialize_alert(alert)
+
+
+def serialize_alert(alert):
+    """Returns a JSON-ready copy of an alert."""
+    data = dict(alert)
+    for key in ('timestamp', 'acknowledged_at', 'resolved_at'):
+        if data[key] is not None:
+            data[key] = data[key].astimezone().isoformat()
+    return data
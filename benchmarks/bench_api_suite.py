@@ -0,0 +1,285 @@
+"""End-to-end benchmark suite for the Flask API, written as JSON for comparison between commits.
+
+Builds the app the way the dashboard server does, with resident state in a
+SQLite database (SQLiteStateBackend) seeded with --residents residents and
+their activity logs. When the app's src.models.user is on the path, the /users
+CRUD routes of user.py are served from a second SQLite database seeded with
+--users users; otherwise they are listed under "skipped" in the results.
+
+Each endpoint is called --requests times at every --concurrency level, one
+Flask test client per thread. Throughput and p50/p95/p99 latency are recorded
+for each level. The model paths are timed on their own: training on the
+simulated data, single-row inference with and without the cache, batch
+inference, and chart rendering, both a fresh render and a cached one.
+
+Results go to --output (default api_suite-<commit>.json). With --compare
+BASELINE.json, every p50/p99/throughput that got worse by more than
+--threshold is listed, and the exit status is 1 if there are any.
+
+Usage: python benchmarks/bench_api_suite.py [--concurrency 1,4,16] [--requests 400] [--residents 100]
+       [--users 10000] [--train-repeats 3] [--output PATH] [--compare BASELINE.json] [--threshold 0.1]
+"""
+import argparse
+import contextlib
+import itertools
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+
+from common import REPO_ROOT, create_app, latency_summary, run_concurrent, time_calls
+
+import elderly_care
+from health_recommendation_system import fit_recommendation_model
+from resident_state import ResidentStateStore, SQLiteStateBackend
+
+COMMANDS = ['كم الوقت', 'تذكير دواء', 'مرحبا', 'مساعدة طوارئ', 'ماذا تقول']
+LOG_TYPES = ['medication', 'meal', 'activity', 'general']
+ACTIVITY_LEVELS = ['low', 'medium', 'high']
+# (metric, True if higher is better) compared by --compare
+COMPARED = [('p50_ms', False), ('p99_ms', False), ('throughput_per_s', True)]
+
+
+def git_revision():
+    """Returns (short commit, True if the tree has uncommitted changes), or (None, None) outside git."""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=REPO_ROOT,
+                               capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+    return commit, bool(dirty)
+
+
+def random_resident(rng):
+    return {
+        'age': rng.randint(65, 95),
+        'sleep_hours': round(rng.uniform(4, 10), 1),
+        'daily_activity_level': rng.choice(ACTIVITY_LEVELS),
+        'heart_rate': rng.randint(60, 100),
+        'medication_adherence': round(rng.uniform(0.5, 1.0), 2),
+        'fall_risk_score': round(rng.uniform(0, 1), 2),
+    }
+
+
+def seed_residents(workdir, count, log_entries, rng):
+    """Serves resident state from a fresh SQLite database and seeds residents and activity logs."""
+    elderly_care.resident_states = ResidentStateStore(SQLiteStateBackend(os.path.join(workdir, 'state.db')))
+    elderly_care.activity_logs.clear()
+    resident_ids = [f'resident-{i:04d}' for i in range(count)]
+    for resident_id in resident_ids:
+        profile = random_resident(rng)
+        elderly_care.resident_states.update(
+            resident_id, age=profile['age'], sleep_hours=profile['sleep_hours'],
+            daily_activity=profile['daily_activity_level'], heart_rate=profile['heart_rate'],
+            medication_adherence=profile['medication_adherence'], fall_risk_score=profile['fall_risk_score'])
+        for i in range(log_entries):
+            elderly_care.log_activity(resident_id, f'seeded entry {i}', rng.choice(LOG_TYPES))
+    return resident_ids
+
+
+def setup_users(app, workdir, count):
+    """Registers user.py's blueprint on a seeded SQLite database; returns the seeded ids or a skip reason."""
+    try:
+        import user
+        from src.models.user import User, db
+    except ImportError as e:
+        return None, f'user.py routes unavailable: {e}'
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + os.path.join(workdir, 'users.db')
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {'connect_args': {'timeout': 30}}
+    db.init_app(app)
+    app.register_blueprint(user.user_bp, url_prefix='/api')
+    with app.app_context():
+        db.create_all()
+        for start in range(0, count, 10000):
+            db.session.execute(db.insert(User.__table__), [
+                {'username': f'user{i:07d}', 'email': f'user{i}@care.example'}
+                for i in range(start, min(start + 10000, count))
+            ])
+        db.session.commit()
+        user.ensure_user_indexes()
+        ids = [row[0] for row in db.session.query(User.id).order_by(User.id)]
+    return ids, None
+
+
+def endpoint_cases(resident_ids, user_ids):
+    """Returns [(name, call(client, rng) -> response)] for every endpoint under test."""
+    cases = [
+        ('GET /api/dashboard-stats',
+         lambda client, rng: client.get(f'/api/dashboard-stats?resident_id={rng.choice(resident_ids)}')),
+        ('GET /api/recommendations',
+         lambda client, rng: client.get(f'/api/recommendations?resident_id={rng.choice(resident_ids)}')),
+        ('GET /api/activity-log',
+         lambda client, rng: client.get(f'/api/activity-log?resident_id={rng.choice(resident_ids)}')),
+        ('POST /api/voice-command',
+         lambda client, rng: client.post(f'/api/voice-command?resident_id={rng.choice(resident_ids)}',
+                                         json={'command': rng.choice(COMMANDS)})),
+    ]
+    if user_ids is None:
+        return cases
+
+    # Reads and updates use the first half of the seeded users, deletes take ids from the second half.
+    stable = user_ids[:len(user_ids) // 2]
+    deletable = list(reversed(user_ids[len(user_ids) // 2:]))
+    deletable_lock = threading.Lock()
+    new_names = itertools.count()
+
+    def delete_user(client, rng):
+        with deletable_lock:
+            user_id = deletable.pop()
+        return client.delete(f'/api/users/{user_id}')
+
+    def create_user(client, rng):
+        n = next(new_names)
+        return client.post('/api/users', json={'username': f'bench{n:07d}', 'email': f'bench{n}@care.example'})
+
+    return cases + [
+        ('GET /api/users', lambda client, rng: client.get('/api/users')),
+        ('GET /api/users/<id>', lambda client, rng: client.get(f'/api/users/{rng.choice(stable)}')),
+        ('POST /api/users', create_user),
+        ('PUT /api/users/<id>',
+         lambda client, rng: client.put(f'/api/users/{rng.choice(stable)}',
+                                        json={'email': f'updated{rng.randrange(10 ** 9)}@care.example'})),
+        ('DELETE /api/users/<id>', delete_user),
+    ]
+
+
+def bench_endpoints(app, cases, levels, requests):
+    results = {}
+    for name, call in cases:
+        results[name] = {}
+        for concurrency in levels:
+            def make_worker(index, name=name, call=call, concurrency=concurrency):
+                client = app.test_client()
+                rng = random.Random(f'{name}-{concurrency}-{index}')
+                return lambda: call(client, rng).status_code < 400
+
+            latencies, failures, elapsed = run_concurrent(make_worker, concurrency, requests)
+            results[name][str(concurrency)] = latency_summary(latencies, elapsed, failures)
+    return results
+
+
+def bench_model(recommender, train_repeats, requests, rng):
+    data = recommender.data
+    residents = [random_resident(rng) for _ in range(requests)]
+    batch = [random_resident(rng) for _ in range(100)]
+    repeated = residents[0]
+    recommender.get_recommendations(**repeated)
+    counts = data['daily_activity_level'].value_counts().sort_index()
+    rows = itertools.cycle(residents)
+    return {
+        f'train ({len(data)} rows)': latency_summary(time_calls(
+            lambda: fit_recommendation_model(data), train_repeats, warmup=1)),
+        'inference, one row': latency_summary(time_calls(
+            lambda: recommender._recommend(**next(rows)), requests)),
+        'inference, cached': latency_summary(time_calls(
+            lambda: recommender.get_recommendations(**repeated), requests)),
+        'inference, batch of 100': latency_summary(time_calls(
+            lambda: recommender.get_recommendations_batch(batch), max(1, requests // 10))),
+        'chart render': latency_summary(time_calls(
+            lambda: recommender._render_activity_chart(counts), max(1, requests // 40), warmup=1)),
+        'chart, cached': latency_summary(time_calls(recommender.get_activity_report_chart, requests)),
+    }
+
+
+def compare(results, baseline, threshold):
+    """Prints the metrics that regressed by more than `threshold` against `baseline`; returns how many."""
+    regressions = 0
+    pairs = [(f'{name} @ {level}', summary, baseline['endpoints'].get(name, {}).get(level))
+             for name, levels in results['endpoints'].items() for level, summary in levels.items()]
+    pairs += [(name, summary, baseline['model'].get(name)) for name, summary in results['model'].items()]
+    print(f"\ncompared with {baseline['meta'].get('commit') or 'baseline'} (threshold {threshold:.0%}):")
+    for label, summary, before in pairs:
+        if before is None:
+            continue
+        for metric, higher_is_better in COMPARED:
+            old, new = before[metric], summary[metric]
+            if not old:
+                continue
+            change = (new - old) / old
+            if (-change if higher_is_better else change) > threshold:
+                regressions += 1
+                print(f'  REGRESSION {label:<40} {metric:<16} {old:10.2f} -> {new:10.2f} ({change:+.0%})')
+    print(f'  {regressions} regression(s)')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--concurrency', default='1,4,16')
+    parser.add_argument('--requests', type=int, default=400, help='requests per endpoint per concurrency level')
+    parser.add_argument('--residents', type=int, default=100)
+    parser.add_argument('--log-entries', type=int, default=50, help='activity log entries seeded per resident')
+    parser.add_argument('--users', type=int, default=10000)
+    parser.add_argument('--train-repeats', type=int, default=3)
+    parser.add_argument('--output')
+    parser.add_argument('--compare', metavar='BASELINE')
+    parser.add_argument('--threshold', type=float, default=0.1)
+    args = parser.parse_args()
+    levels = [int(c) for c in args.concurrency.split(',')]
+    rng = random.Random(0)
+    commit, dirty = git_revision()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        # Keep the app's status prints (voice replies, alerts) out of the report.
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            app = create_app()
+            resident_ids = seed_residents(workdir, args.residents, args.log_entries, rng)
+            user_ids, users_skipped = setup_users(app, workdir, args.users)
+            # Every DELETE needs a seeded user of its own.
+            if user_ids is not None and len(user_ids) // 2 < args.requests * len(levels):
+                user_ids, users_skipped = None, '--users is too small for the number of DELETE requests'
+            started = time.perf_counter()
+            endpoints = bench_endpoints(app, endpoint_cases(resident_ids, user_ids), levels, args.requests)
+            model = bench_model(app.health_recommender, args.train_repeats, args.requests, rng)
+            elapsed = time.perf_counter() - started
+            with app.app_context():
+                elderly_care.voice_jobs().shutdown()
+
+    results = {
+        'meta': {
+            'commit': commit,
+            'dirty': dirty,
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'seconds': elapsed,
+            'args': vars(args),
+        },
+        'endpoints': endpoints,
+        'model': model,
+        'skipped': {'/api/users': users_skipped} if users_skipped else {},
+    }
+
+    print(f'{"endpoint":<28} {"clients":>7} {"req/s":>8} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8} {"errors":>6}')
+    for name, by_level in endpoints.items():
+        for level, s in by_level.items():
+            print(f'{name:<28} {level:>7} {s["throughput_per_s"]:>8.0f} {s["p50_ms"]:>8.2f} '
+                  f'{s["p95_ms"]:>8.2f} {s["p99_ms"]:>8.2f} {s["failures"]:>6}')
+    for name, s in model.items():
+        print(f'{name:<36} {s["throughput_per_s"]:>8.1f}/s {s["p50_ms"]:>10.3f} ms p50 {s["p99_ms"]:>10.3f} ms p99')
+    for name, reason in results['skipped'].items():
+        print(f'skipped {name}: {reason}')
+
+    output = args.output or f'api_suite-{commit or "nogit"}{"-dirty" if dirty else ""}.json'
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+    print(f'results written to {output}')
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""Bulk versus per-resident dashboard stats at 10, 100 and 1,000 residents.
+
+For every state backend it seeds N residents, then compares one
+/api/dashboard-stats/bulk request for all of them against N single
+/api/dashboard-stats requests, reporting total and per-resident latency.
+
+Usage: python benchmarks/bench_bulk_dashboard.py [--residents 10,100,1000] [--requests N]
+"""
+import argparse
+import random
+import tempfile
+
+from common import create_app, format_latency, percentile, time_calls
+from bench_resident_scaling import make_backends
+
+import elderly_care
+from resident_state import ResidentStateStore
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--residents', default='10,100,1000')
+    parser.add_argument('--requests', type=int, default=50)
+    args = parser.parse_args()
+
+    app = create_app()
+    client = app.test_client()
+    rng = random.Random(0)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        for name, backend in make_backends(workdir):
+            store = ResidentStateStore(backend)
+            elderly_care.resident_states = store
+            for count in [int(c) for c in args.residents.split(',')]:
+                resident_ids = [f'resident-{i}' for i in range(count)]
+                for resident_id in resident_ids:
+                    store.update(resident_id, age=rng.randint(65, 95))
+                    elderly_care.log_activity(resident_id, 'bench entry', 'general')
+                    if rng.random() < 0.1:
+                        elderly_care.emergency_alerts.raise_alert('bench alert', resident_id=resident_id)
+
+                print(f'--- {name}, {count} residents')
+                bulk = time_calls(
+                    lambda: client.post('/api/dashboard-stats/bulk', json={'resident_ids': resident_ids}),
+                    args.requests, warmup=3)
+                print(format_latency('bulk request', bulk))
+                single = time_calls(
+                    lambda: [client.get(f'/api/dashboard-stats?resident_id={r}') for r in resident_ids],
+                    max(1, args.requests // 10), warmup=1)
+                print(format_latency(f'{count} single requests', single))
+                print(f'{"per resident":<24} bulk {percentile(bulk, 50) / count * 1e6:9.1f} us'
+                      f"   single {percentile(single, 50) / count * 1e6:9.1f} us")
+                elderly_care.activity_logs.clear()
+            if name == 'shm':
+                backend.close()
+                backend.unlink()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""Load test for the dashboard push channel: one producer fanning out to many SSE subscribers.
+
+Each subscriber is a thread draining its queue the way the /api/stream generator
+does. A fraction of subscribers can be made deliberately slow to exercise the
+backpressure path (backlog dropped, single resync event sent).
+
+Usage: python benchmarks/bench_event_fanout.py [--subscribers 10,100,1000] [--events N] [--slow-fraction F]
+"""
+import argparse
+import json
+import threading
+import time
+
+from common import percentile
+from event_broadcaster import EventBroadcaster
+
+
+def run(num_subscribers, num_events, slow_fraction, rate):
+    broadcaster = EventBroadcaster()
+    latencies = []
+    latencies_lock = threading.Lock()
+    stop = threading.Event()
+    num_slow = int(num_subscribers * slow_fraction)
+
+    def consume(subscription, slow):
+        local = []
+        while not stop.is_set():
+            frame = subscription.get(timeout=0.1)
+            if frame is None:
+                continue
+            if 'event: tick' in frame:
+                payload = json.loads(frame.rsplit('data: ', 1)[1])
+                local.append(time.perf_counter() - payload['sent'])
+            if slow:
+                time.sleep(0.01)
+        with latencies_lock:
+            latencies.extend(local)
+
+    subscriptions = [broadcaster.subscribe() for _ in range(num_subscribers)]
+    threads = [
+        threading.Thread(target=consume, args=(sub, i < num_slow), daemon=True)
+        for i, sub in enumerate(subscriptions)
+    ]
+    for thread in threads:
+        thread.start()
+
+    interval = 1.0 / rate if rate else 0.0
+    start = time.perf_counter()
+    for i in range(num_events):
+        broadcaster.publish('tick', {'n': i, 'sent': time.perf_counter()})
+        if interval:
+            time.sleep(interval)
+    publish_elapsed = time.perf_counter() - start
+
+    # let fast consumers drain
+    deadline = time.time() + 5
+    while time.time() < deadline and sum(s.queue.qsize() for s in subscriptions[num_slow:]) > 0:
+        time.sleep(0.01)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    delivered = len(latencies)
+    return {
+        'subscribers': num_subscribers,
+        'slow_subscribers': num_slow,
+        'events': num_events,
+        'publish_rate_eps': num_events / publish_elapsed,
+        'deliveries_per_s': delivered / publish_elapsed,
+        'delivered': delivered,
+        'resyncs': sum(s.resyncs for s in subscriptions),
+        'latency_p50_ms': percentile(latencies, 50) * 1000,
+        'latency_p99_ms': percentile(latencies, 99) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--subscribers', default='10,100,1000')
+    parser.add_argument('--events', type=int, default=500)
+    parser.add_argument('--rate', type=float, default=200.0, help='events/s published (0 = as fast as possible)')
+    parser.add_argument('--slow-fraction', type=float, default=0.05)
+    args = parser.parse_args()
+
+    for count in [int(c) for c in args.subscribers.split(',')]:
+        result = run(count, args.events, args.slow_fraction, args.rate)
+        print(f"{result['subscribers']:>6} subs ({result['slow_subscribers']} slow): "
+              f"{result['deliveries_per_s']:>10.0f} deliveries/s, "
+              f"p50 {result['latency_p50_ms']:.2f} ms, p99 {result['latency_p99_ms']:.2f} ms, "
+              f"resyncs {result['resyncs']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""Replay benchmark and accuracy harness for the fall/inactivity detectors.
+
+Records a synthetic session with injected falls and idle spells to a file,
+replays it into micro-windows, then runs WindowDetector and
+SlidingWindowDetector over the same windows. Reports samples per second of
+detector time and precision/recall against the injected ground truth.
+
+Usage: python benchmarks/bench_fall_detector.py [--residents 10,100,1000] [--seconds S]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from common import percentile
+
+from fall_detector import SlidingWindowDetector
+from sensor_pipeline import FileReplaySource, SyntheticSensorSource, WindowDetector, micro_windows, write_events
+
+# How far a detection's timestamp may be from the injected event to count as a match
+MATCH_TOLERANCE = {'fall': 0.25, 'inactivity': 2.0}
+
+
+def evaluate(detected, injected, horizons, end_time, tolerance=MATCH_TOLERANCE):
+    """Matches detections to ground truth per type; returns {type: (tp, fp, fn, timing errors)}.
+
+    Ground truth injected less than `horizons[type]` seconds before `end_time`
+    could not have been confirmed yet and is left out, along with its detections.
+    """
+    results = {}
+    for kind, limit in tolerance.items():
+        cutoff = end_time - horizons[kind]
+        truth = sorted((ts, rid) for k, rid, ts in injected if k == kind and ts <= cutoff)
+        found = sorted((event.timestamp, event.resident_id) for event in detected
+                       if event.type == kind and event.timestamp <= cutoff + limit)
+        unmatched = list(found)
+        errors = []
+        for ts, rid in truth:
+            match = next((d for d in unmatched if d[1] == rid and abs(d[0] - ts) <= limit), None)
+            if match is not None:
+                unmatched.remove(match)
+                errors.append(abs(match[0] - ts))
+        tp = len(errors)
+        results[kind] = (tp, len(unmatched), len(truth) - tp, errors)
+    return results
+
+
+def record_windows(args, residents, workdir):
+    source = SyntheticSensorSource(residents=residents, rate_hz=args.rate, duration_seconds=args.seconds,
+                                   fall_rate_per_hour=args.fall_rate, idle_rate_per_hour=args.idle_rate,
+                                   idle_seconds=args.idle_seconds, start_time=0.0, seed=7)
+    path = os.path.join(workdir, f'replay-{residents}.csv')
+    write_events(path, source)
+    index, ids = {}, []
+    windows = list(micro_windows(FileReplaySource(path, batch_size=4096), index, ids,
+                                 window_seconds=args.window, max_events=1 << 30))
+    return windows, source.injected
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--residents', default='10,100,1000')
+    parser.add_argument('--seconds', type=float, default=120)
+    parser.add_argument('--rate', type=int, default=50)
+    parser.add_argument('--window', type=float, default=0.25)
+    parser.add_argument('--fall-rate', type=float, default=20, help='injected falls per resident-hour')
+    parser.add_argument('--idle-rate', type=float, default=10, help='injected idle spells per resident-hour')
+    parser.add_argument('--idle-seconds', type=float, default=20)
+    parser.add_argument('--inactivity-seconds', type=float, default=10)
+    args = parser.parse_args()
+
+    detectors = {
+        'window': lambda: WindowDetector(inactivity_seconds=args.inactivity_seconds),
+        'sliding': lambda: SlidingWindowDetector(rate_hz=args.rate, inactivity_seconds=args.inactivity_seconds),
+    }
+    with tempfile.TemporaryDirectory() as workdir:
+        for residents in [int(r) for r in args.residents.split(',')]:
+            windows, injected = record_windows(args, residents, workdir)
+            samples = sum(len(w) for w in windows)
+            print(f'--- {residents} residents, {samples} samples, {len(windows)} windows')
+            for name, make in detectors.items():
+                detector = make()
+                detected = []
+                window_times = []
+                for window in windows:
+                    start = time.perf_counter()
+                    detected.extend(detector.process(window))
+                    window_times.append(time.perf_counter() - start)
+                elapsed = sum(window_times)
+                print(f'{name:<8} {samples / elapsed:>12,.0f} samples/s   '
+                      f'per window p50 {percentile(window_times, 50) * 1e3:6.2f} ms  p99 {percentile(window_times, 99) * 1e3:6.2f} ms')
+                horizons = {'fall': 2.0, 'inactivity': args.inactivity_seconds + 2.0}
+                for kind, (tp, fp, fn, errors) in evaluate(detected, injected, horizons, args.seconds).items():
+                    precision = tp / (tp + fp) if tp + fp else 0.0
+                    recall = tp / (tp + fn) if tp + fn else 0.0
+                    print(f'    {kind:<11} precision {precision:6.3f}  recall {recall:6.3f}  '
+                          f'(tp {tp}, fp {fp}, fn {fn}, timing p50 {percentile(errors, 50) * 1e3:.0f} ms)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""Intent matching cost versus number of intents, on a synthetic Arabic corpus.
+
+Generates N intents with K keywords each plus a corpus of utterances (some
+with diacritics and letter variants), then compares a naive scan (every
+keyword of every intent tested with `in`, as the old elif chain did) against
+the compiled IntentEngine. Both pick the same intent; only the cost differs.
+
+Usage: python benchmarks/bench_intent_engine.py [--intents 5,100,500] [--keywords K] [--utterances N]
+"""
+import argparse
+import random
+import time
+
+from common import format_latency, time_calls
+
+from intent_engine import IntentEngine, normalize_arabic
+from voice_assistant import INTENTS
+
+LETTERS = 'ابتثجحخدذرزسشصضطظعغفقكلمنهويةىأإآ'
+DIACRITICS = 'َُِّْ'
+
+
+def random_word(rng):
+    return ''.join(rng.choice(LETTERS) for _ in range(rng.randint(3, 6)))
+
+
+def make_intents(count, keywords, rng):
+    intents = [dict(intent) for intent in INTENTS[:count]]
+    while len(intents) < count:
+        intents.append({'name': f'intent-{len(intents)}',
+                        'keywords': {random_word(rng): 1.0 for _ in range(keywords)}})
+    return intents
+
+
+def decorate(word, rng):
+    # Speech-to-text and keyboards add harakat and tatweel here and there.
+    return ''.join(c + (rng.choice(DIACRITICS) if rng.random() < 0.2 else '') for c in word)
+
+
+def make_corpus(intents, size, rng):
+    corpus = []
+    for _ in range(size):
+        words = [random_word(rng) for _ in range(rng.randint(3, 8))]
+        if rng.random() < 0.8:
+            keyword = rng.choice(list(rng.choice(intents)['keywords']))
+            words.insert(rng.randrange(len(words) + 1), decorate(keyword, rng))
+        corpus.append(' '.join(words))
+    return corpus
+
+
+def normalize_table(intents):
+    """The intents with pre-normalized keywords, so the naive scan only pays for the `in` tests."""
+    return [dict(intent, keywords={normalize_arabic(p): w for p, w in intent['keywords'].items()}) for intent in intents]
+
+
+def naive_match(intents, text):
+    text = normalize_arabic(text)
+    best = None
+    for index, intent in enumerate(intents):
+        score = sum(weight for phrase, weight in intent['keywords'].items() if phrase in text)
+        if score >= intent.get('threshold', 1.0):
+            rank = (score, intent.get('priority', 0), -index)
+            if best is None or rank > best[0]:
+                best = (rank, intent['name'])
+    return best[1] if best else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--intents', default='5,100,500')
+    parser.add_argument('--keywords', type=int, default=5)
+    parser.add_argument('--utterances', type=int, default=2000)
+    args = parser.parse_args()
+    rng = random.Random(0)
+
+    for count in [int(c) for c in args.intents.split(',')]:
+        intents = make_intents(count, args.keywords, rng)
+        corpus = make_corpus(intents, args.utterances, rng)
+        start = time.perf_counter()
+        engine = IntentEngine(intents)
+        compile_ms = (time.perf_counter() - start) * 1e3
+
+        def engine_name(text):
+            match = engine.match(text)
+            return match.name if match else None
+
+        table = normalize_table(intents)
+        mismatches = sum(naive_match(table, text) != engine_name(text) for text in corpus)
+        print(f'--- {count} intents, {engine.keyword_count} keywords, compile {compile_ms:.1f} ms, '
+              f'{mismatches} disagreements over {len(corpus)} utterances')
+        texts = iter(corpus * 1000)
+        print(format_latency('naive scan', time_calls(lambda: naive_match(table, next(texts)), len(corpus))))
+        texts = iter(corpus * 1000)
+        print(format_latency('intent engine', time_calls(lambda: engine.match(next(texts)), len(corpus))))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""Recommendation latency while the model is retrained, in-process versus in the background.
+
+Client threads keep calling GET /api/recommendations with varying inputs
+(cache misses) while the model is retrained on --rows rows in three phases:
+no retraining (baseline); fit_recommendation_model + swap_model in a thread of
+the serving process, which is what constructing a new
+HealthRecommendationSystem amounts to; and RetrainingService, which fits in a
+separate process and swaps the result in. For each phase the bench reports
+request throughput and p50/p99/max latency, plus retrain duration and swap
+pause.
+
+Usage: python benchmarks/bench_model_retrain.py [--rows 20000] [--clients 4] [--baseline-seconds 3]
+"""
+import argparse
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from common import create_app, percentile
+
+from flat_forest import FlatForest
+from health_recommendation_system import MODEL_PARAMS, fit_recommendation_model
+from model_retrainer import RetrainingService
+from model_store import ModelStore, fingerprint_training_data
+
+
+def grow_data(data, rows, seed=0):
+    """Resamples the simulated data to `rows` rows, jittering the continuous columns."""
+    rng = np.random.default_rng(seed)
+    grown = data.iloc[rng.integers(0, len(data), rows)].reset_index(drop=True)
+    grown['sleep_hours'] = (grown['sleep_hours'] + rng.normal(0, 0.2, rows)).clip(4, 10).round(1)
+    grown['heart_rate'] = (grown['heart_rate'] + rng.integers(-2, 3, rows)).clip(60, 99)
+    return grown
+
+
+class Load:
+    """Client threads calling the recommendations endpoint until stopped."""
+
+    def __init__(self, app, clients):
+        self.app = app
+        self.clients = clients
+        self.latencies = []
+        self._stop = threading.Event()
+        self._threads = []
+
+    def _run(self, seed):
+        client = self.app.test_client()
+        rng = np.random.default_rng(seed)
+        while not self._stop.is_set():
+            query = (f'/api/recommendations?age={rng.integers(65, 95)}&sleep_hours={rng.uniform(4, 10):.1f}'
+                     f'&daily_activity_level={rng.choice(["low", "medium", "high"])}&heart_rate={rng.integers(60, 100)}'
+                     f'&medication_adherence={rng.uniform(0.5, 1):.2f}&fall_risk_score={rng.uniform(0, 1):.2f}')
+            start = time.perf_counter()
+            client.get(query)
+            self.latencies.append(time.perf_counter() - start)
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        self._threads = [threading.Thread(target=self._run, args=(i,)) for i in range(self.clients)]
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join()
+        self.elapsed = time.perf_counter() - self.started
+
+
+def report(name, load):
+    lat = load.latencies
+    print(f'{name:<22} {len(lat) / load.elapsed:8.0f} req/s   p50 {percentile(lat, 50) * 1e3:7.2f} ms'
+          f'   p99 {percentile(lat, 99) * 1e3:7.2f} ms   max {max(lat) * 1e3:7.1f} ms   ({load.elapsed:.1f}s)')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--clients', type=int, default=4)
+    parser.add_argument('--baseline-seconds', type=float, default=3.0)
+    parser.add_argument('--n-jobs', type=int, default=-1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as store_dir:
+        app = create_app(ModelStore(store_dir))
+        recommender = app.health_recommender
+        data = grow_data(recommender.data, args.rows)
+        print(f'retraining on {len(data)} rows with n_jobs={args.n_jobs}, {args.clients} client threads')
+
+        with Load(app, args.clients) as load:
+            time.sleep(args.baseline_seconds)
+        report('no retraining', load)
+
+        with Load(app, args.clients) as load:
+            start = time.perf_counter()
+            model, _, _ = fit_recommendation_model(data, n_jobs=args.n_jobs)
+            fingerprint = fingerprint_training_data(data, MODEL_PARAMS)
+            recommender.model_store.save(model, fingerprint)
+            pause = recommender.swap_model(FlatForest.from_sklearn(model), data, fingerprint)
+            in_process = time.perf_counter() - start
+        report('in-process retrain', load)
+        print(f'  retrain {in_process:.2f}s, swap pause {pause * 1e6:.0f} us, model version {recommender.model_version}')
+
+        # Give the background run a different snapshot so it is not skipped as unchanged.
+        retrainer = RetrainingService(recommender, n_jobs=args.n_jobs)
+        with Load(app, args.clients) as load:
+            retrainer.trigger(grow_data(recommender.data, args.rows, seed=1))
+            retrainer.wait()
+        report('background retrain', load)
+        stats = retrainer.stats()
+        if stats['last_error']:
+            print(f"  failed: {stats['last_error']}")
+        else:
+            print(f"  retrain {stats['last_retrain_seconds']:.2f}s (fit {stats['last_train_seconds']:.2f}s), "
+                  f"swap pause {(stats['last_swap_pause_seconds'] or 0) * 1e6:.0f} us, "
+                  f"accepted {stats['last_result']['accepted']}, model version {stats['model_version']}")
+        retrainer.shutdown()
+
+
+if __name__ == '__main__':
+    main()
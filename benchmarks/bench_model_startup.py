@@ -0,0 +1,39 @@
+"""Compares recommender start-up time: cold training versus warm loading from the model store.
+
+Usage: python benchmarks/bench_model_startup.py [--runs N]
+"""
+import argparse
+import statistics
+import tempfile
+import time
+
+import common  # noqa: F401  (puts the repository root on sys.path)
+from health_recommendation_system import HealthRecommendationSystem
+from model_store import ModelStore
+
+
+def time_startup(store):
+    start = time.perf_counter()
+    HealthRecommendationSystem(model_store=store)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    cold, warm = [], []
+    for _ in range(args.runs):
+        with tempfile.TemporaryDirectory() as root:
+            store = ModelStore(root)
+            cold.append(time_startup(store))
+            warm.append(time_startup(store))
+
+    print(f"cold train  median: {statistics.median(cold) * 1000:8.1f} ms")
+    print(f"warm load   median: {statistics.median(warm) * 1000:8.1f} ms")
+    print(f"speed-up:           {statistics.median(cold) / statistics.median(warm):8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Single-resident recommendation latency: legacy pandas/scikit-learn path versus encoder + FlatForest.
+
+Usage: python benchmarks/bench_recommendation_latency.py [--iterations N]
+"""
+import argparse
+import random
+
+import pandas as pd
+
+from common import format_latency, time_calls
+from health_recommendation_system import HealthRecommendationSystem
+from model_store import ModelStore
+
+
+def legacy_get_recommendations(model, **inputs):
+    """The original DataFrame + get_dummies implementation, kept as the baseline."""
+    input_data = pd.DataFrame([inputs])
+    input_data = pd.get_dummies(input_data, columns=['daily_activity_level'], drop_first=True)
+    missing_cols = set(model.feature_names_in_) - set(input_data.columns)
+    for c in missing_cols:
+        input_data[c] = 0
+    input_data = input_data[model.feature_names_in_]
+    return model.predict(input_data)[0]
+
+
+def random_inputs(rng):
+    return {
+        'age': rng.randint(65, 95),
+        'sleep_hours': round(rng.uniform(4, 10), 1),
+        'daily_activity_level': rng.choice(['low', 'medium', 'high']),
+        'heart_rate': rng.randint(60, 100),
+        'medication_adherence': round(rng.uniform(0.5, 1.0), 2),
+        'fall_risk_score': round(rng.uniform(0, 1), 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    recommender = HealthRecommendationSystem()
+    recommender.cache = None  # measure the uncached encoder path
+    model = recommender.model or ModelStore().load(recommender.data_fingerprint)
+    rng = random.Random(0)
+    inputs = [random_inputs(rng) for _ in range(256)]
+    cursor = iter(range(10 ** 9))
+
+    def legacy():
+        legacy_get_recommendations(model, **inputs[next(cursor) % len(inputs)])
+
+    def fast():
+        recommender.get_recommendations(**inputs[next(cursor) % len(inputs)])
+
+    print(format_latency("legacy pandas path", time_calls(legacy, args.iterations)))
+    print(format_latency("encoder + flat forest", time_calls(fast, args.iterations)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Scaling benchmark for per-resident state at 10, 100 and 1,000 residents.
+
+For every state backend (memory, SQLite WAL, shared memory) it seeds N
+residents, then measures raw store read/update latency and end-to-end
+/api/dashboard-stats latency for random residents through the Flask test client.
+
+Usage: python benchmarks/bench_resident_scaling.py [--residents 10,100,1000] [--requests N]
+"""
+import argparse
+import os
+import random
+import tempfile
+import uuid
+
+from common import create_app, format_latency, time_calls
+
+import elderly_care
+from resident_state import (MemoryStateBackend, ResidentStateStore, SQLiteStateBackend,
+                            SharedMemoryStateBackend)
+
+
+def make_backends(workdir):
+    yield 'memory', MemoryStateBackend()
+    yield 'sqlite', SQLiteStateBackend(os.path.join(workdir, 'state.db'))
+    yield 'shm', SharedMemoryStateBackend(f'bench_state_{uuid.uuid4().hex[:8]}', capacity=4096,
+                                          lock_path=os.path.join(workdir, 'state.lock'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--residents', default='10,100,1000')
+    parser.add_argument('--requests', type=int, default=500)
+    args = parser.parse_args()
+
+    app = create_app()
+    client = app.test_client()
+    rng = random.Random(0)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        for name, backend in make_backends(workdir):
+            store = ResidentStateStore(backend)
+            elderly_care.resident_states = store
+            for count in [int(c) for c in args.residents.split(',')]:
+                resident_ids = [f'resident-{i}' for i in range(count)]
+                for resident_id in resident_ids:
+                    store.update(resident_id, age=rng.randint(65, 95))
+                elderly_care.activity_logs.clear()
+
+                print(f'--- {name}, {count} residents')
+                print(format_latency('store.get', time_calls(
+                    lambda: store.get(rng.choice(resident_ids)), args.requests)))
+                print(format_latency('store.update', time_calls(
+                    lambda: store.update(rng.choice(resident_ids), heart_rate=rng.randint(60, 100)), args.requests)))
+                print(format_latency('GET /api/dashboard-stats', time_calls(
+                    lambda: client.get(f'/api/dashboard-stats?resident_id={rng.choice(resident_ids)}'),
+                    args.requests)))
+            if name == 'shm':
+                backend.close()
+                backend.unlink()
+
+
+if __name__ == '__main__':
+    main()
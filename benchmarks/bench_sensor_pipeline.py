@@ -0,0 +1,98 @@
+"""Throughput and detection-latency benchmark for the sensor ingestion pipeline.
+
+Throughput: events per second through micro-windowing and the default
+detector (SlidingWindowDetector) for the synthetic generator, a recorded replay file and the local TCP socket.
+Latency: a real-time synthetic run with frequent injected falls; reports the
+time from the impact sample to the subscriber receiving the fall event, and
+that figure minus the detector's fall-confirmation window.
+
+Usage: python benchmarks/bench_sensor_pipeline.py [--residents N] [--seconds S] [--rate HZ]
+"""
+import argparse
+import os
+import socket
+import tempfile
+import threading
+import time
+
+from common import percentile
+
+from fall_detector import SlidingWindowDetector
+from sensor_pipeline import FileReplaySource, SensorPipeline, SocketSensorSource, SyntheticSensorSource, write_events
+
+
+def report(name, pipeline):
+    stats = pipeline.stats()
+    print(f"{name:<12} {stats['events_in']:>10} events  {stats['events_per_second']:>12,.0f} events/s  "
+          f"detected {stats['detected']}")
+
+
+def synthetic(args, **options):
+    return SyntheticSensorSource(residents=args.residents, rate_hz=args.rate, duration_seconds=args.seconds,
+                                 start_time=0.0, seed=1, **options)
+
+
+def bench_throughput(args, workdir):
+    pipeline = SensorPipeline(synthetic(args))
+    pipeline.run()
+    report('synthetic', pipeline)
+
+    path = os.path.join(workdir, 'events.csv')
+    write_events(path, synthetic(args))
+    pipeline = SensorPipeline(FileReplaySource(path, batch_size=4096))
+    pipeline.run()
+    report('file replay', pipeline)
+
+    source = SocketSensorSource()
+    pipeline = SensorPipeline(source).start()
+
+    def send():
+        with socket.create_connection(source.address) as connection, open(path, 'rb') as f:
+            while True:
+                chunk = f.read(1 << 20)
+                if not chunk:
+                    break
+                connection.sendall(chunk)
+
+    sender = threading.Thread(target=send)
+    sender.start()
+    sender.join()
+    expected = sum(1 for _ in open(path, 'rb'))
+    while pipeline.events_in < expected:
+        time.sleep(0.01)
+    source.close()
+    pipeline.stop()
+    report('socket', pipeline)
+
+
+def bench_latency(args):
+    detector = SlidingWindowDetector(rate_hz=args.rate)
+    source = SyntheticSensorSource(residents=args.residents, rate_hz=args.rate, duration_seconds=args.latency_seconds,
+                                   fall_rate_per_hour=600, realtime=True, seed=2)
+    pipeline = SensorPipeline(source, detector, window_seconds=args.window)
+    latencies = []
+    pipeline.subscribe(lambda event: latencies.append(time.time() - event.timestamp), types={'fall'})
+    pipeline.run()
+    injected = sum(1 for kind, _, _ in source.injected if kind == 'fall')
+    excess = [latency - detector.fall_confirm_seconds for latency in latencies]
+    print(f"real-time run: {len(latencies)} falls detected / {injected} injected, window {args.window}s")
+    print(f"{'detection latency':<24} p50 {percentile(latencies, 50) * 1e3:8.1f} ms   p99 {percentile(latencies, 99) * 1e3:8.1f} ms")
+    print(f"{'minus confirm window':<24} p50 {percentile(excess, 50) * 1e3:8.1f} ms   p99 {percentile(excess, 99) * 1e3:8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--residents', type=int, default=200)
+    parser.add_argument('--seconds', type=float, default=60)
+    parser.add_argument('--rate', type=int, default=50)
+    parser.add_argument('--window', type=float, default=0.25)
+    parser.add_argument('--latency-seconds', type=float, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        bench_throughput(args, workdir)
+    bench_latency(args)
+
+
+if __name__ == '__main__':
+    main()
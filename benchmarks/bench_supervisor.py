@@ -0,0 +1,86 @@
+"""Combined throughput of supervised components, in threads versus a process pool.
+
+Runs K producer components that each keep scoring recommendation batches,
+next to the real-time sensor monitoring component. The batches run either
+inline on the component threads (sharing one interpreter and its GIL) or
+through the supervisor's process pool with 1..N workers. Reports batches per
+second and the share of the real-time sensor stream monitoring kept up with.
+
+Usage: python benchmarks/bench_supervisor.py [--producers K] [--workers 1,2,4] [--seconds S]
+"""
+import argparse
+import os
+import time
+
+from common import REPO_ROOT  # noqa: F401  (puts the repo on sys.path)
+
+import elderly_care_ai_platform as platform
+from supervisor import Supervisor
+
+
+def make_snapshot(residents):
+    patterns = list(platform.ACTIVITY_CATEGORIES)
+    return {f'resident-{i}': {'activity_pattern': patterns[i % len(patterns)]} for i in range(residents)}
+
+
+def run_mode(args, workers):
+    """workers=0 runs the batches inline on the component threads."""
+    supervisor = Supervisor(process_workers=workers or 1, pool_initializer=platform._init_recommendation_worker)
+    monitoring = platform.SmartMonitoringSystem(args.residents)
+    supervisor.add('monitoring', monitoring.start)
+    snapshot = make_snapshot(args.batch)
+    completed = []
+    monitored = []
+    detect_fall = monitoring.detect_fall
+
+    def counting_detect_fall(events):
+        monitored.append(len(events))
+        return detect_fall(events)
+
+    monitoring.detect_fall = counting_detect_fall
+
+    def producer(context):
+        while not context.stopping:
+            context.heartbeat()
+            if workers:
+                context.submit(platform.recommend_for_activity, snapshot).result()
+            else:
+                platform.recommend_for_activity(snapshot)
+            completed.append(time.monotonic())
+
+    for i in range(args.producers):
+        supervisor.add(f'producer-{i}', producer)
+    if workers:
+        # Warm the pool up front so process start-up is not counted.
+        for future in [supervisor.submit(platform.recommend_for_activity, snapshot) for _ in range(workers)]:
+            future.result()
+    else:
+        platform._init_recommendation_worker()
+
+    started = time.monotonic()
+    supervisor.run(duration=args.seconds)
+    elapsed = time.monotonic() - started
+    return len(completed) / elapsed, sum(monitored) / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--producers', type=int, default=4)
+    parser.add_argument('--workers', default=','.join(str(w) for w in sorted({1, 2, os.cpu_count() or 1})))
+    parser.add_argument('--batch', type=int, default=2000, help='residents per recommendation batch')
+    parser.add_argument('--residents', type=int, default=50, help='residents streamed by the monitoring component')
+    parser.add_argument('--seconds', type=float, default=10)
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} CPUs, {args.producers} producers, {args.batch} residents per batch")
+    # 50 Hz accelerometer plus 1 Hz motion samples per resident
+    realtime_rate = args.residents * 51
+    modes = [('threads', 0)] + [(f'pool x{w}', int(w)) for w in args.workers.split(',')]
+    for name, workers in modes:
+        rate, monitored = run_mode(args, workers)
+        print(f"{name:<10} {rate:8.1f} batches/s   monitoring {monitored:8.0f} samples/s "
+              f"({monitored / realtime_rate:.0%} of real time)")
+
+
+if __name__ == '__main__':
+    main()
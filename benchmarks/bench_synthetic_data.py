@@ -0,0 +1,115 @@
+"""Simulated training data: the old in-memory generator versus the chunked one.
+
+Each phase runs in a fresh process so its peak RSS is its own:
+the old generator (global np.random.seed, one DataFrame) for --legacy-rows;
+write_dataset for --rows in chunks of --chunk-rows with 1 and --workers
+processes; a full read of the dataset; and training the recommendation forest
+on --train-rows rows from one DataFrame versus chunk by chunk from disk.
+
+Usage: python benchmarks/bench_synthetic_data.py [--rows 10000000] [--chunk-rows 100000] [--workers N]
+       [--legacy-rows 1000000] [--train-rows 500000]
+"""
+import argparse
+import multiprocessing
+import os
+import resource
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from common import REPO_ROOT  # noqa: F401  (puts the repo on sys.path)
+
+import synthetic_data
+
+
+def legacy_generate(num_records):
+    """The generator HealthRecommendationSystem used before synthetic_data."""
+    np.random.seed(42)
+    data = pd.DataFrame({
+        'age': np.random.randint(65, 95, num_records),
+        'sleep_hours': np.random.uniform(4, 10, num_records).round(1),
+        'daily_activity_level': np.random.choice(['low', 'medium', 'high'], num_records),
+        'heart_rate': np.random.randint(60, 100, num_records),
+        'medication_adherence': np.random.uniform(0.5, 1.0, num_records).round(2),
+        'fall_risk_score': np.random.uniform(0, 1, num_records).round(2),
+        'recommended_activity': np.random.choice(['walking', 'stretching', 'reading', 'light_yoga', 'social_games'], num_records)
+    })
+    data.loc[data['sleep_hours'] < 6, 'fall_risk_score'] += 0.2
+    data.loc[data['daily_activity_level'] == 'low', 'fall_risk_score'] += 0.3
+    data['fall_risk_score'] = np.clip(data['fall_risk_score'], 0, 1).round(2)
+    high_risk = data['fall_risk_score'] > 0.7
+    data.loc[high_risk, 'recommended_activity'] = np.random.choice(['stretching', 'reading'], high_risk.sum())
+    low_risk = data['fall_risk_score'] < 0.3
+    data.loc[low_risk, 'recommended_activity'] = np.random.choice(['walking', 'light_yoga', 'social_games'], low_risk.sum())
+    return len(data)
+
+
+def read_all(path):
+    dataset = synthetic_data.SyntheticDataset(path)
+    return sum(len(chunk) for chunk in dataset.iter_chunks())
+
+
+def train(path, in_memory):
+    from health_recommendation_system import fit_recommendation_model
+
+    dataset = synthetic_data.SyntheticDataset(path)
+    _, accuracy, _ = fit_recommendation_model(dataset.to_frame() if in_memory else dataset)
+    return accuracy
+
+
+def _timed(fn, args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def measure(fn, *args):
+    """Runs fn(*args) in a fresh process; returns (result, seconds, peak RSS in bytes)."""
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as pool:
+        return pool.submit(_timed, fn, args).result()
+
+
+def disk_usage(root):
+    return sum(os.stat(os.path.join(d, f)).st_blocks * 512 for d, _, files in os.walk(root) for f in files)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=10_000_000)
+    parser.add_argument('--chunk-rows', type=int, default=synthetic_data.DEFAULT_CHUNK_ROWS)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--legacy-rows', type=int, default=1_000_000)
+    parser.add_argument('--train-rows', type=int, default=500_000)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='synthetic-bench-')
+    try:
+        rows, seconds, rss = measure(legacy_generate, args.legacy_rows)
+        print(f'legacy generator        {rows:>11,} rows  {rows / seconds / 1e6:6.2f}M rows/s  peak RSS {rss / 1e6:7.0f} MB')
+
+        path = os.path.join(workdir, 'dataset')
+        for workers in sorted({1, args.workers}):
+            _, seconds, rss = measure(synthetic_data.write_dataset, path, args.rows, args.chunk_rows, 42, workers)
+            print(f'write_dataset, {workers} worker{"s" if workers > 1 else " "}  {args.rows:>11,} rows  '
+                  f'{args.rows / seconds / 1e6:6.2f}M rows/s  peak RSS {rss / 1e6:7.0f} MB (parent)')
+        print(f'on disk: {disk_usage(path) / 1e6:.0f} MB, {disk_usage(path) / args.rows:.1f} bytes/row')
+
+        rows, seconds, rss = measure(read_all, path)
+        print(f'read all chunks         {rows:>11,} rows  {rows / seconds / 1e6:6.2f}M rows/s  peak RSS {rss / 1e6:7.0f} MB')
+
+        train_path = os.path.join(workdir, 'train')
+        synthetic_data.write_dataset(train_path, args.train_rows, args.chunk_rows, 42, args.workers)
+        for name, in_memory in (('train, one DataFrame', True), ('train, chunk by chunk', False)):
+            accuracy, seconds, rss = measure(train, train_path, in_memory)
+            print(f'{name:<23} {args.train_rows:>11,} rows  {seconds:8.1f}s         peak RSS {rss / 1e6:7.0f} MB'
+                  f'  holdout accuracy {accuracy:.3f}')
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""Voice reply latency with and without the pre-rendered audio cache.
+
+The stub synthesizer is given a real-time factor (--rtf, synthesis seconds
+per second of audio) to stand in for a real TTS engine. The bench compares:
+
+- uncached: every reply is synthesized in full when spoken;
+- cached:   VoiceAssistant.handle_command, where static phrases come from
+            memory-mapped files and only the time is synthesized.
+
+It also reports how long the startup pre-render takes into an empty store
+and into one that is already filled.
+
+Usage: python benchmarks/bench_tts_cache.py [--rtf 0.05] [--commands N]
+"""
+import argparse
+import tempfile
+import time
+from datetime import datetime
+
+from common import format_latency, percentile
+
+from tts_cache import AudioCache, StubSynthesizer
+from voice_assistant import FALLBACK_RESPONSE, VoiceAssistant, static_phrases
+
+COMMANDS = ['كم الوقت', 'تذكير دواء', 'مرحبا', 'مساعدة طوارئ', 'ماذا تقول', 'توقف']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rtf', type=float, default=0.05)
+    parser.add_argument('--commands', type=int, default=120)
+    args = parser.parse_args()
+
+    synthesizer = StubSynthesizer(realtime_factor=args.rtf)
+    with tempfile.TemporaryDirectory() as root:
+        started = time.perf_counter()
+        rendered = AudioCache(synthesizer, root).prerender(static_phrases())
+        print(f'cold pre-render: {rendered} phrases in {(time.perf_counter() - started) * 1e3:.1f} ms')
+        started = time.perf_counter()
+        rendered = AudioCache(synthesizer, root).prerender(static_phrases())
+        print(f'warm pre-render: {rendered} phrases in {(time.perf_counter() - started) * 1e3:.1f} ms')
+
+        assistant = VoiceAssistant(AudioCache(synthesizer, root))
+        assistant.speak = lambda text, audio=None: None
+
+        def uncached(command):
+            match = assistant.intent_engine.match(command)
+            template = match.intent['response'] if match else FALLBACK_RESPONSE
+            return synthesizer.synthesize(template.format(time=datetime.now().strftime('%I:%M %p')))
+
+        results = {}
+        for name, speak in (('uncached', uncached), ('cached', assistant.handle_command)):
+            latencies = []
+            for i in range(args.commands):
+                start = time.perf_counter()
+                speak(COMMANDS[i % len(COMMANDS)])
+                latencies.append(time.perf_counter() - start)
+            results[name] = latencies
+            print(format_latency(name, latencies))
+        print(f"speed-up p50: {percentile(results['uncached'], 50) / percentile(results['cached'], 50):.0f}x")
+        print(assistant.audio_cache.stats())
+        assistant.audio_cache.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""/users listing against a local SQLite database seeded with 100k users.
+
+Compares the old full-table listing (User.query.all() + to_dict()) with the
+paginated endpoint: the first page, a deep keyset page next to the same page
+fetched with LIMIT/OFFSET, ordering by username, ?fields= projection,
+?email= lookups before and after ensure_user_indexes(), and a conditional
+request answered with 304. Peak Python memory per request comes from
+tracemalloc.
+
+Needs the app's src.models.user on the path, like user.py itself.
+
+Usage: python benchmarks/bench_users_listing.py [--users 100000] [--requests N]
+"""
+import argparse
+import os
+import tempfile
+import tracemalloc
+
+from flask import Flask, jsonify
+
+from common import format_latency, time_calls
+
+import user
+from src.models.user import User, db
+
+
+def legacy_get_users():
+    users = User.query.all()
+    return jsonify([u.to_dict() for u in users])
+
+
+def peak_memory(func):
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--users', type=int, default=100000)
+    parser.add_argument('--requests', type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        app = Flask(__name__)
+        app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + os.path.join(workdir, 'users.db')
+        db.init_app(app)
+        app.register_blueprint(user.user_bp, url_prefix='/api')
+        app.add_url_rule('/legacy/users', 'legacy_users', legacy_get_users)
+        # Measure lookups without the extra indexes first.
+        user._indexes_checked = True
+
+        with app.app_context():
+            db.create_all()
+            for start in range(0, args.users, 10000):
+                db.session.execute(db.insert(User.__table__), [
+                    {'username': f'user{i:07d}', 'email': f'user{i}@care.example'}
+                    for i in range(start, min(start + 10000, args.users))
+                ])
+            db.session.commit()
+        print(f'seeded {args.users} users')
+
+        client = app.test_client()
+        # The cursor of the page holding the last 100 users
+        deep_cursor = user.encode_cursor([args.users - 100])
+        probe = f'user{args.users // 2}@care.example'
+
+        def offset_page():
+            with app.app_context():
+                User.query.order_by(User.id).offset(args.users - 100).limit(100).all()
+
+        cases = [
+            ('legacy full listing', lambda: client.get('/legacy/users'), max(1, args.requests // 10)),
+            ('first page', lambda: client.get('/api/users'), args.requests),
+            ('deep page (keyset)', lambda: client.get(f'/api/users?cursor={deep_cursor}'), args.requests),
+            ('deep page (OFFSET)', offset_page, args.requests),
+            ('first page by username', lambda: client.get('/api/users?order=username'), args.requests),
+            ('1000 rows, all fields', lambda: client.get('/api/users?limit=1000'), args.requests),
+            ('1000 rows, id,username', lambda: client.get('/api/users?limit=1000&fields=id,username'), args.requests),
+            ('email lookup', lambda: client.get(f'/api/users?email={probe}'), args.requests),
+        ]
+        for name, call, iterations in cases:
+            print(format_latency(name, time_calls(call, iterations, warmup=1)))
+
+        with app.app_context():
+            created = user.ensure_user_indexes()
+        print(f'indexes created: {created or "none (existing indexes already cover username and email)"}')
+        print(format_latency('email lookup, indexed', time_calls(
+            lambda: client.get(f'/api/users?email={probe}'), args.requests, warmup=1)))
+
+        etag = client.get('/api/users').headers['ETag']
+        print(format_latency('first page, 304', time_calls(
+            lambda: client.get('/api/users', headers={'If-None-Match': etag}), args.requests, warmup=1)))
+
+        legacy = client.get('/legacy/users')
+        page = client.get('/api/users')
+        print(f'response size: legacy {len(legacy.data) / 1e6:.1f} MB, first page {len(page.data) / 1e3:.1f} kB')
+        print(f"peak memory: legacy {peak_memory(lambda: client.get('/legacy/users')) / 1e6:.1f} MB, "
+              f"first page {peak_memory(lambda: client.get('/api/users')) / 1e6:.2f} MB")
+
+
+if __name__ == '__main__':
+    main()
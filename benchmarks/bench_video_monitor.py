@@ -0,0 +1,84 @@
+"""Naive versus adaptive video analysis for several cameras on one machine.
+
+Generates a synthetic clip (mostly still, with a few motion spans) and plays
+it in real time to N concurrent VideoMonitors. A CPU-bound stand-in for pose
+estimation runs on every frame in naive mode (stride 1, no downscaling, always
+escalated, unbounded queue) and only on escalated frames in adaptive mode.
+Reports frames in/analyzed/dropped/stale and processing lag per mode.
+
+Usage: python benchmarks/bench_video_monitor.py [--cameras 1,4] [--frames N] [--fps F]
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from common import REPO_ROOT  # noqa: F401  (puts the repo on sys.path)
+
+from video_monitor import VideoMonitor, write_synthetic_video
+
+
+def make_pose_stub(cost_seconds, frame_shape):
+    """Returns a fixed amount of work costing about `cost_seconds` of CPU per frame, standing in for a pose model."""
+    sample = np.zeros(frame_shape, dtype=np.float32)
+    start = time.perf_counter()
+    for _ in range(20):
+        np.fft.rfft2(sample)
+    repeats = max(1, int(round(cost_seconds / ((time.perf_counter() - start) / 20))))
+
+    def pose_stub(frame, small):
+        pixels = frame.astype(np.float32)
+        for _ in range(repeats):
+            np.fft.rfft2(pixels)
+    return pose_stub
+
+
+def run_cameras(path, cameras, analyzer, **options):
+    monitors = [VideoMonitor(path, realtime=True, analyzer=analyzer, **options) for _ in range(cameras)]
+    threads = [threading.Thread(target=monitor.run) for monitor in monitors]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return [monitor.metrics() for monitor in monitors]
+
+
+def summarize(name, cameras, metrics):
+    total = {key: sum(m[key] for m in metrics) for key in
+             ('frames_in', 'frames_analyzed', 'frames_skipped', 'frames_dropped', 'frames_stale')}
+    lag_p50 = np.median([m['lag_p50_ms'] for m in metrics])
+    lag_max = max(m['lag_max_ms'] for m in metrics)
+    print(f"{name:<9} {cameras} cam  in {total['frames_in']:>5}  analyzed {total['frames_analyzed']:>5}  "
+          f"skipped {total['frames_skipped']:>5}  dropped {total['frames_dropped']:>5}  stale {total['frames_stale']:>5}  "
+          f"lag p50 {lag_p50:6.1f} ms  max {lag_max:7.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--cameras', default='1,4')
+    parser.add_argument('--frames', type=int, default=300)
+    parser.add_argument('--fps', type=int, default=30)
+    parser.add_argument('--size', default='480x640')
+    parser.add_argument('--analyzer-ms', type=float, default=15.0, help='CPU cost of the pose stand-in per frame')
+    args = parser.parse_args()
+    height, width = map(int, args.size.split('x'))
+    analyzer = make_pose_stub(args.analyzer_ms / 1e3, (height, width))
+
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, 'clip.npy')
+        spans = ((args.frames // 5, args.frames // 5 + args.fps), (args.frames * 3 // 5, args.frames * 3 // 5 + args.fps))
+        write_synthetic_video(path, frames=args.frames, size=(height, width), motion_spans=spans, seed=0)
+        print(f"clip: {args.frames} frames {width}x{height} at {args.fps} fps, motion in frames {spans}")
+        for cameras in [int(c) for c in args.cameras.split(',')]:
+            naive = run_cameras(path, cameras, analyzer, fps=args.fps, stride=1, scale=1, motion_threshold=-1.0,
+                                max_lag_seconds=float('inf'), max_queue=args.frames)
+            summarize('naive', cameras, naive)
+            adaptive = run_cameras(path, cameras, analyzer, fps=args.fps)
+            summarize('adaptive', cameras, adaptive)
+
+
+if __name__ == '__main__':
+    main()
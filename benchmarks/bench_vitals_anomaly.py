@@ -0,0 +1,103 @@
+"""Streaming heart-rate anomaly detection for 1,000 residents at 1 Hz.
+
+Each resident gets a personal baseline, a daily rhythm and noise, plus
+isolated spikes that must not raise alerts. After the first day, a fraction of
+residents get one injected episode: a step of +/-25 bpm or a drift that ramps
+up to +30 bpm over --drift-seconds. Samples go through
+VitalsAnomalyDetector.process in blocks of --batch-seconds. The bench reports
+throughput, the detection rate and latency (from anomaly onset to the
+confirming sample), the number of false alerts and how many episodes raised
+more than one alert.
+
+Usage: python benchmarks/bench_vitals_anomaly.py [--residents 1000] [--hours 48] [--batch-seconds 60]
+       [--anomaly-fraction 0.2]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from common import percentile
+
+from vitals_anomaly import DAY_SECONDS, VitalsAnomalyDetector
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--residents', type=int, default=1000)
+    parser.add_argument('--hours', type=int, default=48)
+    parser.add_argument('--batch-seconds', type=int, default=60)
+    parser.add_argument('--anomaly-fraction', type=float, default=0.2)
+    parser.add_argument('--spike-rate', type=float, default=0.002, help='isolated spikes per sample')
+    parser.add_argument('--drift-seconds', type=int, default=1800)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    detector = VitalsAnomalyDetector()
+    n = args.residents
+    codes = detector.codes([f'resident-{i}' for i in range(n)])
+    baseline = rng.normal(72, 6, n)
+
+    start = 1_700_000_000 // DAY_SECONDS * DAY_SECONDS
+    end = start + args.hours * 3600
+    # One episode for a fraction of residents, starting after the first day.
+    episodes = rng.random(n) < args.anomaly_fraction
+    onset = np.where(episodes, rng.uniform(start + DAY_SECONDS, end - 2 * 3600, n), np.inf)
+    duration = rng.uniform(15 * 60, 60 * 60, n)
+    drift = rng.random(n) < 0.5
+    magnitude = np.where(drift, 30.0, rng.choice([-25.0, 25.0], n))
+    ramp = np.where(drift, args.drift_seconds, 1.0)
+
+    batch_codes = np.repeat(codes, args.batch_seconds)
+    offsets = np.tile(np.arange(args.batch_seconds), n)
+    raised, recovered = [], []
+    samples = 0
+    process_seconds = 0.0
+    for batch_start in range(start, end, args.batch_seconds):
+        timestamps = batch_start + offsets
+        since = timestamps - onset[batch_codes]
+        shift = magnitude[batch_codes] * np.clip(since / ramp[batch_codes], 0, 1)
+        shift[(since < 0) | (since > duration[batch_codes])] = 0
+        values = (baseline[batch_codes] + 6 * np.sin(2 * np.pi * (timestamps % DAY_SECONDS) / DAY_SECONDS)
+                  + rng.normal(0, 3, len(offsets)) + shift)
+        spikes = rng.random(len(values)) < args.spike_rate
+        values[spikes] += rng.choice([-30.0, 30.0], spikes.sum())
+
+        t = time.perf_counter()
+        for event in detector.process('heart_rate', batch_codes, timestamps, values):
+            (raised if event.type == 'health_change' else recovered).append(event)
+        process_seconds += time.perf_counter() - t
+        samples += len(values)
+    print(f'{samples / 1e6:.1f}M samples ({n} residents x {args.hours} h at 1 Hz) in {process_seconds:.1f}s: '
+          f'{samples / process_seconds / 1e6:.2f}M samples/s, '
+          f'{process_seconds / samples * 1e9:.0f} ns per sample')
+
+    code_of = detector.resident_index
+    alerts_per_episode = np.zeros(n, dtype=int)
+    latency = np.full(n, np.nan)
+    false_alerts = 0
+    for event in raised:
+        code = code_of[event.resident_id]
+        confirmed = event.data['confirmed_at']
+        if onset[code] <= confirmed <= onset[code] + duration[code] + 300:
+            if not alerts_per_episode[code]:
+                latency[code] = confirmed - onset[code]
+            alerts_per_episode[code] += 1
+        else:
+            false_alerts += 1
+    detected = alerts_per_episode[episodes] > 0
+    resident_days = n * args.hours / 24
+    print(f'episodes: {episodes.sum()} injected, {detected.sum()} detected ({detected.mean():.1%}); '
+          f'steps {detected[~drift[episodes]].mean():.1%}, drifts {detected[drift[episodes]].mean():.1%}')
+    for name, mask in (('step', ~drift), ('drift', drift)):
+        chosen = latency[mask & (alerts_per_episode > 0)].tolist()
+        if chosen:
+            print(f'detection latency ({name}): p50={percentile(chosen, 50):.0f}s '
+                  f'p95={percentile(chosen, 95):.0f}s max={max(chosen):.0f}s')
+    print(f'false alerts: {false_alerts} ({false_alerts / resident_days:.4f} per resident-day); '
+          f'episodes alerted more than once: {(alerts_per_episode > 1).sum()}; '
+          f'recoveries: {len(recovered)}; spikes injected: {int(args.spike_rate * samples)}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+"""Ingest 1 Hz heart-rate data for 1,000 residents over 30 days, then query it.
+
+Samples are generated in blocks of --batch-seconds for all residents (a
+per-resident baseline, a daily rhythm and noise) and appended with
+VitalsStore.append_batch. The bench reports ingest throughput, disk usage of
+raw chunks versus rollups, and query latency for one resident at each
+resolution, plus a week of hourly data computed by scanning the raw grid
+instead of the rollups.
+
+With the defaults the raw chunks take about 10 GB of disk; use
+--raw-retention-days to keep only the most recent days of raw data.
+
+Usage: python benchmarks/bench_vitals_store.py [--residents 1000] [--days 30] [--batch-seconds 300]
+       [--raw-retention-days N] [--dir PATH]
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from common import format_latency, time_calls
+
+from vitals_store import DAY_SECONDS, VitalsStore
+
+
+def disk_usage(root, suffix):
+    """Bytes actually allocated on disk (chunk files are sparse until written)."""
+    total = 0
+    for directory, _, files in os.walk(root):
+        for name in files:
+            if name.endswith(suffix):
+                total += os.stat(os.path.join(directory, name)).st_blocks * 512
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--residents', type=int, default=1000)
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--batch-seconds', type=int, default=300)
+    parser.add_argument('--raw-retention-days', type=int, default=None)
+    parser.add_argument('--dir', default=None, help='store directory (default: a temporary one)')
+    parser.add_argument('--requests', type=int, default=50)
+    args = parser.parse_args()
+
+    root = args.dir or tempfile.mkdtemp(prefix='vitals-bench-')
+    rng = np.random.default_rng(0)
+    store = VitalsStore(root, raw_retention_days=args.raw_retention_days)
+    resident_ids = [f'resident-{i}' for i in range(args.residents)]
+    codes = store.codes(resident_ids)
+    baseline = rng.normal(72, 6, args.residents).astype(np.float32)
+
+    start = 1_700_000_000 // DAY_SECONDS * DAY_SECONDS
+    total_seconds = args.days * DAY_SECONDS
+    batch_codes = np.repeat(codes, args.batch_seconds)
+    offsets = np.tile(np.arange(args.batch_seconds), args.residents)
+    samples = 0
+    append_seconds = 0.0
+    began = time.perf_counter()
+    try:
+        for batch_start in range(start, start + total_seconds, args.batch_seconds):
+            timestamps = batch_start + offsets
+            rhythm = 6 * np.sin(2 * np.pi * (timestamps % DAY_SECONDS) / DAY_SECONDS).astype(np.float32)
+            values = np.repeat(baseline, args.batch_seconds) + rhythm + rng.normal(0, 3, len(offsets)).astype(np.float32)
+            t = time.perf_counter()
+            store.append_batch('heart_rate', batch_codes, timestamps, values)
+            append_seconds += time.perf_counter() - t
+            samples += len(values)
+            if (batch_start - start) % (5 * DAY_SECONDS) == 0 and batch_start > start:
+                print(f'  day {(batch_start - start) // DAY_SECONDS}: {samples / append_seconds / 1e6:.1f}M samples/s')
+        store.flush()
+        elapsed = time.perf_counter() - began
+        print(f'ingested {samples / 1e9:.2f}B samples ({args.residents} residents x {args.days} days at 1 Hz) '
+              f'in {elapsed:.0f}s: {samples / append_seconds / 1e6:.1f}M samples/s in append_batch, '
+              f'{samples / elapsed / 1e6:.1f}M/s including generation')
+        print(f'disk: raw {disk_usage(root, ".raw") / 1e9:.2f} GB, rollups {disk_usage(root, ".rollup") / 1e6:.0f} MB')
+
+        resident = resident_ids[args.residents // 2]
+        end = start + total_seconds
+        week = end - 7 * DAY_SECONDS
+        cases = [
+            ('last hour, raw', lambda: store.query('heart_rate', resident, end - 3600, end, resolution='raw')),
+            ('last day, minutes', lambda: store.query('heart_rate', resident, end - DAY_SECONDS, end)),
+            ('last week, hours', lambda: store.query('heart_rate', resident, week, end)),
+            ('30 days, days', lambda: store.query('heart_rate', resident, start, end)),
+            ('30-day summary', lambda: store.summary('heart_rate', resident, start, end)),
+        ]
+        for name, call in cases:
+            print(format_latency(name, time_calls(call, args.requests, warmup=2)))
+
+        if args.days >= 7 and (args.raw_retention_days is None or args.raw_retention_days >= 7):
+            def week_from_raw():
+                raw = store.query('heart_rate', resident, week, end, resolution='raw')
+                return raw['mean'].reshape(-1, 3600).mean(axis=1)
+
+            print(format_latency('last week, raw scan', time_calls(week_from_raw, args.requests, warmup=2)))
+            hourly = store.query('heart_rate', resident, week, end, resolution='hour')['mean']
+            print(f'hourly means agree with the raw scan: {np.allclose(hourly, week_from_raw(), rtol=1e-5)}')
+    finally:
+        store.close()
+        if args.dir is None:
+            shutil.rmtree(root)
+
+
+if __name__ == '__main__':
+    main()
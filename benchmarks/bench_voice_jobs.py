@@ -0,0 +1,131 @@
+"""Load test for /api/voice-command: synchronous replies versus queued jobs.
+
+Runs the blueprint on a real threaded HTTP server and fires commands from
+concurrent clients. Speaking is simulated with a fixed delay (--speak-ms),
+standing in for text-to-speech. For each concurrency level it reports:
+
+- sync:  the request waits for the reply, so every client is held for the
+         queue wait plus the speaking time;
+- async: the request returns 202 with a job id at once; the bench then waits
+         for every job and reports both acceptance and completion throughput.
+
+It also checks the per-resident ordering guarantee: each resident's jobs must
+run one at a time, in the order they were accepted.
+
+Usage: python benchmarks/bench_voice_jobs.py [--clients 1,8,32] [--commands N] [--residents N] [--speak-ms MS]
+"""
+import argparse
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from werkzeug.serving import WSGIRequestHandler, make_server
+
+from common import create_app, percentile
+
+import elderly_care
+
+COMMANDS = ['كم الوقت', 'تذكير دواء', 'مرحبا', 'مساعدة طوارئ', 'ماذا تقول']
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+    def log_request(self, *args, **kwargs):
+        pass
+
+
+def post(url, body):
+    request = urllib.request.Request(url, json.dumps(body).encode(), {'Content-Type': 'application/json'})
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def run_clients(base_url, clients, commands, residents, asynchronous):
+    """Each client sends `commands` commands for its resident; returns (latencies, job ids, rejected, seconds)."""
+    latencies = []
+    job_ids = []
+    rejected = [0]
+    lock = threading.Lock()
+
+    def client(index):
+        resident_id = f'resident-{index % residents}'
+        for i in range(commands):
+            body = {'command': COMMANDS[i % len(COMMANDS)], 'async': asynchronous}
+            while True:
+                start = time.perf_counter()
+                status, result = post(f'{base_url}/api/voice-command?resident_id={resident_id}', body)
+                elapsed = time.perf_counter() - start
+                if status != 503:
+                    break
+                with lock:
+                    rejected[0] += 1
+                time.sleep(0.05)
+            with lock:
+                latencies.append(elapsed)
+                job_ids.append(result['job_id'])
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, job_ids, rejected[0], time.perf_counter() - started
+
+
+def check_ordering(jobs):
+    """Returns the number of resident jobs that overlapped or ran out of submission order."""
+    violations = 0
+    by_resident = {}
+    for job in jobs:
+        by_resident.setdefault(job['resident_id'], []).append(job)
+    for resident_jobs in by_resident.values():
+        resident_jobs.sort(key=lambda job: job['seq'])
+        for previous, job in zip(resident_jobs, resident_jobs[1:]):
+            if job['started_at'] < previous['finished_at']:
+                violations += 1
+    return violations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--clients', default='1,8,32')
+    parser.add_argument('--commands', type=int, default=20, help='commands per client')
+    parser.add_argument('--residents', type=int, default=8)
+    parser.add_argument('--speak-ms', type=float, default=20.0)
+    args = parser.parse_args()
+
+    app = create_app()
+    app.voice_assistant.speak = lambda text: time.sleep(args.speak_ms / 1e3)
+    server = make_server('127.0.0.1', 0, app, threaded=True, request_handler=QuietRequestHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f'http://127.0.0.1:{server.server_port}'
+    with app.app_context():
+        jobs = elderly_care.voice_jobs()
+
+    print(f'{jobs.stats()["workers"]} workers, {args.speak_ms:.0f} ms per reply, '
+          f'{args.residents} residents, {args.commands} commands per client')
+    print(f'{"mode":<6} {"clients":>7} {"req/s":>8} {"p50 ms":>8} {"p99 ms":>8} {"done/s":>8} '
+          f'{"rejected":>8} {"order":>6}')
+    try:
+        for clients in [int(c) for c in args.clients.split(',')]:
+            for mode in ('sync', 'async'):
+                latencies, job_ids, rejected, seconds = run_clients(
+                    base_url, clients, args.commands, args.residents, mode == 'async')
+                finished = [jobs.wait(job_id, timeout=60) for job_id in job_ids]
+                done_seconds = max(job['finished_at'] for job in finished) - min(job['submitted_at'] for job in finished)
+                violations = check_ordering(finished)
+                print(f'{mode:<6} {clients:>7} {len(latencies) / seconds:>8.0f} '
+                      f'{percentile(latencies, 50) * 1e3:>8.1f} {percentile(latencies, 99) * 1e3:>8.1f} '
+                      f'{len(finished) / done_seconds:>8.0f} {rejected:>8} {"ok" if not violations else violations:>6}')
+    finally:
+        server.shutdown()
+        jobs.shutdown()
+
+
+if __name__ == '__main__':
+    main()
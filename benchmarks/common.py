@@ -0,0 +1,103 @@
+"""Shared helpers for the benchmark scripts."""
+import os
+import sys
+import threading
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+
+def percentile(samples, pct):
+    """Returns the nearest-rank percentile of a list of samples."""
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[rank]
+
+
+def time_calls(func, iterations, warmup=10):
+    """Calls func repeatedly and returns the per-call latencies in seconds."""
+    for _ in range(warmup):
+        func()
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def run_concurrent(make_worker, concurrency, requests):
+    """Makes `requests` calls in total from `concurrency` threads.
+
+    make_worker(index) is called once per thread and returns that thread's
+    call; a call that raises or returns a falsy value counts as a failure.
+    Returns (latencies in seconds, failures, elapsed seconds).
+    """
+    latencies = []
+    failures = [0]
+    lock = threading.Lock()
+    remaining = iter(range(requests))
+    workers = [make_worker(index) for index in range(concurrency)]
+
+    def run(call):
+        mine, failed = [], 0
+        while next(remaining, None) is not None:
+            start = time.perf_counter()
+            try:
+                ok = call()
+            except Exception:
+                ok = False
+            mine.append(time.perf_counter() - start)
+            failed += not ok
+        with lock:
+            latencies.extend(mine)
+            failures[0] += failed
+
+    threads = [threading.Thread(target=run, args=(call,)) for call in workers]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, failures[0], time.perf_counter() - started
+
+
+def latency_summary(latencies, elapsed=None, failures=0):
+    """Count, throughput and latency percentiles (ms) as a JSON-ready dict.
+
+    Without `elapsed` the calls are taken to have run one after another.
+    """
+    elapsed = elapsed if elapsed is not None else sum(latencies)
+    return {
+        'count': len(latencies),
+        'failures': failures,
+        'throughput_per_s': len(latencies) / elapsed if elapsed else 0.0,
+        'p50_ms': percentile(latencies, 50) * 1e3,
+        'p95_ms': percentile(latencies, 95) * 1e3,
+        'p99_ms': percentile(latencies, 99) * 1e3,
+        'max_ms': max(latencies, default=0.0) * 1e3,
+    }
+
+
+def format_latency(name, latencies):
+    return (f"{name:<24} p50 {percentile(latencies, 50) * 1e6:9.1f} us"
+            f"   p99 {percentile(latencies, 99) * 1e6:9.1f} us")
+
+
+def create_app(model_store=None):
+    """Builds a Flask app with the elderly-care blueprint the way the dashboard server does."""
+    from flask import Flask
+
+    from elderly_care import elderly_care_bp
+    from health_recommendation_system import HealthRecommendationSystem
+    from voice_assistant import VoiceAssistant
+
+    app = Flask(__name__)
+    app.register_blueprint(elderly_care_bp, url_prefix='/api')
+    app.health_recommender = HealthRecommendationSystem(model_store=model_store)
+    app.voice_assistant = VoiceAssistant()
+    return app
@@ -1,124 +1,450 @@
-from flask import Blueprint, jsonify, request, current_app
+from flask import Blueprint, abort, jsonify, request, current_app, url_for
 from datetime import datetime, timedelta
+import hashlib
 import random
 
+import threading
+
+from activity_log_store import ActivityLog, SQLiteActivityLogStore
+from alert_store import AlertStore, SQLiteAlertStore, serialize_alert
+from event_broadcaster import EventBroadcaster
+from model_retrainer import RetrainingService
+from resident_state import DEFAULT_RESIDENT_ID, MAX_RESIDENT_ID_BYTES, ResidentStateStore, shared_database_path
+from vitals_anomaly import VitalsAnomalyDetector
+from vitals_store import RESOLUTIONS, VitalsStore
+from voice_jobs import QueueFullError, VoiceJobQueue
+
 
 elderly_care_bp = Blueprint('elderly_care', __name__)
 
-# محاكاة بيانات المراقبة
-monitoring_data = {
-    'system_status': 'active',
-    'last_movement': datetime.now() - timedelta(minutes=5),
-    'activity_level': 'normal',
-    'fall_detected': False,
-    'emergency_alerts': []
-}
-
-# محاكاة البيانات الصحية
-health_data = {
-    'sleep_hours': 7.5,
-    'daily_activity': 'medium',
-    'last_medication': datetime.now() - timedelta(hours=2),
-    'heart_rate': 72,
-    'activity_pattern': 'normal'
-}
-
-# سجل الأنشطة
-activity_log = [
-    {
-        'timestamp': datetime.now() - timedelta(minutes=30),
-        'message': 'تم رصد حركة طبيعية في غرفة المعيشة',
-        'type': 'movement'
-    },
-    {
-        'timestamp': datetime.now() - timedelta(hours=1, minutes=15),
-        'message': 'تذكير بتناول الدواء - تم التأكيد',
-        'type': 'medication'
-    },
-    {
-        'timestamp': datetime.now() - timedelta(hours=1, minutes=45),
-        'message': 'بداية النشاط اليومي',
-        'type': 'activity'
-    },
-    {
-        'timestamp': datetime.now() - timedelta(hours=4),
-        'message': 'استيقاظ من النوم',
-        'type': 'sleep'
+# حالة المراقبة والصحة لكل مقيم (مشتركة بين العمليات حسب RESIDENT_STATE_BACKEND)
+resident_states = ResidentStateStore()
+
+# مع واجهة خلفية مشتركة (sqlite/shm) يتشارك العمال سجل الأنشطة والتنبيهات عبر SQLite أيضاً.
+# البث المباشر (events) وكاشف التغيرات الصحية يبقيان لكل عملية: يصل البث لمشتركي العامل
+# الذي وقع فيه التغيير، وتعيد لوحة التحكم المزامنة بالاستطلاع البطيء.
+SHARED_DB_PATH = shared_database_path()
+
+# تنبيهات الطوارئ: النشطة في الذاكرة والمحلولة تُؤرشف على القرص، أو كلها في SQLite المشتركة
+emergency_alerts = SQLiteAlertStore(SHARED_DB_PATH) if SHARED_DB_PATH else AlertStore()
+
+# سجل الأنشطة لكل مقيم (مخزن دائري محدود الحجم مع عدادات زمنية)
+ACTIVITY_LOG_MAX_ENTRIES = 200
+shared_activity_logs = SQLiteActivityLogStore(SHARED_DB_PATH, ACTIVITY_LOG_MAX_ENTRIES) if SHARED_DB_PATH else None
+activity_logs = {}
+_activity_logs_lock = threading.Lock()
+
+def activity_log_for(resident_id):
+    """سجل أنشطة المقيم، يُنشأ عند أول استخدام"""
+    log = activity_logs.get(resident_id)
+    if log is None:
+        with _activity_logs_lock:
+            log = activity_logs.get(resident_id)
+            if log is None:
+                if shared_activity_logs is not None:
+                    log = shared_activity_logs.log(resident_id)
+                else:
+                    log = ActivityLog(max_entries=ACTIVITY_LOG_MAX_ENTRIES)
+                activity_logs[resident_id] = log
+    return log
+
+# سجل تجريبي للمقيم الافتراضي (مرة واحدة فقط عند مشاركة السجل بين العمال)
+if activity_log_for(DEFAULT_RESIDENT_ID).latest_seq() == 0:
+    for _minutes_ago, _message, _type in [
+        (240, 'استيقاظ من النوم', 'sleep'),
+        (105, 'بداية النشاط اليومي', 'activity'),
+        (75, 'تذكير بتناول الدواء - تم التأكيد', 'medication'),
+        (30, 'تم رصد حركة طبيعية في غرفة المعيشة', 'movement')
+    ]:
+        activity_log_for(DEFAULT_RESIDENT_ID).append(_message, _type, timestamp=datetime.now() - timedelta(minutes=_minutes_ago))
+
+# السجل الزمني للقياسات الحيوية (مع ملخصات لكل دقيقة وساعة ويوم)
+VITAL_METRICS = ('heart_rate', 'sleep_hours')
+# تُحذف القراءات الخام (قراءة لكل ثانية) بعد هذه المدة وتبقى الملخصات
+VITALS_RAW_RETENTION_DAYS = 30
+vitals = VitalsStore(raw_retention_days=VITALS_RAW_RETENTION_DAYS)
+
+# كشف التغيرات الصحية غير المعتادة مقارنة بخط الأساس الخاص بكل مقيم
+vital_anomalies = VitalsAnomalyDetector()
+_vital_anomalies_lock = threading.Lock()
+# التنبيه النشط لكل (مقيم، قياس) حتى لا يتكرر التنبيه لنفس النوبة
+health_change_alerts = {}
+VITAL_NAMES = {'heart_rate': 'معدل ضربات القلب', 'sleep_hours': 'ساعات النوم'}
+
+# الحد الأقصى لعدد المقيمين في طلب إحصائيات مجمّع واحد
+BULK_MAX_RESIDENTS = 1000
+
+# قناة البث المباشر للوحات التحكم (Server-Sent Events)
+STREAM_HEARTBEAT_SECONDS = 15
+events = EventBroadcaster()
+
+# طابور الأوامر الصوتية: عدد محدود من العمال، مع الحفاظ على ترتيب أوامر كل مقيم
+VOICE_WORKERS = 4
+VOICE_MAX_PENDING = 256
+VOICE_SYNC_TIMEOUT_SECONDS = 5
+VOICE_MAX_WAIT_SECONDS = 30
+_voice_jobs_lock = threading.Lock()
+
+# إعادة تدريب نموذج التوصيات في عملية منفصلة (None: عند الطلب فقط)
+MODEL_RETRAIN_INTERVAL_SECONDS = None
+MODEL_RETRAIN_MAX_REGRESSION = 0.01
+_model_retrainer_lock = threading.Lock()
+
+def invalid_resident_id(resident_id):
+    """سبب رفض معرّف المقيم، أو None إن كان صالحاً"""
+    if len(resident_id.encode('utf-8')) > MAX_RESIDENT_ID_BYTES:
+        return f'resident_id must be at most {MAX_RESIDENT_ID_BYTES} bytes'
+    return None
+
+def get_resident_id():
+    """معرّف المقيم من الاستعلام أو جسم الطلب (الافتراضي: DEFAULT_RESIDENT_ID)
+
+    يُرفض الطلب (400) إن كان المعرّف أطول مما تقبله الواجهات الخلفية.
+    """
+    resident_id = request.args.get('resident_id')
+    if resident_id is None and request.is_json:
+        resident_id = (request.get_json(silent=True) or {}).get('resident_id')
+    resident_id = str(resident_id or DEFAULT_RESIDENT_ID)
+    error = invalid_resident_id(resident_id)
+    if error:
+        response = jsonify({'error': error})
+        response.status_code = 400
+        abort(response)
+    return resident_id
+
+def log_activity(resident_id, message, type):
+    """إضافة إدخال إلى سجل أنشطة المقيم وبثه للمشتركين"""
+    entry = activity_log_for(resident_id).append(message, type)
+    events.publish('log', dict(entry['serialized'], resident_id=resident_id), topic=resident_id)
+    return entry
+
+def monitoring_snapshot(state):
+    return {
+        'system_status': state.system_status,
+        'last_movement': state.last_movement.astimezone().isoformat(),
+        'activity_level': state.activity_level,
+        'fall_detected': state.fall_detected
+    }
+
+def health_snapshot(state):
+    return {
+        'sleep_hours': state.sleep_hours,
+        'daily_activity': state.daily_activity,
+        'last_medication': state.last_medication.astimezone().isoformat(),
+        'heart_rate': state.heart_rate
+    }
+
+def publish_changes(event_type, resident_id, before, after):
+    """بث الحقول التي تغيرت فقط"""
+    delta = {key: value for key, value in after.items() if before.get(key) != value}
+    if delta:
+        delta['resident_id'] = resident_id
+        events.publish(event_type, delta, topic=resident_id)
+
+def record_vitals(resident_id, state):
+    """إضافة القياسات الحيوية الحالية إلى السجل الزمني للمقيم وفحصها بحثاً عن تغيرات غير معتادة"""
+    now = datetime.now()
+    with _vital_anomalies_lock:
+        code = vital_anomalies.codes([resident_id])
+        for metric in VITAL_METRICS:
+            value = getattr(state, metric)
+            vitals.append(metric, resident_id, now, value)
+            for event in vital_anomalies.update(metric, code, [now.timestamp()], [value]):
+                handle_health_change(event)
+
+def handle_health_change(event):
+    """تحويل نتيجة الكشف إلى تنبيه طوارئ (تنبيه واحد لكل نوبة، ويُغلق تلقائياً عند العودة للمعتاد)"""
+    resident_id, data = event.resident_id, event.data
+    key = (resident_id, data['metric'])
+    name = VITAL_NAMES.get(data['metric'], data['metric'])
+    if event.type == 'health_change':
+        if emergency_alerts.get(health_change_alerts.get(key)) is not None:
+            return
+        change = 'ارتفاع' if data['direction'] == 'high' else 'انخفاض'
+        alert = emergency_alerts.raise_alert(
+            f"{change} غير معتاد في {name}: {data['value']:g} (المعتاد {data['expected']:.1f})",
+            'medium',
+            resident_id=resident_id
+        )
+        health_change_alerts[key] = alert['id']
+        publish_alert('raised', alert)
+        log_activity(resident_id, f"تغير صحي: {alert['message']}", 'health_change')
+    else:
+        alert = emergency_alerts.resolve(health_change_alerts.pop(key, None))
+        if alert is not None:
+            publish_alert('resolved', alert)
+            log_activity(resident_id, f"عاد {name} إلى المعدل المعتاد", 'health_recovered')
+
+# أنماط النشاط التي يكتشفها خط أنابيب الحساسات بصيغة لوحة التحكم
+SENSOR_ACTIVITY_LEVELS = {'Low Activity': 'low', 'Normal Activity': 'normal', 'High Activity': 'high'}
+# تنبيه السقوط النشط لكل مقيم؛ حله يعيد fall_detected إلى False
+fall_alerts = {}
+
+def handle_sensor_event(event):
+    """نقل ما يكتشفه خط أنابيب الحساسات إلى حالة المقيم والبث المباشر والتنبيهات"""
+    resident_id = event.resident_id
+    at = datetime.fromtimestamp(event.timestamp)
+    if event.type == 'fall':
+        changes = {'fall_detected': True, 'last_movement': at}
+    elif event.type == 'activity_level':
+        changes = {'activity_level': SENSOR_ACTIVITY_LEVELS.get(event.data['activity_pattern'], 'normal'),
+                   'last_movement': at}
+    elif event.type == 'inactivity':
+        log_activity(resident_id, f"لا توجد حركة منذ {int(event.data['idle_seconds'] // 60)} دقيقة", 'inactivity')
+        return
+    else:
+        return
+
+    before, state = resident_states.update(resident_id, **changes)
+    publish_changes('monitoring', resident_id, monitoring_snapshot(before), monitoring_snapshot(state))
+    if event.type == 'fall' and emergency_alerts.get(fall_alerts.get(resident_id)) is None:
+        alert = emergency_alerts.raise_alert('تم رصد سقوط', 'high', resident_id=resident_id)
+        fall_alerts[resident_id] = alert['id']
+        publish_alert('raised', alert)
+        log_activity(resident_id, f"تنبيه طوارئ: {alert['message']}", 'fall')
+
+def clear_fall(alert):
+    """إعادة fall_detected إلى False عند حل تنبيه السقوط"""
+    resident_id = alert['resident_id']
+    if fall_alerts.get(resident_id) != alert['id']:
+        return
+    del fall_alerts[resident_id]
+    before, state = resident_states.update(resident_id, fall_detected=False)
+    publish_changes('monitoring', resident_id, monitoring_snapshot(before), monitoring_snapshot(state))
+
+def connect_sensor_pipeline(pipeline):
+    """ربط خط أنابيب حساسات (SensorPipeline) يعمل في هذه العملية بلوحة التحكم؛ يعيد رمز الاشتراك
+
+    السقوط وعدم الحركة وتغير مستوى النشاط تصل بذلك إلى البث المباشر فور اكتشافها،
+    دون انتظار طلب من لوحة التحكم.
+    """
+    return pipeline.subscribe(handle_sensor_event, types=('fall', 'inactivity', 'activity_level'))
+
+def simulate_monitoring_update():
+    return {
+        'last_movement': datetime.now() - timedelta(minutes=random.randint(1, 10)),
+        'activity_level': random.choice(['low', 'normal', 'high'])
+    }
+
+def simulate_health_update():
+    return {
+        'sleep_hours': round(6 + random.random() * 3, 1),
+        'daily_activity': random.choice(['low', 'medium', 'high', 'excellent']),
+        'heart_rate': random.randint(65, 85)
     }
-]
 
 @elderly_care_bp.route('/monitoring', methods=['GET'])
 def get_monitoring_data():
     """الحصول على بيانات المراقبة الحالية"""
+    resident_id = get_resident_id()
     # محاكاة تحديث البيانات
-    monitoring_data['last_movement'] = datetime.now() - timedelta(minutes=random.randint(1, 10))
-    monitoring_data['activity_level'] = random.choice(['low', 'normal', 'high'])
+    before, state = resident_states.update(resident_id, **simulate_monitoring_update())
+    publish_changes('monitoring', resident_id, monitoring_snapshot(before), monitoring_snapshot(state))
     
     return jsonify({
-        'system_status': monitoring_data['system_status'],
-        'last_movement': monitoring_data['last_movement'].isoformat(),
-        'activity_level': monitoring_data['activity_level'],
-        'fall_detected': monitoring_data['fall_detected'],
-        'emergency_alerts_count': len(monitoring_data['emergency_alerts'])
+        'resident_id': resident_id,
+        'system_status': state.system_status,
+        'last_movement': state.last_movement.isoformat(),
+        'activity_level': state.activity_level,
+        'fall_detected': state.fall_detected,
+        'emergency_alerts_count': emergency_alerts.total_count_for(resident_id)
     })
 
 @elderly_care_bp.route('/health', methods=['GET'])
 def get_health_data():
     """الحصول على البيانات الصحية"""
+    resident_id = get_resident_id()
     # محاكاة تحديث البيانات الصحية
-    health_data['sleep_hours'] = round(6 + random.random() * 3, 1)
-    health_data['daily_activity'] = random.choice(['low', 'medium', 'high', 'excellent'])
-    health_data['heart_rate'] = random.randint(65, 85)
+    before, state = resident_states.update(resident_id, **simulate_health_update())
+    record_vitals(resident_id, state)
+    publish_changes('health', resident_id, health_snapshot(before), health_snapshot(state))
     
     return jsonify({
-        'sleep_hours': health_data['sleep_hours'],
-        'daily_activity': health_data['daily_activity'],
-        'last_medication': health_data['last_medication'].isoformat(),
-        'heart_rate': health_data['heart_rate'],
-        'activity_pattern': health_data['activity_pattern']
+        'resident_id': resident_id,
+        'sleep_hours': state.sleep_hours,
+        'daily_activity': state.daily_activity,
+        'last_medication': state.last_medication.isoformat(),
+        'heart_rate': state.heart_rate,
+        'activity_pattern': state.activity_pattern
+    })
+
+@elderly_care_bp.route('/health/history', methods=['GET'])
+def get_health_history():
+    """السجل الزمني لقياس حيوي (min/max/mean/count لكل فترة)
+
+    metric: heart_rate أو sleep_hours. الفترة: days (افتراضياً 7) أو start/end بصيغة ISO.
+    resolution: raw أو minute أو hour أو day؛ بدونها تُختار أدق دقة لا تتجاوز 1000 نقطة،
+    فالفترات الطويلة تُقرأ من الملخصات فقط.
+    """
+    resident_id = get_resident_id()
+    metric = request.args.get('metric', 'heart_rate')
+    if metric not in VITAL_METRICS:
+        return jsonify({'error': f"metric must be one of: {', '.join(VITAL_METRICS)}"}), 400
+    resolution = request.args.get('resolution')
+    if resolution is not None and resolution != 'raw' and resolution not in RESOLUTIONS:
+        return jsonify({'error': f"resolution must be one of: raw, {', '.join(RESOLUTIONS)}"}), 400
+    days = request.args.get('days', 7, type=float)
+    if not days >= 0:
+        return jsonify({'error': 'days must be a non-negative number'}), 400
+    try:
+        end = datetime.fromisoformat(request.args['end']) if 'end' in request.args else datetime.now()
+        start = (datetime.fromisoformat(request.args['start']) if 'start' in request.args
+                 else end - timedelta(days=days))
+    except ValueError:
+        return jsonify({'error': 'start and end must be ISO 8601 timestamps'}), 400
+    except OverflowError:
+        return jsonify({'error': 'days is out of range'}), 400
+    try:
+        reversed_range = start.timestamp() > end.timestamp()
+    except (OverflowError, ValueError):
+        return jsonify({'error': 'start and end are out of range'}), 400
+    if reversed_range:
+        return jsonify({'error': 'start must not be after end'}), 400
+
+    series = vitals.query(metric, resident_id, start, end, resolution=resolution)
+    return jsonify({
+        'resident_id': resident_id,
+        'metric': metric,
+        'resolution': series['resolution'],
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'timestamps': [datetime.fromtimestamp(t).isoformat() for t in series['timestamps'].tolist()],
+        'min': series['min'].round(2).tolist(),
+        'max': series['max'].round(2).tolist(),
+        'mean': series['mean'].round(2).tolist(),
+        'count': series['count'].astype(int).tolist()
     })
 
 @elderly_care_bp.route('/activity-log', methods=['GET'])
 def get_activity_log():
-    """الحصول على سجل الأنشطة"""
-    # تحويل التواريخ إلى نص قابل للقراءة
-    formatted_log = []
-    for entry in activity_log:
-        formatted_log.append({
-            'timestamp': entry['timestamp'].isoformat(),
-            'message': entry['message'],
-            'type': entry['type'],
-            'time_ago': get_time_ago(entry['timestamp'])
+    """الحصول على سجل الأنشطة
+
+    - since=<seq> أو since_ts=<ISO timestamp>: إرجاع الإدخالات الجديدة فقط مع المؤشر الجديد
+    - cursor=<seq>: ترقيم الصفحات للإدخالات الأقدم
+    يُحسب "منذ كم" في المتصفح، لذا يمكن تخزين الاستجابات مؤقتاً.
+    """
+    resident_id = get_resident_id()
+    activity_log = activity_log_for(resident_id)
+    limit = min(max(request.args.get('limit', 50, type=int), 1), ACTIVITY_LOG_MAX_ENTRIES)
+    since = request.args.get('since', type=int)
+    since_ts = request.args.get('since_ts')
+
+    if since is not None or since_ts:
+        timestamp = None
+        if since_ts:
+            try:
+                timestamp = datetime.fromisoformat(since_ts)
+            except ValueError:
+                return jsonify({'error': 'Invalid since_ts timestamp'}), 400
+            if timestamp.tzinfo is not None:
+                timestamp = timestamp.astimezone().replace(tzinfo=None)
+        entries, latest, complete = activity_log.since(seq=since, timestamp=timestamp, limit=limit)
+        response = jsonify({
+            'resident_id': resident_id,
+            'entries': [entry['serialized'] for entry in entries],
+            'cursor': latest,
+            # False: سقطت إدخالات من النافذة، على العميل إعادة التحميل بالكامل
+            'complete': complete
         })
-    
-    return jsonify(formatted_log)
+        etag_parts = (resident_id, latest, since, since_ts, limit)
+    else:
+        cursor = request.args.get('cursor', type=int)
+        entries, next_cursor = activity_log.page(cursor=cursor, limit=limit)
+        latest = activity_log.latest_seq()
+        response = jsonify({
+            'resident_id': resident_id,
+            'entries': [entry['serialized'] for entry in entries],
+            'next_cursor': next_cursor,
+            'cursor': latest
+        })
+        etag_parts = (resident_id, latest, cursor, limit)
+
+    # بصمة الأجزاء بدل المعرّف الخام (قد يحتوي على " فلا يصلح داخل ETag)
+    response.set_etag(hashlib.sha1('\0'.join(map(str, etag_parts)).encode('utf-8')).hexdigest())
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
+
+def publish_alert(action, alert):
+    """بث تغيّر حالة تنبيه مع عدادات المقيم الحالية"""
+    resident_id = alert['resident_id']
+    events.publish('alert', dict(
+        serialize_alert(alert),
+        action=action,
+        active_alerts=emergency_alerts.active_count_for(resident_id),
+        total_alerts=emergency_alerts.total_count_for(resident_id)
+    ), topic=resident_id)
 
 @elderly_care_bp.route('/emergency', methods=['POST'])
 def trigger_emergency():
     """تفعيل تنبيه الطوارئ"""
     data = request.json
-    alert = {
-        'timestamp': datetime.now(),
-        'message': data.get('message', 'تنبيه طوارئ عام'),
-        'severity': data.get('severity', 'high'),
-        'resolved': False
-    }
-    
-    monitoring_data['emergency_alerts'].append(alert)
+    resident_id = get_resident_id()
+    alert = emergency_alerts.raise_alert(
+        data.get('message', 'تنبيه طوارئ عام'),
+        data.get('severity', 'high'),
+        resident_id=resident_id
+    )
+    publish_alert('raised', alert)
     
     # إضافة إلى سجل الأنشطة
-    activity_log.insert(0, {
-        'timestamp': datetime.now(),
-        'message': f"تنبيه طوارئ: {alert['message']}",
-        'type': 'emergency'
-    })
+    log_activity(resident_id, f"تنبيه طوارئ: {alert['message']}", 'emergency')
     
     return jsonify({
         'status': 'success',
         'message': 'تم إرسال تنبيه الطوارئ بنجاح',
-        'alert_id': len(monitoring_data['emergency_alerts']) - 1
+        'alert_id': alert['id'],
+        'resident_id': resident_id
     }), 201
 
+@elderly_care_bp.route('/alerts', methods=['GET'])
+def get_active_alerts():
+    """الحصول على تنبيهات الطوارئ النشطة (لمقيم واحد أو للجميع بدون resident_id)"""
+    resident_id = request.args.get('resident_id')
+    if resident_id is None:
+        active_count, total_count = emergency_alerts.active_count, emergency_alerts.total_count
+    else:
+        active_count = emergency_alerts.active_count_for(resident_id)
+        total_count = emergency_alerts.total_count_for(resident_id)
+    return jsonify({
+        'resident_id': resident_id,
+        'active_alerts': active_count,
+        'total_alerts': total_count,
+        'alerts': [serialize_alert(alert) for alert in emergency_alerts.active(resident_id)]
+    })
+
+def _alert_for_request(alert_id):
+    """التنبيه النشط المطلوب، مع التحقق من المقيم إن حُدد"""
+    alert = emergency_alerts.get(alert_id)
+    resident_id = request.args.get('resident_id')
+    if alert is None or (resident_id is not None and alert['resident_id'] != resident_id):
+        return None
+    return alert
+
+@elderly_care_bp.route('/alerts/<alert_id>/acknowledge', methods=['POST'])
+def acknowledge_alert(alert_id):
+    """تأكيد استلام تنبيه طوارئ"""
+    data = request.get_json(silent=True) or {}
+    if _alert_for_request(alert_id) is None:
+        return jsonify({'error': 'Alert not found or already resolved'}), 404
+    alert = emergency_alerts.acknowledge(alert_id, by=data.get('by'))
+    if alert is None:
+        return jsonify({'error': 'Alert not found or already resolved'}), 404
+    publish_alert('acknowledged', alert)
+    return jsonify(serialize_alert(alert))
+
+@elderly_care_bp.route('/alerts/<alert_id>/resolve', methods=['POST'])
+def resolve_alert(alert_id):
+    """إغلاق تنبيه طوارئ وأرشفته"""
+    if _alert_for_request(alert_id) is None:
+        return jsonify({'error': 'Alert not found or already resolved'}), 404
+    alert = emergency_alerts.resolve(alert_id)
+    if alert is None:
+        return jsonify({'error': 'Alert not found or already resolved'}), 404
+    publish_alert('resolved', alert)
+    clear_fall(alert)
+    log_activity(alert['resident_id'], f"تم حل تنبيه الطوارئ: {alert['message']}", 'emergency_resolved')
+    return jsonify(serialize_alert(alert))
+
 @elderly_care_bp.route('/test-system', methods=['POST'])
 def test_system():
     """اختبار النظام"""
@@ -132,14 +458,12 @@ def test_system():
     }
     
     # إضافة إلى سجل الأنشطة
-    activity_log.insert(0, {
-        'timestamp': datetime.now(),
-        'message': 'تم اختبار النظام بنجاح - جميع الأنظمة تعمل بشكل طبيعي',
-        'type': 'system_test'
-    })
+    resident_id = get_resident_id()
+    log_activity(resident_id, 'تم اختبار النظام بنجاح - جميع الأنظمة تعمل بشكل طبيعي', 'system_test')
     
     return jsonify({
         'status': 'success',
+        'resident_id': resident_id,
         'message': 'تم اختبار النظام بنجاح',
         'results': test_results
     })
@@ -149,23 +473,47 @@ def add_log_entry():
     """إضافة إدخال جديد إلى سجل الأنشطة"""
     data = request.json
     
-    new_entry = {
-        'timestamp': datetime.now(),
-        'message': data.get('message', 'نشاط جديد'),
-        'type': data.get('type', 'general')
-    }
-    
-    activity_log.insert(0, new_entry)
-    
-    # الاحتفاظ بآخر 50 إدخال فقط
-    if len(activity_log) > 50:
-        activity_log.pop()
-    
+    # السجل محدود الحجم، فتُحذف الإدخالات الأقدم تلقائياً
+    resident_id = get_resident_id()
+    log_activity(resident_id, data.get('message', 'نشاط جديد'), data.get('type', 'general'))
+
     return jsonify({
         'status': 'success',
+        'resident_id': resident_id,
         'message': 'تم إضافة الإدخال بنجاح'
     }), 201
 
+@elderly_care_bp.route('/stream', methods=['GET'])
+def stream_events():
+    """بث مباشر لتغييرات المراقبة والصحة والتنبيهات والسجل (Server-Sent Events)
+
+    resident_id يقصر البث على مقيم واحد؛ بدونه تصل أحداث جميع المقيمين (للمشرفين).
+    يحجز كل مشترك خيطاً طوال الاتصال، لذا يتطلب عاملاً متعدد الخيوط أو gevent.
+    """
+    subscription = events.subscribe(
+        request.headers.get('Last-Event-ID', type=int),
+        topic=request.args.get('resident_id')
+    )
+
+    def generate():
+        try:
+            yield 'retry: 3000\n\n'
+            while True:
+                frame = subscription.get(timeout=STREAM_HEARTBEAT_SECONDS)
+                yield frame if frame is not None else ': keepalive\n\n'
+        finally:
+            events.unsubscribe(subscription)
+
+    response = current_app.response_class(generate(), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+@elderly_care_bp.route('/stream/stats', methods=['GET'])
+def get_stream_stats():
+    """إحصائيات قناة البث المباشر"""
+    return jsonify(events.stats())
+
 def get_time_ago(timestamp):
     """حساب الوقت المنقضي منذ الحدث"""
     now = datetime.now()
@@ -182,103 +530,328 @@ def get_time_ago(timestamp):
     else:
         return "الآن"
 
-@elderly_care_bp.route("/recommendations", methods=["GET"])
-def get_health_recommendations():
-    """الحصول على توصيات صحية مخصصة"""
-    # هنا يمكننا استخدام بيانات حقيقية من قاعدة البيانات أو محاكاة بيانات المستخدم
-    # For demonstration, we use some fixed values or random values
-    age = random.randint(65, 95)
-    sleep_hours = round(6 + random.random() * 3, 1)
-    daily_activity_level = random.choice(["low", "medium", "high"])
-    heart_rate = random.randint(60, 100)
-    medication_adherence = round(random.uniform(0.5, 1.0), 2)
-    fall_risk_score = round(random.uniform(0.0, 1.0), 2)
-
-    recommender = current_app.health_recommender # Access the recommender from current_app
-    recommendation = recommender.get_recommendations(
-        age=age, 
-        sleep_hours=sleep_hours, 
-        daily_activity_level=daily_activity_level, 
-        heart_rate=heart_rate, 
-        medication_adherence=medication_adherence, 
-        fall_risk_score=fall_risk_score
-    )
-    
+@elderly_care_bp.route("/recommendations", methods=["POST"])
+def get_batch_health_recommendations():
+    """الحصول على توصيات صحية لعدة مقيمين دفعة واحدة"""
+    data = request.json or {}
+    residents = data.get("residents")
+    if not isinstance(residents, list) or not residents:
+        return jsonify({"error": "No residents provided"}), 400
+
+    try:
+        recommendations = current_app.health_recommender.get_recommendations_batch(residents)
+    except (KeyError, TypeError, ValueError) as e:
+        return jsonify({"error": f"Invalid resident data: {e}"}), 400
+
     return jsonify({
-        "age": age,
-        "sleep_hours": sleep_hours,
-        "daily_activity_level": daily_activity_level,
-        "heart_rate": heart_rate,
-        "medication_adherence": medication_adherence,
-        "fall_risk_score": fall_risk_score,
-        "recommendation": recommendation
+        "count": len(recommendations),
+        "recommendations": recommendations
     })
 
+@elderly_care_bp.route("/recommendations", methods=["GET"])
+def get_health_recommendations():
+    """الحصول على توصيات صحية مخصصة من الحالة المخزنة للمقيم"""
+    resident_id = get_resident_id()
+    state = resident_states.get(resident_id)
+    inputs = {
+        "age": state.age,
+        "sleep_hours": state.sleep_hours,
+        "daily_activity_level": state.daily_activity,
+        "heart_rate": state.heart_rate,
+        "medication_adherence": state.medication_adherence,
+        "fall_risk_score": state.fall_risk_score
+    }
+    recommendation = current_app.health_recommender.get_recommendations(**inputs)
+
+    return jsonify(dict(inputs, resident_id=resident_id, recommendation=recommendation))
+
+@elderly_care_bp.route("/recommendations/cache-stats", methods=["GET"])
+def get_recommendation_cache_stats():
+    """إحصائيات ذاكرة التخزين المؤقت للتوصيات"""
+    cache = current_app.health_recommender.cache
+    if cache is None:
+        return jsonify({"enabled": False})
+    return jsonify(dict(cache.stats(), enabled=True))
+
+def model_retrainer():
+    """خدمة إعادة تدريب نموذج التوصيات للتطبيق الحالي، تُنشأ عند أول استخدام"""
+    retrainer = current_app.extensions.get('model_retrainer')
+    if retrainer is None:
+        with _model_retrainer_lock:
+            retrainer = current_app.extensions.get('model_retrainer')
+            if retrainer is None:
+                retrainer = current_app.extensions['model_retrainer'] = RetrainingService(
+                    current_app.health_recommender,
+                    max_regression=MODEL_RETRAIN_MAX_REGRESSION,
+                    interval=MODEL_RETRAIN_INTERVAL_SECONDS
+                ).start()
+    return retrainer
+
+@elderly_care_bp.route("/recommendations/retrain", methods=["POST"])
+def retrain_recommendation_model():
+    """بدء إعادة تدريب نموذج التوصيات في الخلفية؛ يستمر النموذج الحالي في خدمة الطلبات حتى الاستبدال"""
+    data = request.get_json(silent=True) or {}
+    retrainer = model_retrainer()
+    if not retrainer.trigger(force=bool(data.get('force'))):
+        return jsonify(dict(retrainer.stats(), error='Retraining already in progress')), 409
+    response = jsonify(retrainer.stats())
+    response.status_code = 202
+    response.headers['Location'] = url_for('elderly_care.get_recommendation_model')
+    return response
+
+@elderly_care_bp.route("/recommendations/model", methods=["GET"])
+def get_recommendation_model():
+    """حالة نموذج التوصيات: الإصدار الحالي ومقاييس آخر إعادة تدريب (المدة، توقف الاستبدال، الدقة)"""
+    return jsonify(model_retrainer().stats())
+
+@elderly_care_bp.route("/activity-chart", methods=["GET"])
+def get_activity_chart():
+    """الحصول على الرسم البياني لتوزيع مستويات النشاط"""
+    etag, png, image_base64 = current_app.health_recommender.get_activity_report_chart()
+
+    # ?format=png يعيد الصورة مباشرة (أصغر بنحو الثلث من base64)
+    if request.args.get("format") == "png":
+        response = current_app.response_class(png, mimetype="image/png")
+    else:
+        response = jsonify({"image": image_base64, "etag": etag})
+
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "no-cache"
+    return response.make_conditional(request)
+
+def voice_jobs():
+    """طابور الأوامر الصوتية للتطبيق الحالي، يُنشأ عند أول استخدام"""
+    jobs = current_app.extensions.get('voice_jobs')
+    if jobs is None:
+        with _voice_jobs_lock:
+            jobs = current_app.extensions.get('voice_jobs')
+            if jobs is None:
+                jobs = current_app.extensions['voice_jobs'] = VoiceJobQueue(
+                    current_app.voice_assistant.handle_command,
+                    workers=VOICE_WORKERS,
+                    max_pending=VOICE_MAX_PENDING,
+                    on_complete=publish_voice_job
+                )
+    return jobs
+
+def serialize_voice_job(job):
+    """تحويل مهمة أمر صوتي إلى صيغة JSON"""
+    data = {
+        'job_id': job['id'],
+        'status': job['status'],
+        'resident_id': job['resident_id'],
+        'command': job['command'],
+        'submitted_at': datetime.fromtimestamp(job['submitted_at']).astimezone().isoformat(),
+        'finished_at': datetime.fromtimestamp(job['finished_at']).astimezone().isoformat() if job['finished_at'] else None
+    }
+    if job['result'] is not None:
+        data['response'] = job['result']['action']
+        data['intent'] = job['result']['intent']
+        data['reply'] = job['result']['reply']
+    if job['error'] is not None:
+        data['error'] = job['error']
+    return data
+
+def publish_voice_job(job):
+    """بث نتيجة الأمر الصوتي لمشتركي المقيم فور اكتمالها"""
+    events.publish('voice', serialize_voice_job(job), topic=job['resident_id'])
+
+def voice_job_accepted(job):
+    """استجابة 202 تحيل العميل إلى رابط متابعة المهمة"""
+    location = url_for('elderly_care.get_voice_job', job_id=job['id'])
+    response = jsonify(dict(serialize_voice_job(job), status_url=location))
+    response.status_code = 202
+    response.headers['Location'] = location
+    return response
+
 @elderly_care_bp.route("/voice-command", methods=["POST"])
 def voice_command_api():
-    """معالجة أمر صوتي (نصي) من المساعد الصوتي المحاكي."""
-    data = request.json
+    """معالجة أمر صوتي (نصي) من المساعد الصوتي المحاكي.
+
+    يُوضع الأمر في طابور عمال محدود. مع "async": true أو الترويسة
+    Prefer: respond-async يُعاد معرّف المهمة فوراً (202) وتصل النتيجة عبر
+    /voice-command/jobs/<job_id> أو حدث 'voice' في البث المباشر؛ وإلا ينتظر
+    الطلب النتيجة حتى VOICE_SYNC_TIMEOUT_SECONDS ثم يعود إلى 202.
+    """
+    data = request.get_json(silent=True) or {}
     command_text = data.get("command")
 
     if not command_text:
         return jsonify({"error": "No command text provided"}), 400
 
     try:
-        assistant = current_app.voice_assistant
-        # Simulate assistant processing and speaking
-        # For simplicity, we'll just return the processed command result
-        # In a real scenario, the assistant.speak() would output audio
-        response_message = assistant.process_command(command_text)
-        
-        return jsonify({
-            "status": "success",
-            "response": response_message # This will be the simulated spoken text
-        })
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        job = voice_jobs().submit(get_resident_id(), command_text)
+    except QueueFullError as e:
+        response = jsonify({"error": "Voice command queue is full", "detail": str(e)})
+        response.status_code = 503
+        response.headers['Retry-After'] = '1'
+        return response
+
+    if data.get("async") or 'respond-async' in request.headers.get('Prefer', ''):
+        return voice_job_accepted(job)
+
+    job = voice_jobs().wait(job['id'], VOICE_SYNC_TIMEOUT_SECONDS)
+    if job['status'] == 'failed':
+        return jsonify({"error": job['error'], "job_id": job['id']}), 500
+    if job['status'] != 'done':
+        return voice_job_accepted(job)
+
+    # In a real scenario, the assistant.speak() would output audio
+    return jsonify({
+        "status": "success",
+        "job_id": job['id'],
+        "resident_id": job['resident_id'],
+        "response": job['result']["action"],
+        "intent": job['result']["intent"],
+        "reply": job['result']["reply"] # This will be the simulated spoken text
+    })
+
+@elderly_care_bp.route("/voice-command/jobs/<job_id>", methods=["GET"])
+def get_voice_job(job_id):
+    """حالة مهمة أمر صوتي ونتيجتها
+
+    ?wait=N ينتظر حتى N ثانية (بحد أقصى VOICE_MAX_WAIT_SECONDS) لاكتمال المهمة (long polling).
+    """
+    wait = min(max(request.args.get('wait', 0, type=float), 0.0), VOICE_MAX_WAIT_SECONDS)
+    job = voice_jobs().wait(job_id, wait) if wait else voice_jobs().get(job_id)
+    if job is None:
+        return jsonify({'error': 'Voice command job not found'}), 404
+    return jsonify(serialize_voice_job(job))
+
+@elderly_care_bp.route("/voice-command/stats", methods=["GET"])
+def get_voice_command_stats():
+    """إحصائيات طابور الأوامر الصوتية"""
+    return jsonify(voice_jobs().stats())
 
 @elderly_care_bp.route("/dashboard-stats", methods=["GET"])
 def get_dashboard_stats():
     """الحصول على إحصائيات شاملة للوحة التحكم"""
+    resident_id = get_resident_id()
     # محاكاة تحديث البيانات
-    monitoring_data["last_movement"] = datetime.now() - timedelta(minutes=random.randint(1, 10))
-    monitoring_data["activity_level"] = random.choice(["low", "normal", "high"])
-    health_data["sleep_hours"] = round(6 + random.random() * 3, 1)
-    health_data["daily_activity"] = random.choice(["low", "medium", "high", "excellent"])
-    health_data["heart_rate"] = random.randint(65, 85)
+    before, state = resident_states.update(resident_id, **simulate_monitoring_update(), **simulate_health_update())
+    record_vitals(resident_id, state)
+    publish_changes("monitoring", resident_id, monitoring_snapshot(before), monitoring_snapshot(state))
+    publish_changes("health", resident_id, health_snapshot(before), health_snapshot(state))
 
     # Get a recommendation
     recommender = current_app.health_recommender
     current_recommendation = recommender.get_recommendations(
-        age=75, # Example fixed age
-        sleep_hours=health_data["sleep_hours"],
-        daily_activity_level=health_data["daily_activity"],
-        heart_rate=health_data["heart_rate"],
-        medication_adherence=0.9, # Example fixed adherence
-        fall_risk_score=0.5 # Example fixed fall risk
+        age=state.age,
+        sleep_hours=state.sleep_hours,
+        daily_activity_level=state.daily_activity,
+        heart_rate=state.heart_rate,
+        medication_adherence=state.medication_adherence,
+        fall_risk_score=state.fall_risk_score
     )
+    activity_log = activity_log_for(resident_id)
 
     return jsonify({
+        "resident_id": resident_id,
         "monitoring": {
-            "system_status": monitoring_data["system_status"],
-            "last_movement": get_time_ago(monitoring_data["last_movement"]),
-            "activity_level": monitoring_data["activity_level"],
-            "fall_detected": monitoring_data['fall_detected']
+            "system_status": state.system_status,
+            "last_movement": get_time_ago(state.last_movement),
+            "activity_level": state.activity_level,
+            "fall_detected": state.fall_detected
         },
         "health": {
-            "sleep_hours": health_data["sleep_hours"],
-            "daily_activity": health_data["daily_activity"],
-            "last_medication": get_time_ago(health_data["last_medication"]),
-            "heart_rate": health_data["heart_rate"]
+            "sleep_hours": state.sleep_hours,
+            "daily_activity": state.daily_activity,
+            "last_medication": get_time_ago(state.last_medication),
+            "heart_rate": state.heart_rate
         },
         "emergency": {
-            "active_alerts": len([alert for alert in monitoring_data["emergency_alerts"] if not alert.get("resolved", False)]),
-            "total_alerts": len(monitoring_data["emergency_alerts"]),
+            "active_alerts": emergency_alerts.active_count_for(resident_id),
+            "total_alerts": emergency_alerts.total_count_for(resident_id),
             "last_safety_check": get_time_ago(datetime.now() - timedelta(minutes=10))
         },
         "activity_summary": {
-            "total_entries": len(activity_log),
-            "recent_entries": len([entry for entry in activity_log if (datetime.now() - entry["timestamp"]).days == 0])
+            "total_entries": activity_log.latest_seq(),
+            "recent_entries": activity_log.count_recent(hours=24)
         },
         "recommendation": current_recommendation
     })
+
+@elderly_care_bp.route("/dashboard-stats/bulk", methods=["GET", "POST"])
+def get_bulk_dashboard_stats():
+    """إحصائيات لوحة التحكم لمجموعة من المقيمين في استجابة واحدة
+
+    المعرّفات عبر ?resident_ids=a,b,c أو {"resident_ids": [...]}. تُقرأ الحالات دفعة
+    واحدة، وتُحسب التوصيات باستدعاء واحد للنموذج، والعدادات من التجميعات المحسوبة مسبقاً.
+    لا تُنشأ حالة للمقيمين غير المسجلين؛ تُعاد لهم القيم الافتراضية وتُذكر معرّفاتهم في unknown_resident_ids.
+    """
+    if request.method == "POST":
+        resident_ids = (request.get_json(silent=True) or {}).get("resident_ids")
+    else:
+        resident_ids = [rid for rid in request.args.get("resident_ids", "").split(",") if rid]
+    if not isinstance(resident_ids, list) or not resident_ids:
+        return jsonify({"error": "No resident ids provided"}), 400
+    if len(resident_ids) > BULK_MAX_RESIDENTS:
+        return jsonify({"error": f"At most {BULK_MAX_RESIDENTS} residents per request"}), 400
+    resident_ids = list(dict.fromkeys(str(rid) for rid in resident_ids))
+    for rid in resident_ids:
+        error = invalid_resident_id(rid)
+        if error:
+            return jsonify({"error": error}), 400
+
+    states = resident_states.get_many(resident_ids)
+    ordered = [states[rid] for rid in resident_ids]
+    recommendations = current_app.health_recommender.get_recommendations_batch({
+        "age": [state.age for state in ordered],
+        "sleep_hours": [state.sleep_hours for state in ordered],
+        "daily_activity_level": [state.daily_activity for state in ordered],
+        "heart_rate": [state.heart_rate for state in ordered],
+        "medication_adherence": [state.medication_adherence for state in ordered],
+        "fall_risk_score": [state.fall_risk_score for state in ordered]
+    })
+
+    if shared_activity_logs is not None:
+        log_summaries = shared_activity_logs.summaries(resident_ids, hours=24)
+    else:
+        log_summaries = {}
+        for rid in resident_ids:
+            activity_log = activity_logs.get(rid)
+            log_summaries[rid] = (activity_log.latest_seq(), activity_log.count_recent(hours=24)) if activity_log else (0, 0)
+
+    alert_counts = emergency_alerts.counts_for(resident_ids)
+
+    last_safety_check = get_time_ago(datetime.now() - timedelta(minutes=10))
+    residents = {}
+    totals = {"active_alerts": 0, "total_alerts": 0, "fall_detected": 0}
+    for state, recommendation in zip(ordered, recommendations):
+        resident_id = state.resident_id
+        total_entries, recent_entries = log_summaries[resident_id]
+        active_alerts, total_alerts = alert_counts[resident_id]
+        totals["active_alerts"] += active_alerts
+        totals["total_alerts"] += total_alerts
+        totals["fall_detected"] += int(state.fall_detected)
+        residents[resident_id] = {
+            "monitoring": {
+                "system_status": state.system_status,
+                "last_movement": get_time_ago(state.last_movement),
+                "activity_level": state.activity_level,
+                "fall_detected": state.fall_detected
+            },
+            "health": {
+                "sleep_hours": state.sleep_hours,
+                "daily_activity": state.daily_activity,
+                "last_medication": get_time_ago(state.last_medication),
+                "heart_rate": state.heart_rate
+            },
+            "emergency": {
+                "active_alerts": active_alerts,
+                "total_alerts": total_alerts,
+                "last_safety_check": last_safety_check
+            },
+            "activity_summary": {
+                "total_entries": total_entries,
+                "recent_entries": recent_entries
+            },
+            "recommendation": recommendation
+        }
+
+    return jsonify({
+        "count": len(residents),
+        "totals": totals,
+        "residents": residents,
+        "unknown_resident_ids": [state.resident_id for state in ordered if state.version == 0]
+    })
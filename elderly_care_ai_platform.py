@@ -37,41 +37,107 @@
 - تكامل مع خدمات الطوارئ المحلية
 """
 
+import os
+import time
+
+from fall_detector import SlidingWindowDetector
+from resident_state import ResidentStateStore
+from sensor_pipeline import SensorWindow, SyntheticSensorSource
+from supervisor import Supervisor
+from vitals_anomaly import VitalsAnomalyDetector
+from vitals_store import DAY_SECONDS, VitalsStore
+
+# Maps the detector's activity patterns onto the recommendation model's categories
+ACTIVITY_CATEGORIES = {'Low Activity': 'low', 'Normal Activity': 'medium', 'High Activity': 'high'}
+
+# Vital signs kept in the VitalsStore history, and how far today's mean may drift from
+# the resident's own weekly baseline before analyze_health_data flags it
+HEALTH_METRICS = ('heart_rate', 'sleep_hours')
+BASELINE_CHANGE_THRESHOLDS = {'heart_rate': 10.0, 'sleep_hours': 1.5}
+
+# Model inputs taken from each resident's stored profile and vitals (activity level comes from monitoring)
+RESIDENT_INPUTS = ('age', 'sleep_hours', 'heart_rate', 'medication_adherence', 'fall_risk_score')
+
+_worker_recommender = None
+
+
+def _init_recommendation_worker():
+    """Loads the recommendation model once per pool process (warm from the model store)."""
+    global _worker_recommender
+    from health_recommendation_system import HealthRecommendationSystem as Recommender
+    _worker_recommender = Recommender()
+
+
+def recommend_for_activity(snapshot, inputs):
+    """Runs in a pool process: recommendations for an activity snapshot {resident_id: summary}.
+
+    `inputs` holds each resident's other model inputs (see HealthRecommendationSystem.resident_inputs).
+    """
+    resident_ids = list(snapshot)
+    residents = {name: [inputs[r][name] for r in resident_ids] for name in RESIDENT_INPUTS}
+    residents['daily_activity_level'] = [ACTIVITY_CATEGORIES.get(snapshot[r]['activity_pattern'], 'medium')
+                                         for r in resident_ids]
+    return dict(zip(resident_ids, _worker_recommender.get_recommendations_batch(residents)))
+
+
 class ElderlyCareAIPlatform:
-    def __init__(self):
+    def __init__(self, residents=10, process_workers=None):
         """Initialize the main platform components."""
-        self.smart_monitoring = SmartMonitoringSystem()
+        self.vitals = VitalsStore()
+        self.smart_monitoring = SmartMonitoringSystem(residents)
         self.voice_assistant = VoiceAssistant()
-        self.web_dashboard = WebDashboard()
-        self.health_recommendations = HealthRecommendationSystem()
+        self.web_dashboard = WebDashboard(self.vitals)
+        self.health_recommendations = HealthRecommendationSystem(self.vitals)
+        self.supervisor = Supervisor(process_workers=process_workers or os.cpu_count(),
+                                     pool_initializer=_init_recommendation_worker)
+        self.supervisor.add('monitoring', self.smart_monitoring.start, restart='always')
+        self.supervisor.add('voice', self.voice_assistant.start)
+        self.supervisor.add('dashboard', self.web_dashboard.start, restart='always')
+        self.supervisor.add('recommendations', self.health_recommendations.start, restart='always')
 
-    def run(self):
-        """Run the main application loop."""
+    def run(self, duration=None):
+        """Run every component concurrently under the supervisor until interrupted (or for `duration` seconds)."""
         print("Starting Elderly Care AI Platform...")
-        # In a real application, each component would run in its own thread or process.
-        # For this example, we'll just show that they are initialized.
-        self.smart_monitoring.start()
-        self.voice_assistant.start()
-        self.web_dashboard.start()
-        self.health_recommendations.start()
+        self.supervisor.run(duration)
+        return self.supervisor.status()
 
 class SmartMonitoringSystem:
-    def __init__(self):
+    def __init__(self, residents=10):
         """Initialize the smart monitoring system using computer vision."""
         print("Initializing Smart Monitoring System...")
         # In a real implementation, you would initialize OpenCV, MediaPipe, and TensorFlow models here.
+        self.residents = residents
+        self.detector = SlidingWindowDetector()
+        self.resident_index = {}
+        self.resident_ids = []
 
-    def start(self):
-        """Start monitoring activities."""
+    def start(self, context, report_every=5.0):
+        """Start monitoring activities: detect events from the sensor stream and hand them to other components."""
         print("Smart Monitoring System started.")
+        alerts = context.queue('alerts')
+        activity = context.queue('activity')
+        source = SyntheticSensorSource(residents=self.residents, duration_seconds=None, realtime=True)
+        next_report = 0.0
+        for batch in source:
+            if context.stopping:
+                break
+            context.heartbeat()
+            for event in self.detect_fall(batch):
+                alerts.offer(event)
+            if batch[0].timestamp >= next_report:
+                activity.offer(self.monitor_daily_activity())
+                next_report = batch[0].timestamp + report_every
 
-    def detect_fall(self):
-        """Detect falls or abnormal movements."""
-        pass
+    def detect_fall(self, events):
+        """Detect falls or abnormal movements in a batch of sensor events."""
+        if not events:
+            return []
+        window = SensorWindow(events, self.resident_index, self.resident_ids)
+        return [event for event in self.detector.process(window) if event.type == 'fall']
 
     def monitor_daily_activity(self):
         """Monitor daily activity and sleep patterns."""
-        pass
+        return self.detector.snapshot(self.resident_ids)
 
 class VoiceAssistant:
     def __init__(self):
@@ -79,9 +145,19 @@ class VoiceAssistant:
         print("Initializing Voice Assistant...")
         # In a real implementation, you would initialize SpeechRecognition, pyttsx3, and Arabic NLP libraries here.
 
-    def start(self):
-        """Start the voice assistant."""
+    def start(self, context):
+        """Start the voice assistant: handle commands until the platform stops."""
         print("Voice Assistant started.")
+        commands = context.queue('voice_commands')
+        while not context.stopping:
+            context.heartbeat()
+            command = self.listen() or commands.poll(timeout=0.5)
+            if command is None:
+                continue
+            if "مساعدة" in command or "طوارئ" in command:
+                context.queue('alerts').offer(self.request_emergency_help())
+            elif "دواء" in command:
+                self.remind_medication()
 
     def listen(self):
         """Listen for voice commands."""
@@ -93,47 +169,120 @@ class VoiceAssistant:
 
     def request_emergency_help(self):
         """Request help in case of an emergency."""
-        pass
+        return {'type': 'voice_emergency', 'message': 'Emergency help requested by voice'}
 
 class WebDashboard:
-    def __init__(self):
+    def __init__(self, vitals=None):
         """Initialize the web dashboard for supervisors."""
         print("Initializing Web Dashboard...")
         # In a real implementation, you would set up a Flask/FastAPI application here.
+        self.vitals = vitals or VitalsStore()
 
-    def start(self):
-        """Start the web server for the dashboard."""
+    def start(self, context):
+        """Start the web server for the dashboard: forward alerts as they arrive."""
         print("Web Dashboard started.")
+        alerts = context.queue('alerts')
+        while not context.stopping:
+            context.heartbeat()
+            alert = alerts.poll(timeout=0.5)
+            if alert is not None:
+                self.send_emergency_alerts(alert)
 
-    def display_health_reports(self):
-        """Display daily and weekly health reports."""
-        pass
+    def display_health_reports(self, resident_ids=None, now=None):
+        """Display daily and weekly health reports, summarized from the vitals rollups."""
+        now = now or time.time()
+        reports = {}
+        for resident_id in resident_ids or self.vitals.resident_ids:
+            report = reports[resident_id] = {
+                period: {metric: self.vitals.summary(metric, resident_id, now - seconds, now) for metric in HEALTH_METRICS}
+                for period, seconds in (('daily', DAY_SECONDS), ('weekly', 7 * DAY_SECONDS))
+            }
+            lines = []
+            for metric in HEALTH_METRICS:
+                daily, weekly = report['daily'][metric], report['weekly'][metric]
+                if weekly['count']:
+                    today = f"{daily['mean']:.1f}" if daily['count'] else '-'
+                    lines.append(f"{metric} today {today}, week {weekly['mean']:.1f} "
+                                 f"({weekly['min']:.1f}-{weekly['max']:.1f}, {weekly['count']} readings)")
+            print(f"Health report for {resident_id}: {'; '.join(lines) or 'no readings'}")
+        return reports
 
-    def send_emergency_alerts(self):
+    def send_emergency_alerts(self, alert=None):
         """Send real-time alerts for emergencies."""
-        pass
+        if alert is not None:
+            print(f"Dashboard alert: {alert}")
 
 class HealthRecommendationSystem:
-    def __init__(self):
+    def __init__(self, vitals=None, states=None):
         """Initialize the health recommendation system."""
         print("Initializing Health Recommendation System...")
-        # In a real implementation, you would load your data analysis models (pandas, scikit-learn).
+        # The models are loaded in the process-pool workers (see _init_recommendation_worker).
+        self.latest = {}
+        self.vitals = vitals or VitalsStore()
+        # Resident profiles, shared with the dashboard through RESIDENT_STATE_BACKEND
+        self.states = states or ResidentStateStore()
+        self.anomalies = VitalsAnomalyDetector()
 
-    def start(self):
-        """Start the recommendation system."""
+    def start(self, context):
+        """Start the recommendation system: score each activity snapshot in the process pool."""
         print("Health Recommendation System started.")
+        activity = context.queue('activity')
+        alerts = context.queue('alerts')
+        while not context.stopping:
+            context.heartbeat()
+            snapshot = activity.poll(timeout=0.5)
+            if snapshot:
+                for event in self.alert_health_changes(snapshot):
+                    alerts.offer(event)
+                inputs = self.resident_inputs(list(snapshot))
+                self.latest = context.submit(recommend_for_activity, snapshot, inputs).result()
 
-    def analyze_health_data(self):
-        """Analyze health data to generate insights."""
-        pass
+    def resident_inputs(self, resident_ids, now=None):
+        """Model inputs for each resident: the stored profile, with heart rate and sleep
+        replaced by the last day's mean from the vitals history where there are readings."""
+        now = now or time.time()
+        states = self.states.get_many(resident_ids)
+        inputs = {}
+        for resident_id in resident_ids:
+            row = inputs[resident_id] = {name: getattr(states[resident_id], name) for name in RESIDENT_INPUTS}
+            for metric in HEALTH_METRICS:
+                recent = self.vitals.summary(metric, resident_id, now - DAY_SECONDS, now)
+                if recent['count']:
+                    row[metric] = recent['mean']
+        return inputs
+
+    def analyze_health_data(self, resident_id, now=None):
+        """Analyze health data to generate insights: the last day's vitals against the resident's previous week."""
+        now = now or time.time()
+        insights = {'resident_id': resident_id, 'metrics': {}, 'flags': []}
+        for metric in HEALTH_METRICS:
+            today = self.vitals.summary(metric, resident_id, now - DAY_SECONDS, now)
+            baseline = self.vitals.summary(metric, resident_id, now - 8 * DAY_SECONDS, now - DAY_SECONDS)
+            change = today['mean'] - baseline['mean'] if today['count'] and baseline['count'] else None
+            insights['metrics'][metric] = {'today': today, 'baseline': baseline, 'change': change}
+            if change is not None and abs(change) >= BASELINE_CHANGE_THRESHOLDS[metric]:
+                insights['flags'].append(f"{metric} {'up' if change > 0 else 'down'} {abs(change):.1f} from weekly baseline")
+        return insights
 
     def recommend_activities(self):
         """Recommend suitable activities and exercises."""
         pass
 
-    def alert_health_changes(self):
-        """Alert on significant changes in health status."""
-        pass
+    def alert_health_changes(self, snapshot=None, metric='activity'):
+        """Alert on significant changes in health status.
+
+        Scores a snapshot {resident_id: summary} against each resident's own
+        baseline; with the default metric the summaries are the monitoring
+        snapshots and their mean_deviation_g is the activity level. Returns the
+        'health_change' / 'health_recovered' DetectedEvents.
+        """
+        if not snapshot:
+            return []
+        resident_ids = list(snapshot)
+        key = 'mean_deviation_g' if metric == 'activity' else metric
+        return self.anomalies.process(metric, resident_ids,
+                                      [snapshot[r].get('last_sample', time.time()) for r in resident_ids],
+                                      [snapshot[r][key] for r in resident_ids])
 
 if __name__ == "__main__":
     platform = ElderlyCareAIPlatform()
@@ -0,0 +1,123 @@
+import itertools
+import json
+import queue
+import threading
+from collections import deque
+
+
+def format_sse(event_id, event_type, data):
+    """Formats one Server-Sent Events frame."""
+    payload = json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+    return f"id: {event_id}\nevent: {event_type}\ndata: {payload}\n\n"
+
+
+class Subscription:
+    """One subscriber's bounded queue of pre-formatted SSE frames."""
+
+    def __init__(self, max_queue, topic=None):
+        # None receives events for every topic
+        self.topic = topic
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.delivered = 0
+        self.resyncs = 0
+
+    def get(self, timeout=None):
+        """Returns the next frame, or None if nothing arrived within `timeout`."""
+        try:
+            frame = self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        self.delivered += 1
+        return frame
+
+
+class EventBroadcaster:
+    """Fans state-change events out to many subscribers from a single producer.
+
+    Each event is serialized once and the same frame is pushed to every
+    subscriber queue. A subscriber whose queue is full is not allowed to slow
+    the producer down: its backlog is dropped and replaced by a single `resync`
+    event telling the client to refetch full state. A short replay buffer lets
+    reconnecting clients resume from `Last-Event-ID`. Events may carry a topic
+    (e.g. a resident id); subscribers with a topic only receive matching events.
+    """
+
+    def __init__(self, max_queue=256, replay_size=256):
+        self.max_queue = max_queue
+        self._subscribers = set()
+        self._replay = deque(maxlen=replay_size)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.published = 0
+
+    def subscribe(self, last_event_id=None, topic=None):
+        subscription = Subscription(self.max_queue, topic)
+        with self._lock:
+            if last_event_id is not None:
+                missed = [
+                    (i, frame) for i, event_topic, frame in self._replay
+                    if i > last_event_id and self._matches(subscription, event_topic)
+                ]
+                oldest = self._replay[0][0] if self._replay else None
+                if oldest is not None and last_event_id < oldest - 1:
+                    self._push(subscription, self._resync_frame(self._replay[-1][0]))
+                else:
+                    for _, frame in missed[-self.max_queue:]:
+                        self._push(subscription, frame)
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    @property
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._subscribers)
+
+    @staticmethod
+    def _matches(subscription, topic):
+        return subscription.topic is None or subscription.topic == topic
+
+    def publish(self, event_type, data, topic=None):
+        """Sends an event to every matching subscriber and returns its id."""
+        with self._lock:
+            event_id = next(self._ids)
+            frame = format_sse(event_id, event_type, data)
+            self._replay.append((event_id, topic, frame))
+            subscribers = list(self._subscribers)
+            self.published += 1
+        for subscription in subscribers:
+            if self._matches(subscription, topic):
+                self._push(subscription, frame, event_id)
+        return event_id
+
+    def _resync_frame(self, event_id):
+        return format_sse(event_id, 'resync', {'reason': 'subscriber fell behind'})
+
+    def _push(self, subscription, frame, event_id=0):
+        try:
+            subscription.queue.put_nowait(frame)
+        except queue.Full:
+            # Slow client: drop its backlog rather than buffering without bound.
+            while True:
+                try:
+                    subscription.queue.get_nowait()
+                except queue.Empty:
+                    break
+            subscription.resyncs += 1
+            try:
+                subscription.queue.put_nowait(self._resync_frame(event_id))
+            except queue.Full:
+                pass
+
+    def stats(self):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        return {
+            'subscribers': len(subscribers),
+            'published': self.published,
+            'resyncs': sum(s.resyncs for s in subscribers),
+            'queued': sum(s.queue.qsize() for s in subscribers),
+        }
@@ -0,0 +1,199 @@
+import time
+
+import numpy as np
+
+from sensor_pipeline import ACTIVITY_LEVELS, DetectedEvent
+
+
+class SlidingWindowDetector:
+    """Fall and inactivity detection over per-resident ring buffers.
+
+    Every resident owns a fixed-size ring of recent acceleration magnitudes.
+    Running sums of the ring give the rolling mean and variance in O(1) per
+    sample, jerk comes from the previous sample, and activity is an
+    exponentially weighted mean deviation from 1 g. A micro-window is applied
+    in rounds: round k takes the k-th sample of every resident in the window
+    and updates all of them with one set of array operations, so the Python
+    overhead depends on samples per resident, not on the number of residents.
+
+    A fall is an impact (magnitude above `impact_g` with jerk above
+    `jerk_threshold`) followed by the resident lying still within
+    `fall_settle_seconds`, confirmed `fall_confirm_seconds` after the impact.
+    Inactivity is stillness, with no motion-sensor activity, for `inactivity_seconds`.
+    """
+
+    def __init__(self, rate_hz=50, still_window_seconds=0.5, impact_g=2.0, jerk_threshold=20.0,
+                 still_std_g=0.012, motion_threshold=0.03, fall_settle_seconds=0.5, fall_confirm_seconds=1.0,
+                 inactivity_seconds=300, activity_seconds=10.0, activity_thresholds=(0.04, 0.2)):
+        self.window_size = max(2, int(round(still_window_seconds * rate_hz)))
+        self.still_window_seconds = still_window_seconds
+        self.impact_g = impact_g
+        self.jerk_threshold = jerk_threshold
+        self.still_std_g = still_std_g
+        self.motion_threshold = motion_threshold
+        self.fall_settle_seconds = fall_settle_seconds
+        self.fall_confirm_seconds = fall_confirm_seconds
+        self.inactivity_seconds = inactivity_seconds
+        self.activity_alpha = 1.0 / max(1.0, activity_seconds * rate_hz)
+        self.activity_thresholds = np.array(activity_thresholds)
+
+        # Per-resident state, indexed by resident code
+        self.ring = np.zeros((0, self.window_size))
+        self.head = np.zeros(0, dtype=np.int64)
+        self.count = np.zeros(0, dtype=np.int64)
+        self.ring_sum = np.zeros(0)
+        self.ring_sumsq = np.zeros(0)
+        self.last_magnitude = np.zeros(0)
+        self.last_time = np.zeros(0)
+        self.activity = np.zeros(0)
+        self.still_since = np.zeros(0)
+        self.last_motion_event = np.zeros(0)
+        self.impact_time = np.zeros(0)
+        self.inactive = np.zeros(0, dtype=bool)
+        self.level = np.zeros(0, dtype=np.int64)
+        self._grow(64)
+
+    def _grow(self, size):
+        def extend(array, fill):
+            grown = np.full((size,) + array.shape[1:], fill, dtype=array.dtype)
+            grown[:len(array)] = array
+            return grown
+
+        self.ring = extend(self.ring, 0.0)
+        self.head = extend(self.head, 0)
+        self.count = extend(self.count, 0)
+        self.ring_sum = extend(self.ring_sum, 0.0)
+        self.ring_sumsq = extend(self.ring_sumsq, 0.0)
+        self.last_magnitude = extend(self.last_magnitude, np.nan)
+        self.last_time = extend(self.last_time, np.nan)
+        self.activity = extend(self.activity, np.nan)
+        self.still_since = extend(self.still_since, np.nan)
+        self.last_motion_event = extend(self.last_motion_event, np.nan)
+        self.impact_time = extend(self.impact_time, np.nan)
+        self.inactive = extend(self.inactive, False)
+        self.level = extend(self.level, -1)
+
+    def rolling_std(self, residents):
+        """Standard deviation of the magnitudes currently in each resident's ring."""
+        count = np.maximum(self.count[residents], 1)
+        mean = self.ring_sum[residents] / count
+        return np.sqrt(np.maximum(self.ring_sumsq[residents] / count - mean * mean, 0.0))
+
+    def update(self, residents, timestamps, magnitudes):
+        """Applies one sample to each of `residents` (which must be unique) in O(1) per sample."""
+        previous = self.last_magnitude[residents]
+        dt = np.maximum(timestamps - self.last_time[residents], 1e-3)
+        jerk = np.nan_to_num(np.abs(magnitudes - previous) / dt)
+        self.last_magnitude[residents] = magnitudes
+        self.last_time[residents] = timestamps
+
+        head = self.head[residents]
+        evicted = self.ring[residents, head]
+        self.ring[residents, head] = magnitudes
+        self.ring_sum[residents] += magnitudes - evicted
+        self.ring_sumsq[residents] += magnitudes * magnitudes - evicted * evicted
+        self.count[residents] = np.minimum(self.count[residents] + 1, self.window_size)
+        head = (head + 1) % self.window_size
+        self.head[residents] = head
+        # Re-sum rows on wrap-around so floating-point drift in the running sums stays bounded.
+        wrapped = residents[head == 0]
+        if wrapped.size:
+            self.ring_sum[wrapped] = self.ring[wrapped].sum(axis=1)
+            self.ring_sumsq[wrapped] = np.square(self.ring[wrapped]).sum(axis=1)
+
+        deviation = np.abs(magnitudes - 1.0)
+        activity = self.activity[residents]
+        self.activity[residents] = np.where(np.isnan(activity), deviation,
+                                            activity + self.activity_alpha * (deviation - activity))
+
+        impact = (magnitudes > self.impact_g) & (jerk > self.jerk_threshold)
+        self.impact_time[residents[impact]] = timestamps[impact]
+
+        still = (self.count[residents] >= self.window_size) & (self.rolling_std(residents) < self.still_std_g)
+        since = self.still_since[residents]
+        self.still_since[residents] = np.where(
+            still, np.where(np.isnan(since), timestamps - self.still_window_seconds, since), np.nan)
+
+    def process(self, window):
+        """Updates state from a SensorWindow and returns the DetectedEvents it triggers."""
+        n = len(window.resident_ids)
+        if n > len(self.head):
+            self._grow(max(n, len(self.head) * 2))
+
+        accel = window.is_accel
+        codes = window.residents[accel]
+        if codes.size:
+            timestamps = window.timestamps[accel]
+            magnitudes = np.linalg.norm(window.values[accel], axis=1).astype(np.float64)
+            # Rank each sample within its resident, then apply rank by rank.
+            order = np.argsort(codes, kind='stable')
+            sorted_codes = codes[order]
+            starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]])
+            ranks = np.arange(len(order)) - np.repeat(starts, np.diff(np.r_[starts, len(order)]))
+            by_rank = order[np.argsort(ranks, kind='stable')]
+            bounds = np.searchsorted(np.sort(ranks), np.arange(ranks.max() + 2))
+            for k in range(ranks.max() + 1):
+                chosen = by_rank[bounds[k]:bounds[k + 1]]
+                self.update(codes[chosen], timestamps[chosen], magnitudes[chosen])
+
+        motion = ~accel & (window.values[:, 0] > self.motion_threshold)
+        if motion.any():
+            np.fmax.at(self.last_motion_event, window.residents[motion], window.timestamps[motion])
+        seen = np.unique(window.residents)
+        return self._detect(seen, window.resident_ids)
+
+    def _detect(self, seen, resident_ids):
+        now = time.time()
+        detected = []
+
+        impact = self.impact_time[seen]
+        with np.errstate(invalid='ignore'):
+            due = self.last_time[seen] - impact >= self.fall_confirm_seconds
+        for code in seen[due]:
+            impact_time = self.impact_time[code]
+            # Lying still soon after the impact and ever since: a fall, not a stumble or a jump.
+            if self.still_since[code] - impact_time <= self.fall_settle_seconds:
+                detected.append(DetectedEvent('fall', resident_ids[code], float(impact_time), now,
+                                              {'impact_time': float(impact_time),
+                                               'still_seconds': float(self.last_time[code] - self.still_since[code])}))
+            self.impact_time[code] = np.nan
+
+        idle_since = np.fmax(self.still_since[seen], self.last_motion_event[seen])
+        idle_since[np.isnan(self.still_since[seen])] = np.nan
+        idle_for = self.last_time[seen] - idle_since
+        self.inactive[seen[np.isnan(idle_for)]] = False
+        with np.errstate(invalid='ignore'):
+            became_inactive = (idle_for >= self.inactivity_seconds) & ~self.inactive[seen]
+        for i in np.flatnonzero(became_inactive):
+            code = seen[i]
+            self.inactive[code] = True
+            detected.append(DetectedEvent('inactivity', resident_ids[code], float(idle_since[i]), now,
+                                          {'idle_seconds': float(idle_for[i])}))
+
+        activity = self.activity[seen]
+        level = np.digitize(activity, self.activity_thresholds)
+        changed = ~np.isnan(activity) & (level != self.level[seen])
+        for i in np.flatnonzero(changed):
+            code = seen[i]
+            self.level[code] = level[i]
+            detected.append(DetectedEvent('activity_level', resident_ids[code], float(self.last_time[code]), now,
+                                          {'activity_pattern': ACTIVITY_LEVELS[level[i]],
+                                           'mean_deviation_g': float(activity[i])}))
+        return detected
+
+    def snapshot(self, resident_ids):
+        """Returns the current activity and stillness picture for every known resident."""
+        now_still = self.last_time - self.still_since
+        summary = {}
+        for code, resident_id in enumerate(resident_ids):
+            if np.isnan(self.last_time[code]):
+                continue
+            level = self.level[code]
+            summary[resident_id] = {
+                'activity_pattern': ACTIVITY_LEVELS[level] if level >= 0 else None,
+                'mean_deviation_g': float(self.activity[code]),
+                'still_seconds': 0.0 if np.isnan(now_still[code]) else float(now_still[code]),
+                'inactive': bool(self.inactive[code]),
+                'last_sample': float(self.last_time[code]),
+            }
+        return summary
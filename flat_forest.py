@@ -0,0 +1,123 @@
+import json
+import os
+
+import numpy as np
+
+ARRAY_NAMES = ('feature', 'threshold', 'left', 'right', 'value', 'roots', 'classes')
+
+
+class FlatForest:
+    """A random forest flattened into packed NumPy arrays.
+
+    All trees share one node table. Leaves point at themselves and test feature 0,
+    so a sample/tree pair has reached its leaf once a step leaves it in place.
+    Evaluation needs only NumPy, so serving does not have to import scikit-learn.
+    """
+
+    META_FILE = 'forest.json'
+
+    def __init__(self, feature, threshold, left, right, value, roots, classes, feature_names, max_depth):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.classes = classes
+        self.feature_names = list(feature_names)
+        self.max_depth = int(max_depth)
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @classmethod
+    def from_sklearn(cls, model):
+        """Exports a fitted single-output RandomForestClassifier."""
+        n_classes = len(model.classes_)
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            node_ids = np.arange(tree.node_count, dtype=np.int32)
+            is_leaf = tree.children_left == -1
+
+            features.append(np.where(is_leaf, 0, tree.feature).astype(np.int32))
+            thresholds.append(np.where(is_leaf, 0.0, tree.threshold).astype(np.float64))
+            lefts.append(np.where(is_leaf, node_ids, tree.children_left).astype(np.int32) + offset)
+            rights.append(np.where(is_leaf, node_ids, tree.children_right).astype(np.int32) + offset)
+
+            # Same per-tree probabilities DecisionTreeClassifier.predict_proba returns;
+            # older scikit-learn releases store raw counts in tree_.value.
+            value = np.array(tree.value[:, 0, :n_classes], dtype=np.float64)
+            normalizer = value.sum(axis=1, keepdims=True)
+            if not np.allclose(normalizer[is_leaf], 1.0):
+                normalizer[normalizer == 0.0] = 1.0
+                value /= normalizer
+            values.append(value)
+
+            roots.append(offset)
+            offset += tree.node_count
+            max_depth = max(max_depth, tree.max_depth)
+
+        return cls(
+            feature=np.concatenate(features),
+            threshold=np.concatenate(thresholds),
+            left=np.concatenate(lefts),
+            right=np.concatenate(rights),
+            value=np.concatenate(values),
+            roots=np.array(roots, dtype=np.int32),
+            classes=np.array([str(c) for c in model.classes_]),
+            feature_names=[str(c) for c in model.feature_names_in_],
+            max_depth=max_depth,
+        )
+
+    def apply(self, X):
+        """Returns the global leaf index reached by every sample in every tree, shape (n, n_trees)."""
+        X = np.asarray(X, dtype=np.float32)
+        n_samples, n_features = X.shape
+        flat_X = X.ravel()
+        node = np.repeat(self.roots[None, :], n_samples, axis=0).ravel()
+        row_offset = np.repeat(np.arange(n_samples) * n_features, self.n_trees)
+        # Only (sample, tree) pairs that have not reached a leaf are walked further.
+        active = np.arange(node.size)
+        for _ in range(self.max_depth):
+            current = node.take(active)
+            # float32 inputs against float64 thresholds, as in the scikit-learn tree code
+            go_left = flat_X.take(row_offset.take(active) + self.feature.take(current)) <= self.threshold.take(current)
+            step = np.where(go_left, self.left.take(current), self.right.take(current))
+            node[active] = step
+            active = active[step != current]
+            if not active.size:
+                break
+        return node.reshape(n_samples, self.n_trees)
+
+    def predict_proba(self, X):
+        leaf_values = self.value[self.apply(X)]
+        proba = np.zeros((leaf_values.shape[0], leaf_values.shape[2]), dtype=np.float64)
+        # Accumulate tree by tree so rounding matches RandomForestClassifier exactly.
+        for t in range(self.n_trees):
+            proba += leaf_values[:, t]
+        proba /= self.n_trees
+        return proba
+
+    def predict(self, X):
+        return self.classes.take(np.argmax(self.predict_proba(X), axis=1))
+
+    def save(self, path):
+        os.makedirs(path, exist_ok=True)
+        for name in ARRAY_NAMES:
+            np.save(os.path.join(path, name + '.npy'), getattr(self, name), allow_pickle=False)
+        with open(os.path.join(path, self.META_FILE), 'w', encoding='utf-8') as f:
+            json.dump({'feature_names': self.feature_names, 'max_depth': self.max_depth}, f)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        with open(os.path.join(path, cls.META_FILE), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        arrays = {
+            name: np.load(os.path.join(path, name + '.npy'), mmap_mode='r' if mmap else None, allow_pickle=False)
+            for name in ARRAY_NAMES
+        }
+        return cls(feature_names=meta['feature_names'], max_depth=meta['max_depth'], **arrays)
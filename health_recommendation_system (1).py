@@ -2,11 +2,12 @@ import pandas as pd
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score
-import numpy as np
 import matplotlib.pyplot as plt
 import io
 import base64
 
+from synthetic_data import simulated_health_data
+
 class HealthRecommendationSystem:
     def __init__(self):
         print("Initializing Health Recommendation System...")
@@ -17,32 +18,7 @@ class HealthRecommendationSystem:
 
     def _generate_simulated_data(self):
         """Generates simulated health data for demonstration."""
-        np.random.seed(42)
-        num_records = 1000
-
-        data = {
-            'age': np.random.randint(65, 95, num_records),
-            'sleep_hours': np.random.uniform(4, 10, num_records).round(1),
-            'daily_activity_level': np.random.choice(['low', 'medium', 'high'], num_records),
-            'heart_rate': np.random.randint(60, 100, num_records),
-            'medication_adherence': np.random.uniform(0.5, 1.0, num_records).round(2),
-            'fall_risk_score': np.random.uniform(0, 1, num_records).round(2),
-            'recommended_activity': np.random.choice(['walking', 'stretching', 'reading', 'light_yoga', 'social_games'], num_records)
-        }
-        self.data = pd.DataFrame(data)
-
-        # Introduce some correlation for fall risk and recommendations
-        self.data.loc[self.data['sleep_hours'] < 6, 'fall_risk_score'] += 0.2
-        self.data.loc[self.data['daily_activity_level'] == 'low', 'fall_risk_score'] += 0.3
-        self.data['fall_risk_score'] = np.clip(self.data['fall_risk_score'], 0, 1).round(2)
-
-        # Adjust recommendations based on fall risk
-        high_risk_indices = self.data[self.data["fall_risk_score"] > 0.7].index
-        self.data.loc[high_risk_indices, "recommended_activity"] = np.random.choice(["stretching", "reading"], size=len(high_risk_indices))
-        
-        low_risk_indices = self.data[self.data["fall_risk_score"] < 0.3].index
-        self.data.loc[low_risk_indices, "recommended_activity"] = np.random.choice(["walking", "light_yoga", "social_games"], size=len(low_risk_indices))
-
+        self.data = simulated_health_data(1000, seed=42)
         print("Simulated health data generated.")
 
     def _train_model(self):
@@ -1,45 +1,196 @@
 import pandas as pd
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import accuracy_score
 import numpy as np
-import matplotlib.pyplot as plt
 import io
 import base64
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from flat_forest import FlatForest
+from model_store import ModelStore, fingerprint_training_data
+from recommendation_cache import RecommendationCache
+from synthetic_data import simulated_health_data
+
+MODEL_PARAMS = {'n_estimators': 100, 'random_state': 42}
+NUMERIC_FEATURES = ['age', 'sleep_hours', 'heart_rate', 'medication_adherence', 'fall_risk_score']
+ACTIVITY_FEATURE = 'daily_activity_level'
+CHART_CACHE_SIZE = 8
+
+class FeatureEncoder:
+    """Maps raw resident inputs straight into the model's feature columns, without pandas."""
+
+    def __init__(self, feature_names):
+        feature_names = list(feature_names)
+        self.num_features = len(feature_names)
+        self.numeric_columns = [feature_names.index(name) for name in NUMERIC_FEATURES]
+        # get_dummies(drop_first=True) leaves one category without a column; it (and any
+        # category unseen during training) encodes as all zeros.
+        prefix = ACTIVITY_FEATURE + '_'
+        self.activity_columns = {
+            name[len(prefix):]: i for i, name in enumerate(feature_names) if name.startswith(prefix)
+        }
+        self._local = threading.local()
+
+    def encode_row(self, age, sleep_hours, daily_activity_level, heart_rate, medication_adherence, fall_risk_score):
+        """Fills this thread's preallocated (1, n_features) row and returns it."""
+        row = getattr(self._local, 'row', None)
+        if row is None:
+            row = self._local.row = np.zeros((1, self.num_features), dtype=np.float32)
+        else:
+            row.fill(0)
+        values = row[0]
+        age_col, sleep_col, heart_col, adherence_col, fall_col = self.numeric_columns
+        values[age_col] = age
+        values[sleep_col] = sleep_hours
+        values[heart_col] = heart_rate
+        values[adherence_col] = medication_adherence
+        values[fall_col] = fall_risk_score
+        activity_col = self.activity_columns.get(daily_activity_level)
+        if activity_col is not None:
+            values[activity_col] = 1
+        return row
+
+    @staticmethod
+    def columns(residents):
+        """Returns the model inputs of `residents` (see encode_batch) as a dict of arrays."""
+        names = NUMERIC_FEATURES + [ACTIVITY_FEATURE]
+        if isinstance(residents, pd.DataFrame):
+            return {name: residents[name].to_numpy() for name in names}
+        if isinstance(residents, dict):
+            return {name: np.asarray(residents[name]) for name in names}
+        return {name: np.array([resident[name] for resident in residents]) for name in names}
+
+    def encode_batch(self, residents):
+        """Encodes columnar resident inputs into a feature matrix in model column order.
+
+        `residents` may be a DataFrame, a list of dicts, or a dict mapping each input
+        name to a sequence/NumPy array of equal length.
+        """
+        columns = self.columns(residents)
+        num_rows = len(columns[ACTIVITY_FEATURE])
+        X = np.zeros((num_rows, self.num_features), dtype=np.float32)
+        for name, col in zip(NUMERIC_FEATURES, self.numeric_columns):
+            X[:, col] = columns[name]
+        levels = columns[ACTIVITY_FEATURE].astype(str)
+        for level, col in self.activity_columns.items():
+            X[levels == level, col] = 1
+        return X
+
+# Holdout rows kept for scoring when training chunk by chunk
+CHUNKED_HOLDOUT_MAX_ROWS = 200_000
+
+def _model_features(data):
+    # Convert categorical features to numerical using one-hot encoding
+    X = data[['age', 'sleep_hours', 'daily_activity_level', 'heart_rate', 'medication_adherence', 'fall_risk_score']]
+    return pd.get_dummies(X, columns=['daily_activity_level'], drop_first=True)
+
+def fit_recommendation_model(data, params=MODEL_PARAMS, n_jobs=None):
+    """Fits the recommendation forest on `data`; returns (model, test accuracy, raw holdout rows).
+
+    `data` is a DataFrame or a chunked dataset (see synthetic_data.SyntheticDataset).
+    """
+    # Imported here so workers that only serve predictions never load scikit-learn.
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.model_selection import train_test_split
+    from sklearn.metrics import accuracy_score
+
+    if not isinstance(data, pd.DataFrame):
+        return _fit_chunked(data, params, n_jobs)
+
+    X = _model_features(data)
+    y = data['recommended_activity']
+
+    # Split data into training and testing sets
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+
+    # Train a RandomForestClassifier model
+    model = RandomForestClassifier(**params, n_jobs=n_jobs)
+    model.fit(X_train, y_train)
+
+    # Evaluate the model
+    accuracy = accuracy_score(y_test, model.predict(X_test))
+    return model, accuracy, data.loc[X_test.index]
+
+def _fit_chunked(dataset, params, n_jobs):
+    """Grows one forest across the dataset's chunks, so only one chunk is in memory at a time.
+
+    Each chunk adds its share of the n_estimators trees (warm_start), each fitted
+    on that chunk's training rows; 20% of every chunk is held out for scoring.
+    """
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.model_selection import train_test_split
+    from sklearn.metrics import accuracy_score
+
+    n_estimators = params['n_estimators']
+    model = RandomForestClassifier(**dict(params, n_estimators=0), n_jobs=n_jobs, warm_start=True)
+    holdout = []
+    holdout_rows = 0
+    for index, chunk in enumerate(dataset.iter_chunks()):
+        X_train, X_test, y_train, _ = train_test_split(
+            _model_features(chunk), chunk['recommended_activity'], test_size=0.2, random_state=42)
+        share = n_estimators * (index + 1) // dataset.num_chunks - n_estimators * index // dataset.num_chunks
+        if share:
+            model.n_estimators += share
+            model.fit(X_train, y_train)
+        if holdout_rows < CHUNKED_HOLDOUT_MAX_ROWS:
+            rows = chunk.loc[X_test.index[:CHUNKED_HOLDOUT_MAX_ROWS - holdout_rows]]
+            holdout.append(rows)
+            holdout_rows += len(rows)
+    holdout = pd.concat(holdout, ignore_index=True)
+    accuracy = accuracy_score(holdout['recommended_activity'], model.predict(_model_features(holdout)))
+    return model, accuracy, holdout
+
+class ServingModel:
+    """The predictor, its feature encoder and their version, swapped in as one object.
+
+    Requests read HealthRecommendationSystem.serving once and use that object
+    throughout, so a request that started before a model swap finishes on the
+    old model.
+    """
+
+    def __init__(self, predictor, version):
+        self.predictor = predictor
+        self.encoder = FeatureEncoder(predictor.feature_names)
+        self.version = version
 
 class HealthRecommendationSystem:
-    def __init__(self):
+    def __init__(self, model_store=None, cache=None):
         print("Initializing Health Recommendation System...")
+        # scikit-learn model, only held when trained in this process
         self.model = None
+        # FlatForest and encoder used for all inference (see swap_model)
+        self.serving = None
+        self._swap_lock = threading.Lock()
         self.data = None
+        self.data_fingerprint = None
+        self.model_store = model_store if model_store is not None else ModelStore()
+        # Set to None to disable memoization.
+        self.cache = cache if cache is not None else RecommendationCache()
+        # Rendered activity charts keyed by a hash of the counts they show.
+        self._chart_cache = OrderedDict()
+        self._chart_lock = threading.Lock()
         self._generate_simulated_data()
+        self._load_or_train_model()
+
+    def _load_or_train_model(self):
+        """Loads a persisted model matching the training data, training one only if needed."""
+        self.data_fingerprint = fingerprint_training_data(self.data, MODEL_PARAMS)
+        start = time.perf_counter()
+        forest = self.model_store.load_forest(self.data_fingerprint)
+        if forest is not None:
+            self.swap_model(forest)
+            print(f"Recommendation model loaded from store in {time.perf_counter() - start:.3f}s.")
+            return
+
         self._train_model()
+        self.model_store.save(self.model, self.data_fingerprint)
+        print(f"Recommendation model trained and saved in {time.perf_counter() - start:.3f}s.")
 
     def _generate_simulated_data(self):
         """Generates simulated health data for demonstration."""
-        np.random.seed(42)
-        num_records = 1000
-
-        data = {
-            'age': np.random.randint(65, 95, num_records),
-            'sleep_hours': np.random.uniform(4, 10, num_records).round(1),
-            'daily_activity_level': np.random.choice(['low', 'medium', 'high'], num_records),
-            'heart_rate': np.random.randint(60, 100, num_records),
-            'medication_adherence': np.random.uniform(0.5, 1.0, num_records).round(2),
-            'fall_risk_score': np.random.uniform(0, 1, num_records).round(2),
-            'recommended_activity': np.random.choice(['walking', 'stretching', 'reading', 'light_yoga', 'social_games'], num_records)
-        }
-        self.data = pd.DataFrame(data)
-
-        # Introduce some correlation for fall risk and recommendations
-        self.data.loc[self.data['sleep_hours'] < 6, 'fall_risk_score'] += 0.2
-        self.data.loc[self.data['daily_activity_level'] == 'low', 'fall_risk_score'] += 0.3
-        self.data['fall_risk_score'] = np.clip(self.data['fall_risk_score'], 0, 1).round(2)
-
-        # Adjust recommendations based on fall risk
-        self.data.loc[self.data['fall_risk_score'] > 0.7, 'recommended_activity'] = np.random.choice(['stretching', 'reading'], num_records)
-        self.data.loc[self.data['fall_risk_score'] < 0.3, 'recommended_activity'] = np.random.choice(['walking', 'light_yoga', 'social_games'], num_records)
-
+        self.data = simulated_health_data(1000, seed=42)
         print("Simulated health data generated.")
 
     def _train_model(self):
@@ -47,69 +198,136 @@ class HealthRecommendationSystem:
         if self.data is None:
             self._generate_simulated_data()
 
-        # Convert categorical features to numerical using one-hot encoding
-        X = self.data[['age', 'sleep_hours', 'daily_activity_level', 'heart_rate', 'medication_adherence', 'fall_risk_score']]
-        X = pd.get_dummies(X, columns=['daily_activity_level'], drop_first=True)
-        y = self.data['recommended_activity']
+        self.model, accuracy, _ = fit_recommendation_model(self.data)
+        print(f"Recommendation model trained with accuracy: {accuracy:.2f}")
+        self.swap_model(FlatForest.from_sklearn(self.model))
 
-        # Split data into training and testing sets
-        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    def swap_model(self, predictor, data=None, data_fingerprint=None):
+        """Starts serving `predictor`, returning how long the swap itself took in seconds.
 
-        # Train a RandomForestClassifier model
-        self.model = RandomForestClassifier(n_estimators=100, random_state=42)
-        self.model.fit(X_train, y_train)
+        The new ServingModel is built first and then published with a single
+        assignment, so requests never wait on it; cached answers from the old
+        model are dropped.
+        """
+        with self._swap_lock:
+            version = (self.serving.version if self.serving is not None else 0) + 1
+            serving = ServingModel(predictor, version)
+            start = time.perf_counter()
+            self.serving = serving
+            if data is not None:
+                self.data, self.data_fingerprint = data, data_fingerprint
+            if self.cache is not None:
+                self.cache.invalidate(version)
+            return time.perf_counter() - start
 
-        # Evaluate the model
-        y_pred = self.model.predict(X_test)
-        accuracy = accuracy_score(y_test, y_pred)
-        print(f"Recommendation model trained with accuracy: {accuracy:.2f}")
+    @property
+    def predictor(self):
+        return self.serving.predictor if self.serving is not None else None
+
+    @property
+    def encoder(self):
+        return self.serving.encoder if self.serving is not None else None
+
+    @property
+    def model_version(self):
+        return self.serving.version if self.serving is not None else 0
+
+    def _predict_encoded(self, X, serving=None):
+        """Runs the flattened forest on an already-encoded float32 matrix."""
+        return (serving or self.serving).predictor.predict(X)
 
     def get_recommendations(self, age, sleep_hours, daily_activity_level, heart_rate, medication_adherence, fall_risk_score):
         """Generates personalized health recommendations."""
-        input_data = pd.DataFrame([{
+        if self.cache is None:
+            return self._recommend(age, sleep_hours, daily_activity_level, heart_rate, medication_adherence, fall_risk_score)
+
+        # Without quantization (the default) these are the inputs as given. With it, the
+        # bucketed inputs are scored, here and in get_recommendations_batch alike.
+        inputs = self.cache.quantize({
             'age': age,
             'sleep_hours': sleep_hours,
             'daily_activity_level': daily_activity_level,
             'heart_rate': heart_rate,
             'medication_adherence': medication_adherence,
             'fall_risk_score': fall_risk_score
-        }])
+        })
+        key = self.cache.make_key(inputs)
+        serving = self.serving
+        recommendation = self.cache.get(key, serving.version)
+        if recommendation is None:
+            recommendation = self._recommend(serving=serving, **inputs)
+            self.cache.put(key, recommendation, serving.version)
+        return recommendation
 
-        # Ensure input data has the same columns as training data
-        input_data = pd.get_dummies(input_data, columns=['daily_activity_level'], drop_first=True)
-        # Add missing columns with 0 if they were present in training data but not in input
-        missing_cols = set(self.model.feature_names_in_) - set(input_data.columns)
-        for c in missing_cols:
-            input_data[c] = 0
-        input_data = input_data[self.model.feature_names_in_] # Ensure column order
+    def _recommend(self, age, sleep_hours, daily_activity_level, heart_rate, medication_adherence, fall_risk_score,
+                   serving=None):
+        serving = serving or self.serving
+        row = serving.encoder.encode_row(age, sleep_hours, daily_activity_level, heart_rate, medication_adherence, fall_risk_score)
+        return str(self._predict_encoded(row, serving)[0])
 
-        recommendation = self.model.predict(input_data)[0]
-        return recommendation
+    def get_recommendations_batch(self, residents):
+        """Generates recommendations for many residents with a single model call."""
+        serving = self.serving
+        if self.cache is not None and self.cache.quantization:
+            residents = self.cache.quantize_columns(FeatureEncoder.columns(residents))
+        X = serving.encoder.encode_batch(residents)
+        if len(X) == 0:
+            return []
+        return self._predict_encoded(X, serving).tolist()
 
-    def generate_activity_report_chart(self):
-        """Generates a chart of daily activity levels."""
+    def get_activity_report_chart(self):
+        """Returns (etag, png_bytes, base64_str) for the activity chart.
+
+        The chart is rendered only when the activity counts in self.data change;
+        the etag is a hash of those counts.
+        """
         if self.data is None:
             self._generate_simulated_data()
 
-        activity_counts = self.data['daily_activity_level'].value_counts().sort_index()
+        if isinstance(self.data, pd.DataFrame):
+            activity_counts = self.data['daily_activity_level'].value_counts().sort_index()
+        else:
+            activity_counts = self.data.value_counts('daily_activity_level').sort_index()
+        payload = json.dumps([[str(k), int(v)] for k, v in activity_counts.items()])
+        etag = hashlib.sha256(payload.encode('utf-8')).hexdigest()[:32]
+
+        with self._chart_lock:
+            cached = self._chart_cache.get(etag)
+            if cached is not None:
+                self._chart_cache.move_to_end(etag)
+                return (etag,) + cached
+
+        png = self._render_activity_chart(activity_counts)
+        cached = (png, base64.b64encode(png).decode('utf-8'))
+        with self._chart_lock:
+            self._chart_cache[etag] = cached
+            while len(self._chart_cache) > CHART_CACHE_SIZE:
+                self._chart_cache.popitem(last=False)
+        return (etag,) + cached
 
-        plt.figure(figsize=(8, 6))
-        activity_counts.plot(kind='bar', color=['#667eea', '#f093fb', '#a8edea'])
-        plt.title('توزيع مستويات النشاط اليومي', fontname='Arial')
-        plt.xlabel('مستوى النشاط', fontname='Arial')
-        plt.ylabel('عدد الأفراد', fontname='Arial')
-        plt.xticks(rotation=0)
-        plt.grid(axis='y', linestyle='--', alpha=0.7)
-        plt.tight_layout()
+    def _render_activity_chart(self, activity_counts):
+        """Draws the activity distribution bar chart and returns it as PNG bytes."""
+        # Imported lazily so workers that never draw charts skip matplotlib. The
+        # Figure API avoids pyplot's global state, which is unsafe across threads.
+        from matplotlib.figure import Figure
+
+        fig = Figure(figsize=(8, 6))
+        ax = fig.subplots()
+        ax.bar([str(k) for k in activity_counts.index], activity_counts.values, color=['#667eea', '#f093fb', '#a8edea'])
+        ax.set_title('توزيع مستويات النشاط اليومي', fontname='Arial')
+        ax.set_xlabel('مستوى النشاط', fontname='Arial')
+        ax.set_ylabel('عدد الأفراد', fontname='Arial')
+        ax.tick_params(axis='x', labelrotation=0)
+        ax.grid(axis='y', linestyle='--', alpha=0.7)
+        fig.tight_layout()
 
-        # Save chart to a BytesIO object
         buf = io.BytesIO()
-        plt.savefig(buf, format='png')
-        buf.seek(0)
-        plt.close()
+        fig.savefig(buf, format='png')
+        return buf.getvalue()
 
-        # Encode to base64
-        image_base64 = base64.b64encode(buf.getvalue()).decode('utf-8')
+    def generate_activity_report_chart(self):
+        """Generates a chart of daily activity levels, base64 encoded."""
+        _, _, image_base64 = self.get_activity_report_chart()
         return image_base64
 
 if __name__ == "__main__":
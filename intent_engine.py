@@ -0,0 +1,131 @@
+import re
+from collections import deque, namedtuple
+
+# Harakat, tanween, shadda, sukun, superscript alef and tatweel carry no meaning for matching.
+_DROPPED = dict.fromkeys([*range(0x064B, 0x0653), 0x0670, 0x0640])
+_FOLDED = str.maketrans({
+    'أ': 'ا', 'إ': 'ا', 'آ': 'ا', 'ٱ': 'ا',
+    'ى': 'ي',
+    'ة': 'ه',
+    'ؤ': 'و', 'ئ': 'ي',
+})
+_WHITESPACE = re.compile(r'\s+')
+
+IntentMatch = namedtuple('IntentMatch', 'name score keywords intent')
+
+
+def normalize_arabic(text):
+    """Folds spelling variants so keywords match however the text was typed or transcribed.
+
+    Drops diacritics and tatweel, unifies alef/ya/ta-marbuta/hamza-seat variants,
+    lowercases Latin letters and collapses whitespace.
+    """
+    text = text.translate(_DROPPED).translate(_FOLDED).lower()
+    return _WHITESPACE.sub(' ', text).strip()
+
+
+class IntentEngine:
+    """Table-driven intent matching over one Aho–Corasick automaton.
+
+    Each intent is a dict with a `name`, `keywords` ({phrase: weight}) and
+    optionally `threshold` (minimum total weight, default 1.0) and `priority`
+    (breaks ties). All keywords of all intents are normalized and compiled into
+    a single automaton, so one pass over the utterance finds every keyword
+    whatever the number of intents. An intent scores the summed weight of its
+    distinct keywords found; the best intent at or above its threshold wins.
+    """
+
+    def __init__(self, intents):
+        self.intents = [dict(intent) for intent in intents]
+        self._thresholds = [intent.get('threshold', 1.0) for intent in self.intents]
+        self._priorities = [intent.get('priority', 0) for intent in self.intents]
+        self._compile()
+
+    def _compile(self):
+        # keyword id -> [(intent index, weight)], and the normalized phrase for reporting
+        keyword_ids = {}
+        self._keyword_text = []
+        self._keyword_targets = []
+        for index, intent in enumerate(self.intents):
+            for phrase, weight in intent['keywords'].items():
+                phrase = normalize_arabic(phrase)
+                if not phrase:
+                    continue
+                if phrase not in keyword_ids:
+                    keyword_ids[phrase] = len(self._keyword_text)
+                    self._keyword_text.append(phrase)
+                    self._keyword_targets.append([])
+                self._keyword_targets[keyword_ids[phrase]].append((index, weight))
+
+        goto = [{}]
+        outputs = [()]
+        for phrase, keyword_id in keyword_ids.items():
+            node = 0
+            for char in phrase:
+                nxt = goto[node].get(char)
+                if nxt is None:
+                    nxt = goto[node][char] = len(goto)
+                    goto.append({})
+                    outputs.append(())
+                node = nxt
+            outputs[node] += (keyword_id,)
+
+        # Breadth-first failure links; each node's outputs include those of its failure chain.
+        fail = [0] * len(goto)
+        pending = deque(goto[0].values())
+        while pending:
+            node = pending.popleft()
+            for char, child in goto[node].items():
+                state = fail[node]
+                while state and char not in goto[state]:
+                    state = fail[state]
+                fallback = goto[state].get(char, 0)
+                fail[child] = fallback if fallback != child else 0
+                outputs[child] += outputs[fail[child]]
+                pending.append(child)
+
+        self._goto = goto
+        self._fail = fail
+        self._outputs = outputs
+
+    @property
+    def keyword_count(self):
+        return len(self._keyword_text)
+
+    def find_keywords(self, text):
+        """Returns the ids of the distinct keywords occurring in already-normalized text."""
+        goto, fail, outputs = self._goto, self._fail, self._outputs
+        found = set()
+        node = 0
+        for char in text:
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if outputs[node]:
+                found.update(outputs[node])
+        return found
+
+    def scores(self, text):
+        """Returns {intent index: (score, [matched keywords])} for the intents the text mentions."""
+        scores = {}
+        for keyword_id in self.find_keywords(normalize_arabic(text)):
+            for index, weight in self._keyword_targets[keyword_id]:
+                score, keywords = scores.get(index, (0.0, []))
+                keywords.append(self._keyword_text[keyword_id])
+                scores[index] = (score + weight, keywords)
+        return scores
+
+    def match(self, text):
+        """Returns the best IntentMatch for the text, or None if no intent reaches its threshold."""
+        best = None
+        for index, (score, keywords) in self.scores(text).items():
+            if score < self._thresholds[index]:
+                continue
+            rank = (score, self._priorities[index], -index)
+            if best is None or rank > best[0]:
+                best = (rank, index, score, keywords)
+        if best is None:
+            return None
+        _, index, score, keywords = best
+        intent = self.intents[index]
+        return IntentMatch(intent['name'], score, sorted(keywords), intent)
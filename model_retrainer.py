@@ -0,0 +1,178 @@
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+
+from health_recommendation_system import MODEL_PARAMS, FeatureEncoder, fit_recommendation_model
+from flat_forest import FlatForest
+from model_store import ModelStore, fingerprint_training_data
+
+
+def _holdout_accuracy(forest, holdout):
+    if forest is None:
+        return None
+    X = FeatureEncoder(forest.feature_names).encode_batch(holdout)
+    return float(np.mean(forest.predict(X) == holdout['recommended_activity'].to_numpy().astype(str)))
+
+
+def train_candidate(data, store_root, fingerprint, current_fingerprint, n_jobs=-1, params=MODEL_PARAMS):
+    """Runs in the retraining process: fits, saves and validates a candidate model.
+
+    Both the candidate and the model currently served (loaded from the store)
+    are scored on the candidate's holdout rows through FlatForest, the path
+    that serves requests. The current model may have seen some of those rows
+    in training, which only makes the comparison stricter for the candidate.
+    """
+    start = time.perf_counter()
+    model, _, holdout = fit_recommendation_model(data, params, n_jobs=n_jobs)
+    train_seconds = time.perf_counter() - start
+    store = ModelStore(store_root)
+    candidate = FlatForest.from_sklearn(model)
+    accuracy = _holdout_accuracy(candidate, holdout)
+    store.save(model, fingerprint, extra={'holdout_accuracy': accuracy, 'rows': len(data)})
+    return {
+        'fingerprint': fingerprint,
+        'rows': len(data),
+        'train_seconds': train_seconds,
+        'accuracy': accuracy,
+        'current_accuracy': _holdout_accuracy(store.load_forest(current_fingerprint), holdout),
+    }
+
+
+class RetrainingService:
+    """Retrains the recommendation model in a separate process and hot-swaps it in.
+
+    `trigger()` snapshots the training data from `data_source` (by default the
+    recommender's current data) and returns at once. A spawned process fits
+    the candidate with `n_jobs` cores and saves it to the model store. Back in
+    this process, the candidate is memory-mapped from the store and swapped in
+    with HealthRecommendationSystem.swap_model, but only if its holdout
+    accuracy is no more than `max_regression` below the current model's.
+    Requests keep being served by the old model the whole time, and those in
+    flight at the swap finish on it.
+
+    With `interval` set, `start()` also retrains on a timer.
+    """
+
+    def __init__(self, recommender, data_source=None, n_jobs=-1, max_regression=0.01, interval=None):
+        self.recommender = recommender
+        self.data_source = data_source or (lambda: recommender.data)
+        self.n_jobs = n_jobs
+        self.max_regression = max_regression
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._pool = None
+        self._future = None
+        self._done = threading.Event()
+        self._done.set()
+        self._stop = threading.Event()
+        self._timer = None
+        self.metrics = {
+            'status': 'idle',
+            'retrains': 0,
+            'swaps': 0,
+            'rejected': 0,
+            'unchanged': 0,
+            'failures': 0,
+            'last_started_at': None,
+            'last_result': None,
+            'last_retrain_seconds': None,
+            'last_train_seconds': None,
+            'last_swap_pause_seconds': None,
+            'last_error': None,
+        }
+
+    def start(self):
+        """Starts periodic retraining every `interval` seconds (no-op without an interval)."""
+        if self.interval and self._timer is None:
+            self._timer = threading.Thread(target=self._run_timer, name='model-retrainer', daemon=True)
+            self._timer.start()
+        return self
+
+    def _run_timer(self):
+        while not self._stop.wait(self.interval):
+            self.trigger()
+
+    def trigger(self, data=None, force=False):
+        """Starts a retrain in the background; returns False if one is already running.
+
+        Data whose fingerprint matches the served model is skipped unless `force` is set.
+        """
+        with self._lock:
+            if not self._done.is_set():
+                return False
+            data = self.data_source() if data is None else data
+            fingerprint = fingerprint_training_data(data, MODEL_PARAMS)
+            if fingerprint == self.recommender.data_fingerprint and not force:
+                self.metrics['unchanged'] += 1
+                return True
+            if self._pool is None:
+                # spawn: forking a process that already runs threads is unsafe
+                self._pool = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn'))
+            self._done.clear()
+            self.metrics['status'] = 'training'
+            self.metrics['retrains'] += 1
+            self.metrics['last_started_at'] = time.time()
+            started = time.perf_counter()
+            try:
+                self._future = self._pool.submit(train_candidate, data, self.recommender.model_store.root,
+                                                 fingerprint, self.recommender.data_fingerprint, self.n_jobs)
+            except BrokenProcessPool as exc:
+                self._pool = None
+                self._finish_failed(exc)
+                return False
+        self._future.add_done_callback(lambda future: self._finish(future, data, started))
+        return True
+
+    def _finish(self, future, data, started):
+        try:
+            result = future.result()
+            current = result['current_accuracy']
+            accepted = current is None or result['accuracy'] >= current - self.max_regression
+            if accepted:
+                forest = self.recommender.model_store.load_forest(result['fingerprint'])
+                if forest is None:
+                    raise RuntimeError('retrained model missing from the model store')
+                self.metrics['last_swap_pause_seconds'] = self.recommender.swap_model(forest, data, result['fingerprint'])
+        except Exception as exc:
+            if isinstance(exc, BrokenProcessPool):
+                with self._lock:
+                    self._pool = None
+            self._finish_failed(exc)
+            return
+        metrics = self.metrics
+        metrics['swaps' if accepted else 'rejected'] += 1
+        metrics.update(
+            status='idle',
+            last_result=dict(result, accepted=accepted, model_version=self.recommender.model_version),
+            last_retrain_seconds=time.perf_counter() - started,
+            last_train_seconds=result['train_seconds'],
+            last_error=None,
+        )
+        print(f"Retrained recommendation model on {result['rows']} rows in {metrics['last_retrain_seconds']:.2f}s: "
+              f"accuracy {result['accuracy']:.3f} vs {'n/a' if current is None else f'{current:.3f}'}, "
+              f"{'swapped in' if accepted else 'rejected'}")
+        self._done.set()
+
+    def _finish_failed(self, exc):
+        self.metrics.update(status='idle', last_error=f'{type(exc).__name__}: {exc}')
+        self.metrics['failures'] += 1
+        self._done.set()
+
+    def wait(self, timeout=None):
+        """Blocks until the running retrain (if any) has finished; returns False on timeout."""
+        return self._done.wait(timeout)
+
+    def stats(self):
+        return dict(self.metrics, model_version=self.recommender.model_version,
+                    data_fingerprint=self.recommender.data_fingerprint)
+
+    def shutdown(self):
+        self._stop.set()
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
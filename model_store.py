@@ -0,0 +1,131 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from importlib.metadata import version
+
+import pandas as pd
+
+from flat_forest import FlatForest
+
+# Bump when the on-disk layout changes so stale artifacts are ignored.
+ARTIFACT_FORMAT_VERSION = 2
+
+# Read from package metadata so fingerprinting does not import scikit-learn.
+SKLEARN_VERSION = version("scikit-learn")
+
+DEFAULT_STORE_DIR = os.environ.get(
+    "HEALTH_MODEL_STORE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "model_artifacts"),
+)
+
+
+def fingerprint_training_data(data, params=None):
+    """Returns a stable hash of the training data and model parameters.
+
+    Chunked datasets are not read: their own `fingerprint` identifies the content.
+    """
+    digest = hashlib.sha256()
+    digest.update(f"format={ARTIFACT_FORMAT_VERSION};sklearn={SKLEARN_VERSION}".encode("utf-8"))
+    digest.update(json.dumps(params or {}, sort_keys=True).encode("utf-8"))
+    if not isinstance(data, pd.DataFrame):
+        digest.update(f"dataset={data.fingerprint}".encode("utf-8"))
+        return digest.hexdigest()
+    digest.update(",".join(map(str, data.columns)).encode("utf-8"))
+    digest.update(pd.util.hash_pandas_object(data, index=True).values.tobytes())
+    return digest.hexdigest()
+
+
+class ModelStore:
+    """Versioned on-disk store for trained recommendation models.
+
+    Each artifact lives in its own directory named after the training-data
+    fingerprint, holding the pickled scikit-learn model, its flattened
+    FlatForest arrays and a small JSON manifest.
+    """
+
+    MODEL_FILE = "model.joblib"
+    FOREST_DIR = "flat_forest"
+    META_FILE = "meta.json"
+
+    def __init__(self, root=DEFAULT_STORE_DIR):
+        self.root = root
+
+    def _artifact_dir(self, fingerprint):
+        return os.path.join(self.root, f"v{ARTIFACT_FORMAT_VERSION}-{fingerprint[:16]}")
+
+    def exists(self, fingerprint):
+        """Checks whether a complete artifact for the fingerprint is on disk."""
+        meta = self._read_meta(fingerprint)
+        return meta is not None and meta.get("fingerprint") == fingerprint
+
+    def _read_meta(self, fingerprint):
+        path = os.path.join(self._artifact_dir(fingerprint), self.META_FILE)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def save(self, model, fingerprint, extra=None):
+        """Writes the model, its flattened forest and manifest atomically, returning the artifact path."""
+        import joblib
+
+        os.makedirs(self.root, exist_ok=True)
+        target = self._artifact_dir(fingerprint)
+        staging = tempfile.mkdtemp(prefix=".staging-", dir=self.root)
+
+        # compress=0 keeps numpy buffers raw so they can be memory-mapped on load
+        joblib.dump(model, os.path.join(staging, self.MODEL_FILE), compress=0)
+        FlatForest.from_sklearn(model).save(os.path.join(staging, self.FOREST_DIR))
+        meta = {
+            "format_version": ARTIFACT_FORMAT_VERSION,
+            "fingerprint": fingerprint,
+            "feature_names": [str(c) for c in getattr(model, "feature_names_in_", [])],
+            "sklearn_version": SKLEARN_VERSION,
+            "created_at": time.time(),
+        }
+        meta.update(extra or {})
+        with open(os.path.join(staging, self.META_FILE), "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+
+        try:
+            os.replace(staging, target)
+        except OSError:
+            # Another worker published the same fingerprint first; keep theirs.
+            shutil.rmtree(staging, ignore_errors=True)
+        return target
+
+    def load(self, fingerprint, mmap=True):
+        """Loads the scikit-learn model for the fingerprint, or returns None if it is missing or stale."""
+        meta = self._read_meta(fingerprint)
+        if meta is None or meta.get("fingerprint") != fingerprint:
+            return None
+        if meta.get("sklearn_version") != SKLEARN_VERSION:
+            return None
+
+        import joblib
+
+        path = os.path.join(self._artifact_dir(fingerprint), self.MODEL_FILE)
+        try:
+            model = joblib.load(path, mmap_mode="r" if mmap else None)
+        except (OSError, EOFError, ValueError):
+            return None
+        if list(map(str, getattr(model, "feature_names_in_", []))) != meta["feature_names"]:
+            return None
+        return model
+
+    def load_forest(self, fingerprint, mmap=True):
+        """Loads the flattened forest for the fingerprint without importing scikit-learn."""
+        meta = self._read_meta(fingerprint)
+        if meta is None or meta.get("fingerprint") != fingerprint:
+            return None
+        try:
+            forest = FlatForest.load(os.path.join(self._artifact_dir(fingerprint), self.FOREST_DIR), mmap=mmap)
+        except (OSError, ValueError, KeyError):
+            return None
+        if forest.feature_names != meta["feature_names"]:
+            return None
+        return forest
@@ -0,0 +1,120 @@
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+# Opt-in step sizes for bucketing continuous inputs before they are cached and
+# scored. Bucketing raises the hit rate but changes the answer for inputs near a
+# bucket edge, so by default the cache is keyed on the exact inputs.
+COARSE_QUANTIZATION = {
+    'age': 1,
+    'sleep_hours': 0.25,
+    'heart_rate': 2,
+    'medication_adherence': 0.05,
+    'fall_risk_score': 0.05,
+}
+
+
+class RecommendationCache:
+    """Thread-safe LRU cache with TTL for recommendations.
+
+    Keyed on the exact inputs unless `quantization` (e.g. COARSE_QUANTIZATION)
+    is given; then inputs are snapped to buckets, and the recommender scores
+    the bucketed values on every path so answers stay consistent. Entries are tagged with the model version they were computed with; a version
+    change (retrain or reload) drops everything cached so far.
+    """
+
+    def __init__(self, max_entries=4096, ttl_seconds=300, quantization=None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.quantization = dict(quantization or {})
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._model_version = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def quantize(self, inputs):
+        """Returns a copy of inputs with continuous values snapped to their bucket."""
+        quantized = dict(inputs)
+        for name, step in self.quantization.items():
+            if step and quantized.get(name) is not None:
+                value = round(round(quantized[name] / step) * step, 6)
+                quantized[name] = int(value) if float(step).is_integer() else value
+        return quantized
+
+    def quantize_columns(self, columns):
+        """Like quantize, for a dict mapping each input name to an array of values."""
+        quantized = dict(columns)
+        for name, step in self.quantization.items():
+            if step and name in quantized:
+                quantized[name] = np.round(np.round(np.asarray(quantized[name], dtype=np.float64) / step) * step, 6)
+        return quantized
+
+    @staticmethod
+    def make_key(quantized_inputs):
+        return tuple(sorted(quantized_inputs.items()))
+
+    def get(self, key, model_version):
+        """Returns the cached recommendation, or None on a miss."""
+        with self._lock:
+            if not self._check_version(model_version):
+                self.misses += 1
+                return None
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at >= time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+                self.evictions += 1
+            self.misses += 1
+            return None
+
+    def put(self, key, value, model_version):
+        with self._lock:
+            if not self._check_version(model_version):
+                return
+            self._entries[key] = (value, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, model_version=None):
+        """Drops every entry, e.g. after the model has been retrained or reloaded."""
+        with self._lock:
+            self._entries.clear()
+            self._model_version = model_version
+            self.invalidations += 1
+
+    def _check_version(self, model_version):
+        # Called with the lock held. A request still running on an older model
+        # neither reads nor fills the cache, so it cannot roll the version back.
+        if model_version is not None and self._model_version is not None and model_version < self._model_version:
+            return False
+        if model_version != self._model_version:
+            if self._entries:
+                self._entries.clear()
+                self.invalidations += 1
+            self._model_version = model_version
+        return True
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl_seconds,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            }
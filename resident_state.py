@@ -0,0 +1,383 @@
+import fcntl
+import os
+import sqlite3
+import tempfile
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from multiprocessing import shared_memory
+
+import numpy as np
+
+DEFAULT_RESIDENT_ID = 'default'
+# Longest resident id (UTF-8 bytes) any backend accepts; the shared-memory records are this wide.
+MAX_RESIDENT_ID_BYTES = 64
+
+
+def connect_sqlite(path):
+    """Opens a connection to a database shared by worker processes (WAL, autocommit)."""
+    connection = sqlite3.connect(path, timeout=30, isolation_level=None)
+    connection.execute('PRAGMA journal_mode=WAL')
+    connection.execute('PRAGMA synchronous=NORMAL')
+    return connection
+
+
+class ResidentState:
+    """Monitoring, health and profile state for one resident."""
+
+    __slots__ = (
+        'resident_id', 'system_status', 'last_movement', 'activity_level', 'fall_detected',
+        'sleep_hours', 'daily_activity', 'last_medication', 'heart_rate', 'activity_pattern',
+        'age', 'medication_adherence', 'fall_risk_score', 'version'
+    )
+
+    # Fields that can be changed through ResidentStateStore.update
+    FIELDS = __slots__[1:-1]
+    DATETIME_FIELDS = ('last_movement', 'last_medication')
+
+    def __init__(self, resident_id, system_status='active', last_movement=None, activity_level='normal',
+                 fall_detected=False, sleep_hours=7.5, daily_activity='medium', last_medication=None,
+                 heart_rate=72, activity_pattern='normal', age=75, medication_adherence=0.9,
+                 fall_risk_score=0.5, version=0):
+        now = datetime.now()
+        self.resident_id = resident_id
+        self.system_status = system_status
+        self.last_movement = last_movement or now - timedelta(minutes=5)
+        self.activity_level = activity_level
+        self.fall_detected = fall_detected
+        self.sleep_hours = sleep_hours
+        self.daily_activity = daily_activity
+        self.last_medication = last_medication or now - timedelta(hours=2)
+        self.heart_rate = heart_rate
+        self.activity_pattern = activity_pattern
+        self.age = age
+        self.medication_adherence = medication_adherence
+        self.fall_risk_score = fall_risk_score
+        self.version = version
+
+    def copy(self):
+        return ResidentState(**{name: getattr(self, name) for name in self.__slots__})
+
+    def to_row(self):
+        """Flattens the record for storage; datetimes become epoch seconds."""
+        return tuple(
+            getattr(self, name).timestamp() if name in self.DATETIME_FIELDS else getattr(self, name)
+            for name in self.__slots__
+        )
+
+    @classmethod
+    def from_row(cls, row):
+        values = dict(zip(cls.__slots__, row))
+        for name in cls.DATETIME_FIELDS:
+            values[name] = datetime.fromtimestamp(values[name])
+        values['fall_detected'] = bool(values['fall_detected'])
+        return cls(**values)
+
+
+class MemoryStateBackend:
+    """Keeps state in a dict in this process only."""
+
+    def __init__(self):
+        self._records = {}
+        self._lock = threading.Lock()
+
+    def load(self, resident_id):
+        with self._lock:
+            record = self._records.get(resident_id)
+            return record.copy() if record is not None else None
+
+    def update(self, resident_id, changes):
+        with self._lock:
+            record = self._records.get(resident_id) or ResidentState(resident_id)
+            before = record.copy()
+            for name, value in changes.items():
+                setattr(record, name, value)
+            record.version += 1
+            self._records[resident_id] = record
+            return before, record.copy()
+
+    def load_many(self, resident_ids):
+        with self._lock:
+            return {rid: self._records[rid].copy() for rid in resident_ids if rid in self._records}
+
+    def resident_ids(self):
+        with self._lock:
+            return list(self._records)
+
+
+class SQLiteStateBackend:
+    """Shares state between worker processes through a SQLite database in WAL mode."""
+
+    def __init__(self, path='resident_state.db'):
+        self.path = path
+        self._local = threading.local()
+        columns = ', '.join(f'{name} {self._column_type(name)}' for name in ResidentState.__slots__[1:])
+        self._connection().execute(
+            f'CREATE TABLE IF NOT EXISTS resident_state (resident_id TEXT PRIMARY KEY, {columns})'
+        )
+
+    @staticmethod
+    def _column_type(name):
+        if name in ('sleep_hours', 'medication_adherence', 'fall_risk_score') or name in ResidentState.DATETIME_FIELDS:
+            return 'REAL'
+        if name in ('fall_detected', 'heart_rate', 'age', 'version'):
+            return 'INTEGER'
+        return 'TEXT'
+
+    def _connection(self):
+        # sqlite3 connections cannot be shared between threads, so keep one per thread.
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = self._local.connection = connect_sqlite(self.path)
+        return connection
+
+    def load(self, resident_id):
+        row = self._connection().execute(
+            'SELECT * FROM resident_state WHERE resident_id = ?', (resident_id,)
+        ).fetchone()
+        return ResidentState.from_row(row) if row is not None else None
+
+    def update(self, resident_id, changes):
+        connection = self._connection()
+        # IMMEDIATE takes the write lock up front so concurrent updates serialize.
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            before = self.load(resident_id) or ResidentState(resident_id)
+            after = before.copy()
+            for name, value in changes.items():
+                setattr(after, name, value)
+            after.version += 1
+            placeholders = ', '.join('?' * len(ResidentState.__slots__))
+            connection.execute(
+                f'INSERT OR REPLACE INTO resident_state VALUES ({placeholders})', after.to_row()
+            )
+            connection.execute('COMMIT')
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+        return before, after
+
+    def load_many(self, resident_ids, chunk_size=500):
+        states = {}
+        resident_ids = list(resident_ids)
+        connection = self._connection()
+        # Stay under SQLite's bound-parameter limit.
+        for start in range(0, len(resident_ids), chunk_size):
+            chunk = resident_ids[start:start + chunk_size]
+            placeholders = ', '.join('?' * len(chunk))
+            for row in connection.execute(
+                f'SELECT * FROM resident_state WHERE resident_id IN ({placeholders})', chunk
+            ):
+                states[row[0]] = ResidentState.from_row(row)
+        return states
+
+    def resident_ids(self):
+        return [row[0] for row in self._connection().execute('SELECT resident_id FROM resident_state')]
+
+
+class SharedMemoryStateBackend:
+    """Shares state between worker processes through a fixed-size shared-memory segment.
+
+    Records are rows of a NumPy structured array laid over the segment. Each
+    process keeps its own resident id -> slot index and refreshes it from the
+    segment when it sees an unknown id. Access is serialized with a thread lock
+    plus an flock on a lock file, which also covers other processes.
+    """
+
+    STRING_WIDTH = 16
+    ID_WIDTH = MAX_RESIDENT_ID_BYTES
+
+    def __init__(self, name='elderly_care_state', capacity=4096, lock_path=None):
+        self.capacity = capacity
+        self.header_dtype = np.dtype([('count', np.int64)])
+        self.record_dtype = np.dtype([
+            ('resident_id', f'S{self.ID_WIDTH}'),
+            ('system_status', f'S{self.STRING_WIDTH}'),
+            ('last_movement', np.float64),
+            ('activity_level', f'S{self.STRING_WIDTH}'),
+            ('fall_detected', np.bool_),
+            ('sleep_hours', np.float64),
+            ('daily_activity', f'S{self.STRING_WIDTH}'),
+            ('last_medication', np.float64),
+            ('heart_rate', np.int32),
+            ('activity_pattern', f'S{self.STRING_WIDTH}'),
+            ('age', np.int32),
+            ('medication_adherence', np.float64),
+            ('fall_risk_score', np.float64),
+            ('version', np.int64),
+        ])
+        size = self.header_dtype.itemsize + capacity * self.record_dtype.itemsize
+        try:
+            self._shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            self._shm = shared_memory.SharedMemory(name=name)
+        self._untrack()
+
+        self._header = np.ndarray((1,), dtype=self.header_dtype, buffer=self._shm.buf)
+        self._records = np.ndarray(
+            (capacity,), dtype=self.record_dtype, buffer=self._shm.buf, offset=self.header_dtype.itemsize
+        )
+        self._index = {}
+        self._thread_lock = threading.Lock()
+        self._lock_file = open(lock_path or os.path.join(tempfile.gettempdir(), f'{name}.lock'), 'a+')
+
+    def _untrack(self):
+        # The segment outlives any single worker; stop Python's resource tracker
+        # from unlinking it when this process exits.
+        try:
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(self._shm._name, 'shared_memory')
+        except (ImportError, KeyError, AttributeError):
+            pass
+
+    @contextmanager
+    def _locked(self):
+        with self._thread_lock:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+    def _slot(self, resident_id, create=False):
+        # Called with the lock held.
+        slot = self._index.get(resident_id)
+        if slot is not None:
+            return slot
+        count = int(self._header[0]['count'])
+        key = resident_id.encode('utf-8')
+        matches = np.flatnonzero(self._records['resident_id'][:count] == key)
+        if len(matches):
+            slot = int(matches[0])
+        elif create:
+            if count >= self.capacity:
+                raise MemoryError('Shared resident state segment is full')
+            slot = count
+            self._records[slot] = self._encode(ResidentState(resident_id))
+            self._header[0]['count'] = count + 1
+        else:
+            return None
+        self._index[resident_id] = slot
+        return slot
+
+    def _encode(self, state):
+        row = list(state.to_row())
+        for i, name in enumerate(ResidentState.__slots__):
+            if isinstance(row[i], str):
+                row[i] = row[i].encode('utf-8')
+                if len(row[i]) > self.record_dtype[name].itemsize:
+                    raise ValueError(f'{name} is too long for the shared-memory record: {row[i]!r}')
+        return tuple(row)
+
+    def _decode(self, record):
+        row = [record[name] for name in ResidentState.__slots__]
+        for i, value in enumerate(row):
+            if isinstance(value, bytes):
+                row[i] = value.decode('utf-8')
+            elif isinstance(value, np.generic):
+                row[i] = value.item()
+        return ResidentState.from_row(row)
+
+    def load(self, resident_id):
+        with self._locked():
+            slot = self._slot(resident_id)
+            return self._decode(self._records[slot]) if slot is not None else None
+
+    def update(self, resident_id, changes):
+        with self._locked():
+            slot = self._slot(resident_id, create=True)
+            before = self._decode(self._records[slot])
+            after = before.copy()
+            for name, value in changes.items():
+                setattr(after, name, value)
+            after.version += 1
+            self._records[slot] = self._encode(after)
+            return before, after
+
+    def load_many(self, resident_ids):
+        with self._locked():
+            slots = {rid: self._slot(rid) for rid in resident_ids}
+            return {rid: self._decode(self._records[slot]) for rid, slot in slots.items() if slot is not None}
+
+    def resident_ids(self):
+        with self._locked():
+            count = int(self._header[0]['count'])
+            return [value.decode('utf-8') for value in self._records['resident_id'][:count]]
+
+    def close(self):
+        self._header = self._records = None
+        self._shm.close()
+        self._lock_file.close()
+
+    def unlink(self):
+        """Removes the segment for every process; only call once all workers are done."""
+        try:
+            from multiprocessing import resource_tracker
+            # Re-register so unlink()'s own unregister call has something to remove.
+            resource_tracker.register(self._shm._name, 'shared_memory')
+        except (ImportError, AttributeError):
+            pass
+        self._shm.unlink()
+
+
+def create_backend(spec=None):
+    """Builds a backend from a spec such as 'memory', 'sqlite:/var/lib/care/state.db' or 'shm:care_state'."""
+    spec = spec or os.environ.get('RESIDENT_STATE_BACKEND', 'memory')
+    kind, _, arg = spec.partition(':')
+    if kind == 'memory':
+        return MemoryStateBackend()
+    if kind == 'sqlite':
+        return SQLiteStateBackend(arg or 'resident_state.db')
+    if kind == 'shm':
+        return SharedMemoryStateBackend(arg or 'elderly_care_state')
+    raise ValueError(f'Unknown resident state backend: {spec}')
+
+
+def shared_database_path(spec=None):
+    """The SQLite file worker processes share activity logs and alerts through, or None.
+
+    With the 'memory' backend every process keeps its own state, so there is
+    nothing to share. 'sqlite:<path>' uses the state database itself and
+    'shm:<name>' a <name>.db file next to the segment's lock file.
+    """
+    spec = spec or os.environ.get('RESIDENT_STATE_BACKEND', 'memory')
+    kind, _, arg = spec.partition(':')
+    if kind == 'sqlite':
+        return arg or 'resident_state.db'
+    if kind == 'shm':
+        return os.path.join(tempfile.gettempdir(), f"{arg or 'elderly_care_state'}.db")
+    return None
+
+
+class ResidentStateStore:
+    """Per-resident state, keyed by resident id, over a pluggable backend."""
+
+    def __init__(self, backend=None):
+        self.backend = backend if backend is not None else create_backend()
+
+    def get(self, resident_id):
+        """Returns a snapshot of the resident's state.
+
+        Residents never written get unsaved default state (version 0); only
+        update() creates records, so reads of unknown ids do not grow the backend.
+        """
+        state = self.backend.load(resident_id)
+        return state if state is not None else ResidentState(resident_id)
+
+    def get_many(self, resident_ids):
+        """Returns {resident_id: state} for many residents with one backend round trip."""
+        states = self.backend.load_many(resident_ids)
+        for resident_id in resident_ids:
+            if resident_id not in states:
+                states[resident_id] = ResidentState(resident_id)
+        return states
+
+    def update(self, resident_id, **changes):
+        """Applies field changes atomically and returns (before, after) snapshots."""
+        unknown = set(changes) - set(ResidentState.FIELDS)
+        if unknown:
+            raise ValueError(f'Unknown resident state fields: {sorted(unknown)}')
+        return self.backend.update(resident_id, changes)
+
+    def resident_ids(self):
+        return self.backend.resident_ids()
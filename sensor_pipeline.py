@@ -0,0 +1,514 @@
+import bisect
+import selectors
+import socket
+import threading
+import time
+from collections import Counter, namedtuple
+from operator import attrgetter
+
+import numpy as np
+
+# One raw sample. `accel` carries x/y/z acceleration in g; `motion` carries a
+# scalar motion score in x (PIR sensor or camera frame differencing).
+SensorEvent = namedtuple('SensorEvent', 'timestamp resident_id kind x y z')
+
+# One derived event. `timestamp` is the source time of the sample that
+# triggered it, `detected_at` the wall-clock time the detector emitted it.
+DetectedEvent = namedtuple('DetectedEvent', 'type resident_id timestamp detected_at data')
+
+ACCEL = 'accel'
+MOTION = 'motion'
+
+ACTIVITY_LEVELS = ('Low Activity', 'Normal Activity', 'High Activity')
+
+
+def parse_event_line(line):
+    """Parses a `timestamp,resident_id,kind,x,y,z` line into a SensorEvent."""
+    timestamp, resident_id, kind, x, y, z = line.strip().split(',')
+    return SensorEvent(float(timestamp), resident_id, kind, float(x), float(y), float(z))
+
+
+def format_event_line(event):
+    return f"{event.timestamp:.3f},{event.resident_id},{event.kind},{event.x:.4f},{event.y:.4f},{event.z:.4f}\n"
+
+
+def write_events(path, batches):
+    """Records event batches (e.g. from a SyntheticSensorSource) to a replay file."""
+    count = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        for batch in batches:
+            f.writelines(format_event_line(event) for event in batch)
+            count += len(batch)
+    return count
+
+
+class SyntheticSensorSource:
+    """Accelerometer and motion samples for simulated residents.
+
+    Residents move at a randomly varying activity level; falls (an impact spike
+    followed by lying still) and idle spells are injected at random and recorded
+    in `injected` as ground truth. Yields one batch per sampling tick. With
+    `realtime=True` ticks are paced to the wall clock, otherwise they are
+    generated as fast as possible.
+    """
+
+    def __init__(self, residents=10, rate_hz=50, duration_seconds=60, fall_rate_per_hour=6.0,
+                 idle_rate_per_hour=2.0, idle_seconds=360, fall_still_seconds=5.0,
+                 motion_rate_hz=1, realtime=False, start_time=None, seed=None):
+        self.resident_ids = [f'resident-{i}' for i in range(residents)] if isinstance(residents, int) else list(residents)
+        self.rate_hz = rate_hz
+        self.duration_seconds = duration_seconds
+        self.fall_probability = fall_rate_per_hour / 3600.0 / rate_hz
+        self.idle_probability = idle_rate_per_hour / 3600.0 / rate_hz
+        self.idle_ticks = int(idle_seconds * rate_hz)
+        self.fall_still_ticks = int(fall_still_seconds * rate_hz)
+        self.motion_every = max(1, int(rate_hz // motion_rate_hz)) if motion_rate_hz else 0
+        self.realtime = realtime
+        self.start_time = start_time
+        self.rng = np.random.default_rng(seed)
+        self.injected = []
+        self._stopped = False
+
+    def close(self):
+        self._stopped = True
+
+    def __iter__(self):
+        rng = self.rng
+        n = len(self.resident_ids)
+        ids = self.resident_ids
+        start = time.time() if self.start_time is None else self.start_time
+        # 0 = active, 1 = falling/lying, 2 = idle; `remaining` counts ticks left in the state
+        state = np.zeros(n, dtype=np.int8)
+        remaining = np.zeros(n, dtype=np.int64)
+        activity = rng.uniform(0.02, 0.4, n)
+        motion_sum = np.zeros(n)
+        total_ticks = None if self.duration_seconds is None else int(self.duration_seconds * self.rate_hz)
+
+        tick = 0
+        while not self._stopped and (total_ticks is None or tick < total_ticks):
+            timestamp = start + tick / self.rate_hz
+            if self.realtime:
+                delay = timestamp - time.time()
+                if delay > 0:
+                    time.sleep(delay)
+
+            remaining -= 1
+            ended = (state != 0) & (remaining <= 0)
+            state[ended] = 0
+            roll = rng.random(n)
+            active = state == 0
+            falls = active & (roll < self.fall_probability)
+            idles = active & ~falls & (roll < self.fall_probability + self.idle_probability)
+            state[falls] = 1
+            remaining[falls] = self.fall_still_ticks
+            state[idles] = 2
+            remaining[idles] = self.idle_ticks
+            for i in np.flatnonzero(falls):
+                self.injected.append(('fall', ids[i], timestamp))
+            for i in np.flatnonzero(idles):
+                self.injected.append(('inactivity', ids[i], timestamp))
+            drift = rng.random(n) < 0.01 / self.rate_hz
+            activity[drift] = rng.uniform(0.02, 0.4, int(drift.sum()))
+
+            # Upright gravity plus movement noise; lying residents have gravity on x.
+            noise_scale = np.where(state == 0, activity, 0.005)[:, None]
+            samples = rng.normal(0.0, 1.0, (n, 3)) * noise_scale
+            lying = state == 1
+            samples[:, 2] += np.where(lying, 0.0, 1.0)
+            samples[:, 0] += np.where(lying, 1.0, 0.0)
+            impact = lying & (remaining > self.fall_still_ticks - 3)
+            samples[impact] = rng.normal(0.0, 0.3, (int(impact.sum()), 3)) + np.array([2.5, 0.0, 2.0])
+
+            batch = [SensorEvent(timestamp, rid, ACCEL, x, y, z)
+                     for rid, (x, y, z) in zip(ids, samples.tolist())]
+            if self.motion_every:
+                motion_sum += np.abs(np.linalg.norm(samples, axis=1) - 1.0)
+                if (tick + 1) % self.motion_every == 0:
+                    scores = (motion_sum / self.motion_every).tolist()
+                    batch.extend(SensorEvent(timestamp, rid, MOTION, score, 0.0, 0.0)
+                                 for rid, score in zip(ids, scores))
+                    motion_sum[:] = 0.0
+            yield batch
+            tick += 1
+
+
+class FileReplaySource:
+    """Replays a recorded `timestamp,resident_id,kind,x,y,z` file.
+
+    `speed=None` replays as fast as possible; `speed=1.0` keeps the recorded
+    pacing (2.0 twice as fast, and so on).
+    """
+
+    def __init__(self, path, speed=None, batch_size=256):
+        self.path = path
+        self.speed = speed
+        self.batch_size = batch_size
+        self._stopped = False
+
+    def close(self):
+        self._stopped = True
+
+    def __iter__(self):
+        first_timestamp = None
+        started = time.time()
+        batch = []
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if self._stopped:
+                    break
+                if not line.strip():
+                    continue
+                event = parse_event_line(line)
+                if self.speed:
+                    if first_timestamp is None:
+                        first_timestamp = event.timestamp
+                    delay = (event.timestamp - first_timestamp) / self.speed - (time.time() - started)
+                    if delay > 0:
+                        if batch:
+                            yield batch
+                            batch = []
+                        time.sleep(delay)
+                batch.append(event)
+                if len(batch) >= self.batch_size:
+                    yield batch
+                    batch = []
+        if batch:
+            yield batch
+
+
+class SocketSensorSource:
+    """Accepts sensor gateways on a local TCP socket.
+
+    Each connection streams newline-separated `timestamp,resident_id,kind,x,y,z`
+    lines. Whatever arrived in one read becomes one batch; an empty batch is
+    yielded every `idle_tick` seconds without traffic so windows still close on time.
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, idle_tick=0.05):
+        self.idle_tick = idle_tick
+        self._server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._server.bind((host, port))
+        self._server.listen()
+        self._server.setblocking(False)
+        self.address = self._server.getsockname()
+        self._stopped = False
+
+    def close(self):
+        self._stopped = True
+
+    def __iter__(self):
+        selector = selectors.DefaultSelector()
+        selector.register(self._server, selectors.EVENT_READ)
+        partial = {}
+        try:
+            while not self._stopped:
+                batch = []
+                for key, _ in selector.select(timeout=self.idle_tick):
+                    if key.fileobj is self._server:
+                        connection, _ = self._server.accept()
+                        connection.setblocking(False)
+                        selector.register(connection, selectors.EVENT_READ)
+                        partial[connection] = b''
+                        continue
+                    connection = key.fileobj
+                    try:
+                        data = connection.recv(65536)
+                    except (BlockingIOError, InterruptedError):
+                        continue
+                    except OSError:
+                        data = b''
+                    if not data:
+                        selector.unregister(connection)
+                        connection.close()
+                        data = partial.pop(connection, b'')
+                    else:
+                        data, _, partial[connection] = (partial[connection] + data).rpartition(b'\n')
+                    for line in data.decode('utf-8').splitlines():
+                        if line.strip():
+                            try:
+                                batch.append(parse_event_line(line))
+                            except ValueError:
+                                print(f"Dropping malformed sensor line: {line!r}")
+                yield batch
+        finally:
+            for key in list(selector.get_map().values()):
+                key.fileobj.close()
+            selector.close()
+
+
+class SensorWindow:
+    """A micro-window of samples as columnar arrays.
+
+    `residents` holds stable integer codes assigned by the pipeline; the
+    matching ids are `resident_ids[code]`.
+    """
+
+    __slots__ = ('timestamps', 'residents', 'is_accel', 'values', 'resident_ids')
+
+    def __init__(self, events, resident_index, resident_ids):
+        timestamps, ids, kinds, xs, ys, zs = zip(*events)
+        codes = []
+        for resident_id in ids:
+            code = resident_index.get(resident_id)
+            if code is None:
+                code = resident_index[resident_id] = len(resident_ids)
+                resident_ids.append(resident_id)
+            codes.append(code)
+        self.timestamps = np.array(timestamps, dtype=np.float64)
+        self.residents = np.array(codes, dtype=np.int64)
+        self.is_accel = np.array([kind == ACCEL for kind in kinds], dtype=bool)
+        self.values = np.column_stack((xs, ys, zs)).astype(np.float32)
+        self.resident_ids = resident_ids
+
+    def __len__(self):
+        return len(self.timestamps)
+
+
+def micro_windows(batches, resident_index, resident_ids, window_seconds=0.25, max_events=8192):
+    """Groups source batches into SensorWindows.
+
+    A window covers at most `window_seconds` of event time (batches spanning
+    more are split) and closes early once it has been open for `window_seconds`
+    of wall-clock time or holds `max_events` samples.
+    """
+    pending = []
+    window_end = None
+    opened_at = None
+    for batch in batches:
+        while batch:
+            if not pending:
+                window_end = batch[0].timestamp + window_seconds
+                opened_at = time.monotonic()
+            if batch[-1].timestamp < window_end:
+                pending.extend(batch)
+                break
+            cut = bisect.bisect_left(batch, window_end, key=attrgetter('timestamp'))
+            pending.extend(batch[:cut])
+            batch = batch[cut:]
+            yield SensorWindow(pending, resident_index, resident_ids)
+            pending = []
+        if pending and (len(pending) >= max_events or time.monotonic() - opened_at >= window_seconds):
+            yield SensorWindow(pending, resident_index, resident_ids)
+            pending = []
+    if pending:
+        yield SensorWindow(pending, resident_index, resident_ids)
+
+
+class WindowDetector:
+    """Derives fall, inactivity and activity-level events from micro-windows.
+
+    fall_detector.SlidingWindowDetector does the same job more precisely and is
+    what SensorPipeline uses by default. This simpler detector is kept as the
+    baseline bench_fall_detector compares it against.
+
+    Per-resident state lives in arrays indexed by resident code and each window
+    is reduced with a handful of vectorized operations, whatever its size.
+    A fall is an impact above `impact_g` followed by stillness for
+    `fall_confirm_seconds`; inactivity is no movement for `inactivity_seconds`;
+    activity level buckets a smoothed mean deviation from 1 g.
+    """
+
+    def __init__(self, impact_g=2.0, still_threshold_g=0.08, motion_threshold=0.05,
+                 fall_confirm_seconds=1.0, fall_settle_seconds=0.5, inactivity_seconds=300,
+                 activity_thresholds=(0.04, 0.2), activity_smoothing=0.1):
+        self.impact_g = impact_g
+        self.still_threshold_g = still_threshold_g
+        self.motion_threshold = motion_threshold
+        self.fall_confirm_seconds = fall_confirm_seconds
+        self.fall_settle_seconds = fall_settle_seconds
+        self.inactivity_seconds = inactivity_seconds
+        self.activity_thresholds = np.array(activity_thresholds)
+        self.activity_smoothing = activity_smoothing
+        # Per-resident state, indexed by resident code
+        self.last_seen = np.empty(0)
+        self.last_motion = np.empty(0)
+        self.last_accel_motion = np.empty(0)
+        self.pending_fall = np.empty(0)
+        self.inactive = np.empty(0, dtype=bool)
+        self.activity = np.empty(0)
+        self.level = np.empty(0, dtype=np.int64)
+        self._grow(64)
+
+    def _grow(self, size):
+        def extend(array, fill):
+            grown = np.full(size, fill, dtype=array.dtype)
+            grown[:len(array)] = array
+            return grown
+
+        self.last_seen = extend(self.last_seen, np.nan)
+        self.last_motion = extend(self.last_motion, np.nan)
+        self.last_accel_motion = extend(self.last_accel_motion, np.nan)
+        self.pending_fall = extend(self.pending_fall, np.nan)
+        self.inactive = extend(self.inactive, False)
+        self.activity = extend(self.activity, np.nan)
+        self.level = extend(self.level, -1)
+
+    def process(self, window):
+        """Updates per-resident state from a window and returns the DetectedEvents it triggers."""
+        n = len(window.resident_ids)
+        if n > len(self.last_seen):
+            self._grow(max(n, len(self.last_seen) * 2))
+        codes = window.residents
+        timestamps = window.timestamps
+        accel = window.is_accel
+        magnitude = np.linalg.norm(window.values, axis=1)
+        deviation = np.abs(magnitude - 1.0)
+        moving = np.where(accel, deviation > self.still_threshold_g, window.values[:, 0] > self.motion_threshold)
+
+        seen = np.full(n, -np.inf)
+        np.maximum.at(seen, codes, timestamps)
+        present = np.isfinite(seen)
+        self.last_seen[:n] = np.where(present, np.fmax(self.last_seen[:n], seen), self.last_seen[:n])
+        first_seen = present & np.isnan(self.last_motion[:n])
+        self.last_motion[:n][first_seen] = seen[first_seen]
+
+        moved = np.full(n, -np.inf)
+        np.maximum.at(moved, codes[moving], timestamps[moving])
+        has_moved = np.isfinite(moved)
+        self.last_motion[:n] = np.where(has_moved, np.fmax(self.last_motion[:n], moved), self.last_motion[:n])
+        # Motion scores summarize the past interval, so fall settling only trusts the accelerometer.
+        jolted = moving & accel
+        np.fmax.at(self.last_accel_motion, codes[jolted], timestamps[jolted])
+
+        # The latest impact wins, so a spike while already moving about does not
+        # mask a real fall that follows it.
+        impacts = np.full(n, -np.inf)
+        impact_mask = accel & (magnitude > self.impact_g)
+        np.maximum.at(impacts, codes[impact_mask], timestamps[impact_mask])
+        new_impact = np.isfinite(impacts)
+        self.pending_fall[:n][new_impact] = impacts[new_impact]
+
+        sums = np.bincount(codes[accel], weights=deviation[accel], minlength=n)
+        counts = np.bincount(codes[accel], minlength=n)
+        # Smoothed across windows so the level does not flicker around a threshold.
+        sampled = counts > 0
+        mean = sums[sampled] / counts[sampled]
+        previous = self.activity[:n][sampled]
+        self.activity[:n][sampled] = np.where(np.isnan(previous), mean,
+                                              previous + self.activity_smoothing * (mean - previous))
+        level = np.digitize(self.activity[:n], self.activity_thresholds)
+
+        now = time.time()
+        detected = []
+        resident_ids = window.resident_ids
+
+        pending = self.pending_fall[:n]
+        with np.errstate(invalid='ignore'):
+            due = self.last_seen[:n] - pending >= self.fall_confirm_seconds
+        for code in np.flatnonzero(due):
+            impact_time = pending[code]
+            # Still after settling: a fall, not a jump or a dropped sensor.
+            if self.last_accel_motion[code] - impact_time <= self.fall_settle_seconds:
+                detected.append(DetectedEvent('fall', resident_ids[code], float(impact_time), now,
+                                              {'impact_time': float(impact_time)}))
+            pending[code] = np.nan
+
+        idle_for = self.last_seen[:n] - self.last_motion[:n]
+        self.inactive[:n][has_moved] = False
+        became_inactive = (idle_for >= self.inactivity_seconds) & ~self.inactive[:n]
+        for code in np.flatnonzero(became_inactive):
+            self.inactive[code] = True
+            detected.append(DetectedEvent('inactivity', resident_ids[code], float(self.last_motion[code]), now,
+                                          {'idle_seconds': float(idle_for[code])}))
+
+        changed = sampled & (level != self.level[:n])
+        for code in np.flatnonzero(changed):
+            self.level[code] = level[code]
+            detected.append(DetectedEvent('activity_level', resident_ids[code], float(seen[code]), now,
+                                          {'activity_pattern': ACTIVITY_LEVELS[level[code]],
+                                           'mean_deviation_g': float(self.activity[code])}))
+        return detected
+
+
+class SensorPipeline:
+    """Streams source batches through micro-windowing and a detector to subscribers.
+
+    Subscribers are callbacks taking a DetectedEvent, optionally filtered by
+    event type. `run()` blocks until the source is exhausted; `start()` runs it
+    on a background thread. The detector defaults to SlidingWindowDetector.
+    """
+
+    def __init__(self, source, detector=None, window_seconds=0.25, max_batch=8192):
+        self.source = source
+        if detector is None:
+            # Imported here: fall_detector itself imports this module.
+            from fall_detector import SlidingWindowDetector
+            detector = SlidingWindowDetector()
+        self.detector = detector
+        self.window_seconds = window_seconds
+        self.max_batch = max_batch
+        self.resident_index = {}
+        self.resident_ids = []
+        self._subscribers = {}
+        self._next_token = 0
+        self._lock = threading.Lock()
+        self._thread = None
+        self.events_in = 0
+        self.windows = 0
+        self.detected = Counter()
+        self.started_at = None
+        self.finished_at = None
+
+    def subscribe(self, callback, types=None):
+        """Registers a callback and returns a token for unsubscribe()."""
+        with self._lock:
+            token = self._next_token
+            self._next_token += 1
+            self._subscribers[token] = (callback, set(types) if types else None)
+        return token
+
+    def unsubscribe(self, token):
+        with self._lock:
+            self._subscribers.pop(token, None)
+
+    def run(self):
+        self.started_at = time.time()
+        try:
+            for window in micro_windows(self.source, self.resident_index, self.resident_ids,
+                                        self.window_seconds, self.max_batch):
+                self.events_in += len(window)
+                self.windows += 1
+                for event in self.detector.process(window):
+                    self.detected[event.type] += 1
+                    self._publish(event)
+        finally:
+            self.finished_at = time.time()
+
+    def _publish(self, event):
+        with self._lock:
+            subscribers = list(self._subscribers.values())
+        for callback, types in subscribers:
+            if types is None or event.type in types:
+                try:
+                    callback(event)
+                except Exception as e:
+                    # A failing subscriber must not stop ingestion for the others.
+                    print(f"Sensor pipeline subscriber failed: {e}")
+
+    def start(self):
+        self._thread = threading.Thread(target=self.run, name='sensor-pipeline', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=5.0):
+        close = getattr(self.source, 'close', None)
+        if close:
+            close()
+        if self._thread:
+            self._thread.join(timeout)
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def stats(self):
+        elapsed = (self.finished_at or time.time()) - self.started_at if self.started_at else 0.0
+        return {
+            'events_in': self.events_in,
+            'windows': self.windows,
+            'residents': len(self.resident_ids),
+            'detected': dict(self.detected),
+            'elapsed_seconds': round(elapsed, 3),
+            'events_per_second': round(self.events_in / elapsed, 1) if elapsed else 0.0,
+        }
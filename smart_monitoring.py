@@ -1,15 +1,86 @@
+
 import time
 import random
+import threading
+
+from fall_detector import SlidingWindowDetector
+from sensor_pipeline import SensorPipeline, SyntheticSensorSource
+from video_monitor import VideoMonitor
+
+# How long a detected fall keeps `fall_detected` set in the status
+FALL_STATUS_HOLD_SECONDS = 60
 
 class SmartMonitoringSystem:
     def __init__(self):
+        self.pipeline = None
+        self.video_monitor = None
+        self._latest = {}
+        self._lock = threading.Lock()
         print("Smart Monitoring System initialized (simulated mode).")
 
-    def get_monitoring_status(self):
-        """Simulates getting monitoring data."""
-        fall_detected = random.choice([True, False, False, False, False]) # Simulate occasional fall
-        activity_pattern = random.choice(["Low Activity", "Normal Activity", "High Activity"])
-        
+    def start_ingestion(self, source, detector=None, **options):
+        """Streams sensor events from `source` through the detection pipeline in the background."""
+        self.pipeline = SensorPipeline(source, detector or SlidingWindowDetector(), **options)
+        self.pipeline.subscribe(self._on_detected_event)
+        self.pipeline.start()
+        print("Sensor ingestion pipeline started.")
+        return self.pipeline
+
+    def stop_ingestion(self):
+        if self.pipeline is not None:
+            self.pipeline.stop()
+            print(f"Sensor ingestion pipeline stopped: {self.pipeline.stats()}")
+
+    def start_monitoring(self, video_source=0, block=True, report_every=5.0, **options):
+        """Analyzes a camera or video file with adaptive frame skipping.
+
+        Blocks until the source ends (printing metrics every `report_every`
+        seconds) unless `block=False`, in which case it runs in the background.
+        Extra options are passed to VideoMonitor (stride, scale, motion_threshold, ...).
+        """
+        try:
+            self.video_monitor = VideoMonitor(video_source, **options)
+        except RuntimeError as e:
+            print(f"Could not start video monitoring: {e}")
+            return None
+        thread = threading.Thread(target=self.video_monitor.run, name='video-monitor', daemon=True)
+        thread.start()
+        print(f"Video monitoring started on {video_source!r}.")
+        if not block:
+            return self.video_monitor
+        try:
+            while thread.is_alive():
+                thread.join(report_every)
+                print(f"Video monitoring: {self.video_monitor.metrics()}")
+        except KeyboardInterrupt:
+            self.video_monitor.stop()
+            thread.join()
+        return self.video_monitor
+
+    def stop_monitoring(self):
+        if self.video_monitor is not None:
+            self.video_monitor.stop()
+
+    def _on_detected_event(self, event):
+        with self._lock:
+            latest = self._latest.setdefault(event.resident_id, {})
+            latest[event.type] = event
+
+    def get_monitoring_status(self, resident_id=None):
+        """Returns the monitoring status derived from the sensor pipeline, or a simulated one without it."""
+        if self.pipeline is None:
+            fall_detected = random.choice([True, False, False, False, False]) # Simulate occasional fall
+            activity_pattern = random.choice(["Low Activity", "Normal Activity", "High Activity"])
+        else:
+            with self._lock:
+                if resident_id is None and self._latest:
+                    resident_id = next(iter(self._latest))
+                latest = dict(self._latest.get(resident_id, {}))
+            fall = latest.get('fall')
+            fall_detected = fall is not None and time.time() - fall.detected_at < FALL_STATUS_HOLD_SECONDS
+            activity = latest.get('activity_level')
+            activity_pattern = activity.data['activity_pattern'] if activity else "Normal Activity"
+
         status = {
             "fall_detected": fall_detected,
             "activity_pattern": activity_pattern,
@@ -19,8 +90,13 @@ class SmartMonitoringSystem:
 
 if __name__ == "__main__":
     monitor = SmartMonitoringSystem()
-    while True:
-        status = monitor.get_monitoring_status()
-        print(f"Simulated Monitoring Status: {status}")
-        time.sleep(5) # Simulate processing every 5 seconds
-
+    pipeline = monitor.start_ingestion(SyntheticSensorSource(residents=5, duration_seconds=None, realtime=True))
+    pipeline.subscribe(lambda event: print(f"Detected {event.type} for {event.resident_id}: {event.data}"),
+                       types={'fall', 'inactivity'})
+    try:
+        while True:
+            time.sleep(5)
+            status = monitor.get_monitoring_status()
+            print(f"Monitoring Status: {status}")
+    except KeyboardInterrupt:
+        monitor.stop_ingestion()
@@ -0,0 +1,288 @@
+import multiprocessing
+import queue
+import signal
+import threading
+import time
+import traceback
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+
+class BoundedQueue(queue.Queue):
+    """A bounded in-process queue between components.
+
+    `offer()` never blocks: when the consumer is behind, the item is dropped
+    and counted, so a slow component cannot stall the ones feeding it.
+    """
+
+    def __init__(self, name, maxsize=1000):
+        super().__init__(maxsize=maxsize)
+        self.name = name
+        self.offered = 0
+        self.dropped = 0
+
+    def offer(self, item):
+        self.offered += 1
+        try:
+            self.put_nowait(item)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def poll(self, timeout=0.5):
+        """Returns the next item, or None if nothing arrived within `timeout`."""
+        try:
+            return self.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def stats(self):
+        return {'size': self.qsize(), 'maxsize': self.maxsize, 'offered': self.offered, 'dropped': self.dropped}
+
+
+class ComponentContext:
+    """What a running component sees of the supervisor.
+
+    Components loop until `stopping` is set, call `heartbeat()` regularly so the
+    health check knows they are alive, exchange items through `queue(name)` and
+    send CPU-heavy work to the shared process pool with `submit()`.
+    """
+
+    def __init__(self, supervisor, name):
+        self.supervisor = supervisor
+        self.name = name
+        self.stop_event = threading.Event()
+        self.last_heartbeat = time.monotonic()
+
+    @property
+    def stopping(self):
+        return self.stop_event.is_set()
+
+    def heartbeat(self):
+        self.last_heartbeat = time.monotonic()
+
+    def wait(self, seconds):
+        """Sleeps up to `seconds`; returns True if the component should stop."""
+        return self.stop_event.wait(seconds)
+
+    def queue(self, name):
+        return self.supervisor.queue(name)
+
+    def submit(self, fn, *args, **kwargs):
+        return self.supervisor.submit(fn, *args, **kwargs)
+
+
+class _ComponentState:
+    def __init__(self, name, target, restart, heartbeat_timeout):
+        self.name = name
+        self.target = target
+        self.restart = restart
+        self.heartbeat_timeout = heartbeat_timeout
+        self.context = None
+        self.thread = None
+        self.status = 'pending'
+        self.outcome = None
+        self.last_error = None
+        self.restarts = 0
+        self.recent_restarts = deque()
+        self.next_start_at = 0.0
+        self.healthy = True
+
+
+class Supervisor:
+    """Runs platform components concurrently and keeps them running.
+
+    Every component runs on its own thread (they are I/O bound: sensors,
+    audio, HTTP); CPU-heavy work goes to a shared process pool so it runs on
+    other cores. A monitor loop restarts crashed components with exponential
+    backoff (giving up after `max_restarts` within `restart_window` seconds),
+    flags components whose heartbeat is older than `heartbeat_timeout`, and
+    replaces the process pool if a worker dies. `stop()` shuts everything down
+    gracefully; SIGINT/SIGTERM trigger it when `run()` is on the main thread.
+    """
+
+    RESTART_POLICIES = ('on-failure', 'always', 'never')
+
+    def __init__(self, process_workers=None, pool_initializer=None, pool_initargs=(), heartbeat_timeout=30.0,
+                 check_interval=0.5, max_restarts=5, restart_window=60.0, backoff=0.5, max_backoff=10.0,
+                 shutdown_timeout=10.0):
+        self.process_workers = process_workers
+        self.pool_initializer = pool_initializer
+        self.pool_initargs = pool_initargs
+        self.heartbeat_timeout = heartbeat_timeout
+        self.check_interval = check_interval
+        self.max_restarts = max_restarts
+        self.restart_window = restart_window
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.shutdown_timeout = shutdown_timeout
+        self._components = {}
+        self._queues = {}
+        self._queues_lock = threading.Lock()
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self.pool_restarts = 0
+        self._stopping = threading.Event()
+        self.started_at = None
+
+    def add(self, name, target, restart='on-failure', heartbeat_timeout=None):
+        """Registers `target(context)` as a component."""
+        if restart not in self.RESTART_POLICIES:
+            raise ValueError(f"Unknown restart policy: {restart}")
+        self._components[name] = _ComponentState(name, target, restart, heartbeat_timeout or self.heartbeat_timeout)
+
+    def queue(self, name, maxsize=1000):
+        """Returns the named bounded queue, creating it on first use."""
+        # Components starting together must all get the same queue.
+        with self._queues_lock:
+            if name not in self._queues:
+                self._queues[name] = BoundedQueue(name, maxsize)
+            return self._queues[name]
+
+    def submit(self, fn, *args, **kwargs):
+        """Runs `fn(*args)` in the process pool and returns its future."""
+        with self._pool_lock:
+            if self._pool is None:
+                # spawn: forking a process that already runs threads is unsafe
+                self._pool = ProcessPoolExecutor(max_workers=self.process_workers,
+                                                 mp_context=multiprocessing.get_context('spawn'),
+                                                 initializer=self.pool_initializer, initargs=self.pool_initargs)
+            pool = self._pool
+        try:
+            future = pool.submit(fn, *args, **kwargs)
+        except BrokenProcessPool:
+            self._replace_pool(pool)
+            return self.submit(fn, *args, **kwargs)
+        future.add_done_callback(lambda f: self._check_future(f, pool))
+        return future
+
+    def _check_future(self, future, pool):
+        if not future.cancelled() and isinstance(future.exception(), BrokenProcessPool):
+            self._replace_pool(pool)
+
+    def _replace_pool(self, broken):
+        with self._pool_lock:
+            if self._pool is broken:
+                print("Process pool broke (a worker died); starting a new one.")
+                broken.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+                self.pool_restarts += 1
+
+    def _start_component(self, state):
+        state.context = ComponentContext(self, state.name)
+        state.outcome = None
+        state.healthy = True
+        state.thread = threading.Thread(target=self._run_component, args=(state,),
+                                        name=f'component-{state.name}', daemon=True)
+        state.status = 'running'
+        state.thread.start()
+
+    @staticmethod
+    def _run_component(state):
+        try:
+            state.target(state.context)
+            state.outcome = 'finished'
+        except Exception as e:
+            state.outcome = 'crashed'
+            state.last_error = f"{type(e).__name__}: {e}"
+            print(f"Component '{state.name}' crashed:")
+            traceback.print_exc()
+
+    def start(self):
+        self.started_at = time.monotonic()
+        print(f"Supervisor starting {len(self._components)} components: {', '.join(self._components)}")
+        for state in self._components.values():
+            self._start_component(state)
+
+    def check(self):
+        """One pass of health checks and restarts; called periodically by run()."""
+        now = time.monotonic()
+        for state in self._components.values():
+            if state.status == 'running' and not state.thread.is_alive():
+                self._handle_exit(state, now)
+            elif state.status == 'restarting' and now >= state.next_start_at:
+                print(f"Restarting component '{state.name}' (restart #{state.restarts}).")
+                self._start_component(state)
+            if state.status == 'running':
+                healthy = now - state.context.last_heartbeat <= state.heartbeat_timeout
+                if state.healthy and not healthy:
+                    print(f"Component '{state.name}' missed its heartbeat for {state.heartbeat_timeout:.0f}s.")
+                state.healthy = healthy
+
+    def _handle_exit(self, state, now):
+        crashed = state.outcome != 'finished'
+        if self._stopping.is_set() or state.restart == 'never' or (state.restart == 'on-failure' and not crashed):
+            state.status = 'crashed' if crashed else 'finished'
+            return
+        while state.recent_restarts and now - state.recent_restarts[0] > self.restart_window:
+            state.recent_restarts.popleft()
+        if len(state.recent_restarts) >= self.max_restarts:
+            state.status = 'failed'
+            print(f"Component '{state.name}' failed {self.max_restarts} times in {self.restart_window:.0f}s; giving up.")
+            return
+        delay = min(self.max_backoff, self.backoff * 2 ** len(state.recent_restarts))
+        state.recent_restarts.append(now)
+        state.restarts += 1
+        state.status = 'restarting'
+        state.next_start_at = now + delay
+
+    def run(self, duration=None):
+        """Starts the components and supervises them until stop(), a signal or `duration` seconds."""
+        previous_handlers = {}
+        if threading.current_thread() is threading.main_thread():
+            for signum in (signal.SIGINT, signal.SIGTERM):
+                previous_handlers[signum] = signal.signal(signum, lambda *_: self._stopping.set())
+        try:
+            self.start()
+            deadline = None if duration is None else time.monotonic() + duration
+            while not self._stopping.wait(self.check_interval):
+                self.check()
+                if deadline is not None and time.monotonic() >= deadline:
+                    break
+                if all(state.status in ('finished', 'crashed', 'failed') for state in self._components.values()):
+                    break
+        finally:
+            self.stop()
+            for signum, handler in previous_handlers.items():
+                signal.signal(signum, handler)
+
+    def stop(self):
+        """Asks every component to stop, waits for them, then shuts the process pool down."""
+        self._stopping.set()
+        for state in self._components.values():
+            if state.context:
+                state.context.stop_event.set()
+        deadline = time.monotonic() + self.shutdown_timeout
+        for state in self._components.values():
+            if state.thread and state.thread.is_alive():
+                state.thread.join(max(0.0, deadline - time.monotonic()))
+                if state.thread.is_alive():
+                    print(f"Component '{state.name}' did not stop within {self.shutdown_timeout:.0f}s.")
+                    continue
+            if state.status in ('running', 'restarting'):
+                state.status = 'stopped'
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=True, cancel_futures=True)
+                self._pool = None
+        print("Supervisor stopped.")
+
+    def status(self):
+        now = time.monotonic()
+        return {
+            'uptime_seconds': round(now - self.started_at, 1) if self.started_at else 0.0,
+            'components': {
+                name: {
+                    'status': state.status,
+                    'healthy': state.healthy,
+                    'restarts': state.restarts,
+                    'last_error': state.last_error,
+                    'heartbeat_age_seconds': round(now - state.context.last_heartbeat, 2) if state.context else None,
+                }
+                for name, state in self._components.items()
+            },
+            'queues': {name: q.stats() for name, q in self._queues.items()},
+            'pool_restarts': self.pool_restarts,
+        }
@@ -0,0 +1,211 @@
+import hashlib
+import json
+import multiprocessing
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# Bump when the generated distribution or the on-disk layout changes.
+GENERATOR_VERSION = 1
+DEFAULT_CHUNK_ROWS = 100_000
+
+# Categories are kept in sorted order so one-hot encoding (drop_first) gives the
+# same feature columns as the original object-dtype data did.
+ACTIVITY_LEVELS = ('high', 'low', 'medium')
+ACTIVITIES = ('light_yoga', 'reading', 'social_games', 'stretching', 'walking')
+CATEGORIES = {'daily_activity_level': ACTIVITY_LEVELS, 'recommended_activity': ACTIVITIES}
+# Column name -> dtype stored on disk (categorical columns as codes into CATEGORIES)
+COLUMNS = {
+    'age': np.int16,
+    'sleep_hours': np.float32,
+    'daily_activity_level': np.uint8,
+    'heart_rate': np.int16,
+    'medication_adherence': np.float32,
+    'fall_risk_score': np.float32,
+    'recommended_activity': np.uint8,
+}
+
+_HIGH_RISK = np.array([ACTIVITIES.index('stretching'), ACTIVITIES.index('reading')], dtype=np.uint8)
+_LOW_RISK = np.array([ACTIVITIES.index(a) for a in ('walking', 'light_yoga', 'social_games')], dtype=np.uint8)
+
+
+def chunk_rng(seed, index):
+    """The Generator for chunk `index`: independent of every other chunk, whichever process draws it."""
+    return np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(index,)))
+
+
+def generate_columns(rows, rng):
+    """Draws `rows` simulated residents as a dict of column arrays (categoricals as codes)."""
+    columns = {
+        'age': rng.integers(65, 95, rows, dtype=np.int16),
+        'sleep_hours': rng.uniform(4, 10, rows).round(1).astype(np.float32),
+        'daily_activity_level': rng.integers(0, len(ACTIVITY_LEVELS), rows, dtype=np.uint8),
+        'heart_rate': rng.integers(60, 100, rows, dtype=np.int16),
+        'medication_adherence': rng.uniform(0.5, 1.0, rows).round(2).astype(np.float32),
+        'recommended_activity': rng.integers(0, len(ACTIVITIES), rows, dtype=np.uint8),
+    }
+
+    # Introduce some correlation for fall risk and recommendations
+    fall_risk = rng.uniform(0, 1, rows).round(2)
+    fall_risk += 0.2 * (columns['sleep_hours'] < 6)
+    fall_risk += 0.3 * (columns['daily_activity_level'] == ACTIVITY_LEVELS.index('low'))
+    columns['fall_risk_score'] = np.clip(fall_risk, 0, 1).round(2).astype(np.float32)
+
+    # Adjust recommendations based on fall risk
+    high_risk = columns['fall_risk_score'] > 0.7
+    columns['recommended_activity'][high_risk] = rng.choice(_HIGH_RISK, high_risk.sum())
+    low_risk = columns['fall_risk_score'] < 0.3
+    columns['recommended_activity'][low_risk] = rng.choice(_LOW_RISK, low_risk.sum())
+    return {name: columns[name] for name in COLUMNS}
+
+
+def to_frame(columns):
+    """Builds a DataFrame from column arrays, turning category codes into pandas Categoricals."""
+    frame = {}
+    for name, values in columns.items():
+        if name in CATEGORIES:
+            values = pd.Categorical.from_codes(values, categories=CATEGORIES[name])
+        frame[name] = values
+    return pd.DataFrame(frame)
+
+
+def iter_chunks(rows, chunk_rows=DEFAULT_CHUNK_ROWS, seed=42):
+    """Yields `rows` simulated residents as DataFrames of at most `chunk_rows` rows."""
+    for index, start in enumerate(range(0, rows, chunk_rows)):
+        yield to_frame(generate_columns(min(chunk_rows, rows - start), chunk_rng(seed, index)))
+
+
+def simulated_health_data(rows=1000, seed=42, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Returns `rows` simulated residents in one DataFrame (for data that fits in memory)."""
+    return pd.concat(iter_chunks(rows, chunk_rows, seed), ignore_index=True)
+
+
+def _write_chunks(root, seed, chunk_rows, rows, indexes):
+    for index in indexes:
+        start = index * chunk_rows
+        columns = generate_columns(min(chunk_rows, rows - start), chunk_rng(seed, index))
+        chunk_dir = os.path.join(root, SyntheticDataset.chunk_name(index))
+        os.makedirs(chunk_dir, exist_ok=True)
+        for name, values in columns.items():
+            np.save(os.path.join(chunk_dir, f'{name}.npy'), values)
+    return len(indexes)
+
+
+def write_dataset(path, rows, chunk_rows=DEFAULT_CHUNK_ROWS, seed=42, workers=1):
+    """Generates `rows` residents into a columnar dataset directory and returns it opened.
+
+    Chunks are generated and written one at a time, so memory stays bounded by
+    the chunk size. With workers > 1 the chunks are split across processes;
+    the result is identical because every chunk has its own seed. The
+    directory only appears once it is complete.
+    """
+    parent = os.path.dirname(os.path.abspath(path))
+    os.makedirs(parent, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix='.staging-', dir=parent)
+    num_chunks = -(-rows // chunk_rows)
+    try:
+        if workers > 1 and num_chunks > 1:
+            # spawn: forking a process that already runs threads is unsafe
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+                parts = [list(range(i, num_chunks, workers)) for i in range(workers)]
+                for future in [pool.submit(_write_chunks, staging, seed, chunk_rows, rows, part) for part in parts]:
+                    future.result()
+        else:
+            _write_chunks(staging, seed, chunk_rows, rows, range(num_chunks))
+        meta = {
+            'generator_version': GENERATOR_VERSION,
+            'rows': rows,
+            'chunk_rows': chunk_rows,
+            'seed': seed,
+            'columns': {name: np.dtype(dtype).name for name, dtype in COLUMNS.items()},
+            'categories': {name: list(values) for name, values in CATEGORIES.items()},
+        }
+        with open(os.path.join(staging, SyntheticDataset.META_FILE), 'w', encoding='utf-8') as f:
+            json.dump(meta, f, indent=2)
+        if os.path.exists(path):
+            shutil.rmtree(path)
+        os.replace(staging, path)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    return SyntheticDataset(path)
+
+
+class SyntheticDataset:
+    """A columnar dataset written by write_dataset: one .npy file per column per chunk.
+
+    Chunks are memory-mapped on read, so iterating over a dataset of any size
+    holds roughly one chunk in memory. fit_recommendation_model accepts a
+    dataset directly and trains on it chunk by chunk.
+    """
+
+    META_FILE = 'dataset.json'
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, self.META_FILE), 'r', encoding='utf-8') as f:
+            self.meta = json.load(f)
+        self.rows = self.meta['rows']
+        self.chunk_rows = self.meta['chunk_rows']
+        self.num_chunks = -(-self.rows // self.chunk_rows)
+        self._value_counts = {}
+
+    @staticmethod
+    def chunk_name(index):
+        return f'chunk-{index:06d}'
+
+    def __len__(self):
+        return self.rows
+
+    @property
+    def fingerprint(self):
+        """Identifies the generated content: the same parameters always produce the same rows."""
+        return hashlib.sha256(json.dumps(self.meta, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def chunk_columns(self, index, columns=None, mmap=True):
+        chunk_dir = os.path.join(self.path, self.chunk_name(index))
+        return {name: np.load(os.path.join(chunk_dir, f'{name}.npy'), mmap_mode='r' if mmap else None)
+                for name in (columns or COLUMNS)}
+
+    def chunk(self, index, columns=None):
+        """Returns one chunk as a DataFrame."""
+        return to_frame(self.chunk_columns(index, columns))
+
+    def iter_chunks(self, columns=None):
+        for index in range(self.num_chunks):
+            yield self.chunk(index, columns)
+
+    def value_counts(self, column):
+        """Counts of each category of a categorical column over the whole dataset, by category name."""
+        counts = self._value_counts.get(column)
+        if counts is None:
+            categories = CATEGORIES[column]
+            total = np.zeros(len(categories), dtype=np.int64)
+            for index in range(self.num_chunks):
+                total += np.bincount(self.chunk_columns(index, [column])[column], minlength=len(categories))
+            counts = self._value_counts[column] = pd.Series(total, index=list(categories), name='count')
+        return counts
+
+    def to_frame(self):
+        """Loads the whole dataset into one DataFrame (only for datasets that fit in memory)."""
+        return pd.concat(self.iter_chunks(), ignore_index=True)
+
+
+if __name__ == '__main__':
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description='Write a simulated resident dataset for training and load tests.')
+    parser.add_argument('path')
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--chunk-rows', type=int, default=DEFAULT_CHUNK_ROWS)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    args = parser.parse_args()
+    start = time.perf_counter()
+    dataset = write_dataset(args.path, args.rows, args.chunk_rows, args.seed, args.workers)
+    print(f'Wrote {len(dataset)} rows in {dataset.num_chunks} chunks to {args.path} in {time.perf_counter() - start:.1f}s.')
@@ -0,0 +1,236 @@
+import hashlib
+import io
+import mmap
+import os
+import string
+import sys
+import tempfile
+import threading
+import time
+import wave
+from collections import OrderedDict
+
+import numpy as np
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    "VOICE_AUDIO_CACHE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "audio_cache"),
+)
+
+_FORMATTER = string.Formatter()
+
+
+def template_parts(template):
+    """Splits a response template into its static text and `{field}` parts.
+
+    Returns a list of ('text', literal) and ('field', (name, conversion, format_spec)) tuples.
+    """
+    parts = []
+    for literal, field, format_spec, conversion in _FORMATTER.parse(template):
+        if literal:
+            parts.append(('text', literal))
+        if field is not None:
+            parts.append(('field', (field, conversion, format_spec)))
+    return parts
+
+
+class StubSynthesizer:
+    """Offline stand-in for a text-to-speech engine.
+
+    Produces deterministic 16-bit mono PCM: one short tone per character, its
+    pitch derived from the code point, and silence for whitespace. Real engines
+    take time roughly proportional to the audio they produce; `realtime_factor`
+    (synthesis seconds per audio second) makes the stub sleep accordingly so the
+    cost of synthesizing can be measured without a real engine.
+    """
+
+    def __init__(self, sample_rate=16000, char_seconds=0.06, realtime_factor=0.0):
+        self.sample_rate = sample_rate
+        self.char_seconds = char_seconds
+        self.realtime_factor = realtime_factor
+        # Part of every cache key: audio from different voices or settings never mixes.
+        self.voice = f"stub-{sample_rate}-{char_seconds}"
+
+    def synthesize(self, text):
+        """Returns the PCM bytes for `text`."""
+        samples_per_char = int(self.sample_rate * self.char_seconds)
+        codes = np.array([ord(c) for c in text], dtype=np.float64)
+        frequencies = np.where([c.isspace() for c in text], 0.0, 180.0 + (codes % 48) * 12.0)
+        t = np.arange(samples_per_char) / self.sample_rate
+        envelope = np.hanning(samples_per_char)
+        tones = np.sin(2 * np.pi * frequencies[:, None] * t) * envelope * 0.3
+        pcm = (tones.ravel() * 32767).astype('<i2').tobytes()
+        if self.realtime_factor:
+            time.sleep(len(text) * self.char_seconds * self.realtime_factor)
+        return pcm
+
+
+class AudioClip:
+    """A spoken reply as a sequence of PCM segments (memory maps or bytes), played back to back."""
+
+    def __init__(self, segments, sample_rate):
+        self.segments = segments
+        self.sample_rate = sample_rate
+
+    @property
+    def nbytes(self):
+        return sum(len(segment) for segment in self.segments)
+
+    @property
+    def duration(self):
+        return self.nbytes / 2 / self.sample_rate
+
+    def to_wav(self):
+        """Returns the clip as a WAV file in memory."""
+        buffer = io.BytesIO()
+        with wave.open(buffer, 'wb') as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(self.sample_rate)
+            for segment in self.segments:
+                wav.writeframes(segment)
+        return buffer.getvalue()
+
+
+class AudioCache:
+    """Content-addressed on-disk store of synthesized phrases.
+
+    Each phrase is stored once as raw PCM under the SHA-256 of the voice and
+    the text, so the store can be filled at build time or startup with
+    `prerender()` and shared between processes. Stored phrases are served from
+    read-only memory maps, never synthesized again. `render()` splits a
+    response template so only its `{field}` values (such as the time) are
+    synthesized on demand; those are kept in a small in-memory LRU.
+    """
+
+    SUFFIX = ".pcm"
+
+    def __init__(self, synthesizer=None, root=DEFAULT_CACHE_DIR, dynamic_cache_size=256):
+        self.synthesizer = synthesizer or StubSynthesizer()
+        self.root = root
+        self.dynamic_cache_size = dynamic_cache_size
+        self._maps = {}
+        self._dynamic = OrderedDict()
+        # Reentrant: segment() synthesizes misses while holding it.
+        self._lock = threading.RLock()
+        self.mapped_hits = 0
+        self.disk_loads = 0
+        self.static_synthesized = 0
+        self.dynamic_hits = 0
+        self.dynamic_synthesized = 0
+        self.synthesis_seconds = 0.0
+
+    def key(self, text):
+        """Returns the content address of `text` spoken by this cache's voice."""
+        return hashlib.sha256(f"{self.synthesizer.voice}\0{text}".encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.root, key[:2], key + self.SUFFIX)
+
+    def _synthesize(self, text):
+        started = time.perf_counter()
+        pcm = self.synthesizer.synthesize(text)
+        with self._lock:
+            self.synthesis_seconds += time.perf_counter() - started
+        return pcm
+
+    def _store(self, key, pcm):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, staging = tempfile.mkstemp(prefix=".staging-", dir=os.path.dirname(path))
+        with os.fdopen(fd, "wb") as f:
+            f.write(pcm)
+        # Same content under the same name, so concurrent writers cannot corrupt it.
+        os.replace(staging, path)
+
+    def prerender(self, phrases):
+        """Synthesizes and stores every phrase not already on disk; returns how many were rendered."""
+        rendered = 0
+        for text in dict.fromkeys(phrases):
+            key = self.key(text)
+            if text and not os.path.exists(self._path(key)):
+                self._store(key, self._synthesize(text))
+                rendered += 1
+        with self._lock:
+            self.static_synthesized += rendered
+        return rendered
+
+    def segment(self, text):
+        """Returns the stored audio for a static phrase, synthesizing and storing it on a miss."""
+        key = self.key(text)
+        with self._lock:
+            mapped = self._maps.get(key)
+            if mapped is not None:
+                self.mapped_hits += 1
+                return mapped
+            path = self._path(key)
+            if os.path.exists(path):
+                self.disk_loads += 1
+            else:
+                self._store(key, self._synthesize(text))
+                self.static_synthesized += 1
+            with open(path, "rb") as f:
+                mapped = self._maps[key] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            return mapped
+
+    def dynamic(self, text):
+        """Returns audio for a value that changes between replies, synthesized on demand."""
+        with self._lock:
+            pcm = self._dynamic.get(text)
+            if pcm is not None:
+                self._dynamic.move_to_end(text)
+                self.dynamic_hits += 1
+                return pcm
+        pcm = self._synthesize(text)
+        with self._lock:
+            self.dynamic_synthesized += 1
+            self._dynamic[text] = pcm
+            while len(self._dynamic) > self.dynamic_cache_size:
+                self._dynamic.popitem(last=False)
+        return pcm
+
+    def phrase(self, text):
+        """Returns an AudioClip for fixed text, spoken as one static phrase."""
+        return AudioClip([self.segment(text)] if text else [], self.synthesizer.sample_rate)
+
+    def render(self, template, **values):
+        """Returns an AudioClip for the template filled in with `values`."""
+        segments = []
+        for kind, part in template_parts(template):
+            if kind == 'text':
+                segments.append(self.segment(part))
+                continue
+            name, conversion, format_spec = part
+            value = _FORMATTER.convert_field(values[name], conversion)
+            text = _FORMATTER.format_field(value, format_spec)
+            if text:
+                segments.append(self.dynamic(text))
+        return AudioClip(segments, self.synthesizer.sample_rate)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'mapped_phrases': len(self._maps),
+                'mapped_hits': self.mapped_hits,
+                'disk_loads': self.disk_loads,
+                'static_synthesized': self.static_synthesized,
+                'dynamic_hits': self.dynamic_hits,
+                'dynamic_synthesized': self.dynamic_synthesized,
+                'synthesis_seconds': round(self.synthesis_seconds, 3)
+            }
+
+    def close(self):
+        with self._lock:
+            for mapped in self._maps.values():
+                mapped.close()
+            self._maps.clear()
+
+
+if __name__ == "__main__":
+    # Build step: python tts_cache.py [cache directory]
+    from voice_assistant import static_phrases
+
+    cache = AudioCache(root=sys.argv[1] if len(sys.argv) > 1 else DEFAULT_CACHE_DIR)
+    started = time.perf_counter()
+    rendered = cache.prerender(static_phrases())
+    print(f"Pre-rendered {rendered} phrases into {cache.root} in {time.perf_counter() - started:.2f}s.")
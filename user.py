@@ -1,12 +1,135 @@
+import base64
+import binascii
+import json
+import threading
+from urllib.parse import urlencode
+
 from flask import Blueprint, jsonify, request
+from sqlalchemy import Index, inspect, tuple_
 from src.models.user import User, db
 
 user_bp = Blueprint('user', __name__)
 
+USERS_PAGE_SIZE = 100
+USERS_MAX_PAGE_SIZE = 1000
+# Keyset orderings: each ends with the primary key so the sort is total.
+USER_ORDERINGS = {
+    'id': ('id',),
+    'username': ('username', 'id'),
+}
+USER_FILTERS = ('username', 'email')
+LOOKUP_COLUMNS = ('username', 'email')
+
+_indexes_checked = False
+_indexes_lock = threading.Lock()
+
+def ensure_user_indexes(engine=None):
+    """Creates an index on username and on email unless the table already has one leading with that column.
+
+    Unique constraints count: most databases back them with an index already.
+    """
+    engine = engine or db.engine
+    table = User.__table__
+    inspector = inspect(engine)
+    if not inspector.has_table(table.name):
+        return []
+    leading = {index['column_names'][0] for index in inspector.get_indexes(table.name) if index['column_names']}
+    leading |= {constraint['column_names'][0] for constraint in inspector.get_unique_constraints(table.name)}
+    created = []
+    for column in LOOKUP_COLUMNS:
+        if column not in leading:
+            Index(f'ix_{table.name}_{column}', table.c[column]).create(engine, checkfirst=True)
+            created.append(column)
+    return created
+
+def _check_indexes():
+    global _indexes_checked
+    if not _indexes_checked:
+        with _indexes_lock:
+            if not _indexes_checked:
+                ensure_user_indexes()
+                _indexes_checked = True
+
+def encode_cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor, keys):
+    """Returns the key values encoded in a cursor, or None if it is malformed.
+
+    Each value must be a scalar of its sort column's Python type.
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+    if not isinstance(values, list) or len(values) != len(keys):
+        return None
+    for value, key in zip(values, keys):
+        expected = key.type.python_type
+        if isinstance(value, bool) and expected is not bool or not isinstance(value, expected):
+            return None
+    return values
+
+def conditional(response):
+    """Adds an ETag for the body and answers 304 when the client already has it."""
+    response.add_etag()
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
+
 @user_bp.route('/users', methods=['GET'])
 def get_users():
-    users = User.query.all()
-    return jsonify([user.to_dict() for user in users])
+    """Lists users one page at a time.
+
+    ?limit= page size, ?cursor= from the previous page's Link / X-Next-Cursor
+    header, ?order=id|username, ?fields=id,username to return only those
+    columns, ?username= / ?email= for exact lookups.
+    """
+    _check_indexes()
+    columns = User.__table__.c
+
+    fields = None
+    if request.args.get('fields'):
+        fields = list(dict.fromkeys(f.strip() for f in request.args['fields'].split(',') if f.strip()))
+        unknown = [f for f in fields if f not in columns]
+        if unknown:
+            return jsonify({'error': f"Unknown fields: {', '.join(unknown)}"}), 400
+
+    order = request.args.get('order', 'id')
+    if order not in USER_ORDERINGS:
+        return jsonify({'error': f"order must be one of: {', '.join(USER_ORDERINGS)}"}), 400
+    keys = [columns[name] for name in USER_ORDERINGS[order]]
+    limit = min(max(request.args.get('limit', USERS_PAGE_SIZE, type=int), 1), USERS_MAX_PAGE_SIZE)
+
+    if fields:
+        # Only the requested columns (plus the sort keys) are loaded, not whole User objects.
+        query = db.session.query(*[columns[name] for name in dict.fromkeys(fields + list(USER_ORDERINGS[order]))])
+    else:
+        query = User.query
+    for name in USER_FILTERS:
+        if name in request.args:
+            query = query.filter(columns[name] == request.args[name])
+
+    cursor = request.args.get('cursor')
+    if cursor:
+        after = decode_cursor(cursor, keys)
+        if after is None:
+            return jsonify({'error': 'Invalid cursor'}), 400
+        query = query.filter(tuple_(*keys) > tuple_(*after))
+
+    rows = query.order_by(*keys).limit(limit + 1).all()
+    page = rows[:limit]
+    if fields:
+        body = [{name: getattr(row, name) for name in fields} for row in page]
+    else:
+        body = [user.to_dict() for user in page]
+
+    response = jsonify(body)
+    if len(rows) > limit:
+        next_cursor = encode_cursor([getattr(page[-1], key.name) for key in keys])
+        args = dict(request.args.items(), cursor=next_cursor)
+        response.headers['Link'] = f'<{request.path}?{urlencode(args)}>; rel="next"'
+        response.headers['X-Next-Cursor'] = next_cursor
+    return conditional(response)
 
 @user_bp.route('/users', methods=['POST'])
 def create_user():
@@ -20,7 +143,7 @@ def create_user():
 @user_bp.route('/users/<int:user_id>', methods=['GET'])
 def get_user(user_id):
     user = User.query.get_or_404(user_id)
-    return jsonify(user.to_dict())
+    return conditional(jsonify(user.to_dict()))
 
 @user_bp.route('/users/<int:user_id>', methods=['PUT'])
 def update_user(user_id):
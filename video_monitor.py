@@ -0,0 +1,253 @@
+import queue
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+try:
+    import cv2
+except ImportError:  # OpenCV is optional: .npy clips still work without it
+    cv2 = None
+
+
+def open_video(source, fps=None):
+    """Returns (frames iterator, fps) for a camera index, a video file, or a `.npy` clip of shape (N, H, W[, 3]).
+
+    `fps` overrides the source's frame rate; `.npy` clips default to 15.
+    """
+    if isinstance(source, str) and source.endswith('.npy'):
+        clip = np.load(source, mmap_mode='r')
+        return iter(clip), fps or 15.0
+    if cv2 is None:
+        raise RuntimeError("OpenCV (cv2) is required for camera and video-file sources.")
+    capture = cv2.VideoCapture(source)
+    if not capture.isOpened():
+        raise RuntimeError(f"Could not open video source: {source}")
+    fps = fps or capture.get(cv2.CAP_PROP_FPS) or 15.0
+
+    def frames():
+        try:
+            while True:
+                ok, frame = capture.read()
+                if not ok:
+                    break
+                yield frame
+        finally:
+            capture.release()
+
+    return frames(), fps
+
+
+def write_synthetic_video(path, frames=300, size=(240, 320), fps=15, motion_spans=((100, 160),), seed=None):
+    """Writes a test clip: a noisy static scene with a moving blob during `motion_spans` (frame ranges).
+
+    `.npy` paths need only NumPy; other extensions are encoded with OpenCV.
+    """
+    rng = np.random.default_rng(seed)
+    height, width = size
+    background = rng.integers(40, 80, size, dtype=np.uint8)
+    clip = np.empty((frames, height, width), dtype=np.uint8)
+    for i in range(frames):
+        frame = background + rng.integers(0, 4, size, dtype=np.uint8)
+        for start, stop in motion_spans:
+            if start <= i < stop:
+                x = int((i - start) / max(1, stop - start - 1) * (width - 40))
+                frame[height // 3:height // 3 + 40, x:x + 40] = 220
+        clip[i] = frame
+
+    if path.endswith('.npy'):
+        np.save(path, clip)
+        return path
+    if cv2 is None:
+        raise RuntimeError("OpenCV (cv2) is required to encode video files; use a .npy path instead.")
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), fps, (width, height))
+    for frame in clip:
+        writer.write(cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR))
+    writer.release()
+    return path
+
+
+def downscale(frame, factor):
+    """Single-channel frame reduced by an integer factor.
+
+    Plain subsampling, with the green channel standing in for luma, is cheap
+    and good enough for frame differencing.
+    """
+    if frame.ndim == 3:
+        frame = frame[::factor, ::factor, 1]
+    else:
+        frame = frame[::factor, ::factor]
+    return np.ascontiguousarray(frame)
+
+
+class VideoFrameReader:
+    """Decodes frames on a background thread into a small bounded queue.
+
+    When the analyzer falls behind, the oldest queued frame is dropped to make
+    room, so analysis always works on recent frames instead of an ever-growing
+    backlog. With `realtime=True` file sources are paced at their frame rate.
+    """
+
+    def __init__(self, source, max_queue=4, realtime=True, fps=None):
+        self.frames, self.fps = open_video(source, fps)
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.realtime = realtime
+        self.frames_in = 0
+        self.frames_dropped = 0
+        self.finished = threading.Event()
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name='video-reader', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped = True
+        self._thread.join(5.0)
+
+    def _run(self):
+        started = time.monotonic()
+        try:
+            for index, frame in enumerate(self.frames):
+                if self._stopped:
+                    break
+                if self.realtime:
+                    delay = started + index / self.fps - time.monotonic()
+                    if delay > 0:
+                        time.sleep(delay)
+                item = (index, time.monotonic(), frame)
+                self.frames_in += 1
+                while True:
+                    try:
+                        self.queue.put_nowait(item)
+                        break
+                    except queue.Full:
+                        try:
+                            self.queue.get_nowait()
+                            self.frames_dropped += 1
+                        except queue.Empty:
+                            pass
+        finally:
+            self.finished.set()
+
+    def get(self, timeout=0.1):
+        """Returns the next (index, captured_at, frame), or None if nothing is queued."""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class VideoMonitor:
+    """Adaptive motion analysis over a video source.
+
+    Frames are downscaled by `scale` and only every `stride`-th frame is
+    analyzed while the scene is quiet. When the motion score (the fraction of
+    pixels that changed by more than `pixel_threshold` since the previous
+    analyzed frame) exceeds `motion_threshold`, the monitor escalates to
+    analyzing every frame for `escalation_seconds` of video.
+    Escalated frames are also passed to `analyzer(frame, small_frame)`, the hook
+    for an expensive stage such as pose estimation. Frames that waited longer
+    than `max_lag_seconds` in the queue are skipped as stale.
+    """
+
+    def __init__(self, source, stride=5, scale=4, motion_threshold=0.005, pixel_threshold=25, escalation_seconds=2.0,
+                 max_queue=4, max_lag_seconds=0.5, realtime=True, fps=None, analyzer=None, on_motion=None):
+        self.reader = VideoFrameReader(source, max_queue=max_queue, realtime=realtime, fps=fps)
+        self.stride = stride
+        self.scale = scale
+        self.motion_threshold = motion_threshold
+        self.pixel_threshold = pixel_threshold
+        self.escalation_frames = max(1, int(escalation_seconds * self.reader.fps))
+        self.max_lag_seconds = max_lag_seconds
+        self.analyzer = analyzer
+        self.on_motion = on_motion
+        # Frame index up to which every frame is analyzed
+        self.escalated_until = -1
+        self._last_index = -1
+        self.frames_analyzed = 0
+        self.frames_skipped = 0
+        self.frames_stale = 0
+        self.escalations = 0
+        self.motion_frames = 0
+        self.last_motion_score = 0.0
+        self.last_motion_at = None
+        self._previous = None
+        self._lags = deque(maxlen=500)
+        self._stopped = threading.Event()
+        self.started_at = None
+
+    @property
+    def escalated(self):
+        return self._last_index < self.escalated_until
+
+    def stop(self):
+        self._stopped.set()
+
+    def run(self):
+        """Processes frames until the source ends or stop() is called."""
+        self.started_at = time.monotonic()
+        self.reader.start()
+        try:
+            while not self._stopped.is_set():
+                item = self.reader.get()
+                if item is None:
+                    if self.reader.finished.is_set() and self.reader.queue.empty():
+                        break
+                    continue
+                self._process(*item)
+        finally:
+            self.reader.stop()
+
+    def _process(self, index, captured_at, frame):
+        self._last_index = index
+        if time.monotonic() - captured_at > self.max_lag_seconds:
+            self.frames_stale += 1
+            return
+        escalated = index < self.escalated_until
+        if not escalated and index % self.stride:
+            self.frames_skipped += 1
+            return
+
+        small = downscale(frame, self.scale)
+        if self._previous is None or self._previous.shape != small.shape:
+            score = 0.0
+        else:
+            changed = np.abs(small.astype(np.int16) - self._previous) > self.pixel_threshold
+            score = float(changed.mean())
+        self._previous = small
+        self.last_motion_score = score
+
+        if score > self.motion_threshold:
+            self.motion_frames += 1
+            self.last_motion_at = time.time()
+            if not escalated:
+                self.escalations += 1
+            self.escalated_until = index + self.escalation_frames
+            escalated = True
+            if self.on_motion:
+                self.on_motion(index, score)
+        if escalated and self.analyzer:
+            self.analyzer(frame, small)
+
+        self.frames_analyzed += 1
+        self._lags.append(time.monotonic() - captured_at)
+
+    def metrics(self):
+        lags = sorted(self._lags)
+        elapsed = time.monotonic() - self.started_at if self.started_at else 0.0
+        return {
+            'frames_in': self.reader.frames_in,
+            'frames_dropped': self.reader.frames_dropped,
+            'frames_stale': self.frames_stale,
+            'frames_skipped': self.frames_skipped,
+            'frames_analyzed': self.frames_analyzed,
+            'motion_frames': self.motion_frames,
+            'escalations': self.escalations,
+            'mode': 'escalated' if self.escalated else 'idle',
+            'lag_p50_ms': round(lags[len(lags) // 2] * 1e3, 1) if lags else 0.0,
+            'lag_max_ms': round(lags[-1] * 1e3, 1) if lags else 0.0,
+            'analyzed_fps': round(self.frames_analyzed / elapsed, 1) if elapsed else 0.0,
+        }
@@ -0,0 +1,218 @@
+import time
+
+import numpy as np
+
+from sensor_pipeline import DetectedEvent
+
+DAY_SECONDS = 86400
+
+# Per-metric settings. Counts are in samples: heart rate arrives about once a second,
+# activity with each monitoring snapshot (seconds to minutes apart), sleep once a night.
+#   seasons      time-of-day slots in the baseline (24: hour of day; 1: no daily rhythm)
+#   alpha        EWMA weight of a slot's baseline mean and of the residual variance
+#   warmup       samples a slot needs before samples falling in it are scored
+#   min_std      floor for the residual standard deviation
+#   smoothing    EWMA weight of the smoothed residual that is scored (1.0: every sample on its own)
+#   clip_z       residuals beyond clip_z * std are clipped in the smoothed residual and not learned
+#                (with smoothing 1.0 this caps |z|, so keep it above enter_z)
+#   enter_z/exit_z  hysteresis band on |z|
+#   enter_count  consecutive samples at or beyond enter_z (same direction) that raise an alert
+#   exit_count   consecutive samples within exit_z that clear it
+DEFAULT_METRICS = {
+    'heart_rate': {'seasons': 24, 'alpha': 0.001, 'warmup': 600, 'min_std': 2.0, 'smoothing': 0.05,
+                   'clip_z': 4.0, 'enter_z': 5.0, 'exit_z': 2.0, 'enter_count': 10, 'exit_count': 120},
+    'activity': {'seasons': 24, 'alpha': 0.05, 'warmup': 30, 'min_std': 0.01, 'smoothing': 0.3,
+                 'clip_z': 4.0, 'enter_z': 4.0, 'exit_z': 1.5, 'enter_count': 5, 'exit_count': 30},
+    'sleep_hours': {'seasons': 1, 'alpha': 0.2, 'warmup': 5, 'min_std': 0.5, 'smoothing': 1.0,
+                    'clip_z': 10.0, 'enter_z': 2.5, 'exit_z': 1.0, 'enter_count': 2, 'exit_count': 2},
+}
+
+
+class _MetricState:
+    """Per-resident baseline and hysteresis arrays for one metric, indexed by resident code."""
+
+    def __init__(self, config, size):
+        self.config = config
+        self.profile = np.full((size, config['seasons']), np.nan)
+        self.slot_count = np.zeros((size, config['seasons']), dtype=np.int64)
+        self.var = np.zeros(size)
+        self.count = np.zeros(size, dtype=np.int64)
+        self.smooth = np.zeros(size)
+        self.active = np.zeros(size, dtype=bool)
+        self.streak = np.zeros(size, dtype=np.int64)
+        self.direction = np.zeros(size, dtype=np.int8)
+        self.onset = np.full(size, np.nan)
+        self.peak_z = np.zeros(size)
+
+    def grow(self, size):
+        for name, array in vars(self).items():
+            if isinstance(array, np.ndarray):
+                fill = np.nan if name in ('profile', 'onset') else 0
+                grown = np.full((size,) + array.shape[1:], fill, dtype=array.dtype)
+                grown[:len(array)] = array
+                setattr(self, name, grown)
+
+
+class VitalsAnomalyDetector:
+    """Online anomaly detection on vital-sign streams, vectorized across residents.
+
+    For every metric and resident the detector keeps a daily profile (an EWMA
+    of the value in each time-of-day slot, read between slot centres by linear
+    interpolation) and an EWM variance of the residual against it. Residuals
+    are scored the way an EWMA control chart does: a smoothed residual against
+    its own standard deviation, which catches a slow drift long before any
+    single sample looks unusual, while clipping keeps isolated spikes from
+    moving it much. Each sample costs O(1); samples that are clipped or arrive
+    during an alert are not learned, so an anomaly does not become the baseline.
+
+    Alerts use hysteresis: `enter_count` consecutive samples beyond `enter_z`
+    in the same direction raise one 'health_change' event, and the episode
+    only ends, with a 'health_recovered' event, after `exit_count` consecutive
+    samples back within `exit_z`. A resident therefore gets one alert per
+    episode, however noisy the signal is around the thresholds.
+    """
+
+    def __init__(self, metrics=None):
+        self.metrics = {name: dict(config) for name, config in (metrics or DEFAULT_METRICS).items()}
+        self.resident_ids = []
+        self.resident_index = {}
+        self._size = 64
+        self._states = {name: _MetricState(config, self._size) for name, config in self.metrics.items()}
+
+    def codes(self, resident_ids):
+        """Returns the detector's integer codes for resident ids, registering new residents."""
+        for resident_id in resident_ids:
+            if resident_id not in self.resident_index:
+                self.resident_index[resident_id] = len(self.resident_ids)
+                self.resident_ids.append(resident_id)
+        if len(self.resident_ids) > self._size:
+            self._size = max(len(self.resident_ids), self._size * 2)
+            for state in self._states.values():
+                state.grow(self._size)
+        return np.array([self.resident_index[r] for r in resident_ids], dtype=np.int64)
+
+    def update(self, metric, codes, timestamps, values):
+        """Scores one sample for each of `codes` (which must be unique) and returns the DetectedEvents."""
+        state = self._states[metric]
+        config = state.config
+        seasons, warmup = config['seasons'], config['warmup']
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        values = np.asarray(values, dtype=np.float64)
+
+        phase = timestamps % DAY_SECONDS * seasons / DAY_SECONDS
+        slot = phase.astype(np.int64) % seasons
+        # Slot means stand for the slot centres: interpolate between the two around the sample.
+        left = np.floor(phase - 0.5)
+        frac = phase - 0.5 - left
+        lo = left.astype(np.int64) % seasons
+        hi = (lo + 1) % seasons
+        mean = state.profile[codes, slot]
+        first = np.isnan(mean)
+        mean = np.where(first, values, mean)
+        both = (state.slot_count[codes, lo] >= warmup) & (state.slot_count[codes, hi] >= warmup)
+        expected = np.where(both, (1 - frac) * state.profile[codes, lo] + frac * state.profile[codes, hi], mean)
+        residual = values - expected
+        std = np.maximum(np.sqrt(state.var[codes]), config['min_std'])
+        warm = state.slot_count[codes, slot] >= warmup
+
+        lam, clip = config['smoothing'], config['clip_z'] * std
+        smooth = state.smooth[codes] + lam * (np.clip(residual, -clip, clip) - state.smooth[codes])
+        state.smooth[codes] = np.where(warm, smooth, 0.0)
+        z = np.where(warm, smooth / (std * np.sqrt(lam / (2 - lam))), 0.0)
+        beyond = np.abs(z) >= config['enter_z']
+
+        # New baselines are plain running means of every sample until 1/n drops below alpha.
+        learn = ~warm | ((np.abs(residual) < clip) & ~beyond & ~state.active[codes])
+        alpha = np.maximum(config['alpha'], 1.0 / (state.slot_count[codes, slot] + 1))
+        state.profile[codes, slot] = np.where(learn, mean + alpha * (values - mean), mean)
+        alpha = np.maximum(config['alpha'], 1.0 / (state.count[codes] + 1))
+        state.var[codes] = np.where(learn & ~first, (1 - alpha) * (state.var[codes] + alpha * residual ** 2),
+                                    state.var[codes])
+        state.slot_count[codes, slot] += 1
+        state.count[codes] += learn & ~first
+        return self._hysteresis(metric, state, codes, timestamps, values, expected, z, beyond)
+
+    def _hysteresis(self, metric, state, codes, timestamps, values, expected, z, beyond):
+        config = state.config
+        active = state.active[codes]
+        direction = np.sign(z).astype(np.int8)
+        streak = state.streak[codes]
+
+        # Idle residents count consecutive samples beyond the band in one direction.
+        same = beyond & (direction == state.direction[codes]) & (streak > 0)
+        idle_streak = np.where(same, streak + 1, np.where(beyond, 1, 0))
+        starting = beyond & ~same
+        state.onset[codes[~active & starting]] = timestamps[~active & starting]
+        state.direction[codes[~active]] = np.where(beyond, direction, 0)[~active]
+        # Active residents count consecutive calm samples.
+        calm = np.abs(z) <= config['exit_z']
+        active_streak = np.where(calm, streak + 1, 0)
+        streak = np.where(active, active_streak, idle_streak)
+        state.peak_z[codes] = np.where(active | same, np.maximum(state.peak_z[codes], np.abs(z)), np.abs(z))
+
+        raised = ~active & (streak >= config['enter_count'])
+        cleared = active & (streak >= config['exit_count'])
+        state.active[codes[raised]] = True
+        state.active[codes[cleared]] = False
+        streak[raised | cleared] = 0
+        state.streak[codes] = streak
+
+        detected = []
+        now = time.time()
+        for i in np.flatnonzero(raised | cleared):
+            code = codes[i]
+            data = {
+                'metric': metric,
+                'direction': 'high' if state.direction[code] > 0 else 'low',
+                'value': float(values[i]),
+                'expected': float(expected[i]),
+                'z': round(float(z[i]), 2),
+                'onset': float(state.onset[code]),
+                'confirmed_at': float(timestamps[i]),
+            }
+            if raised[i]:
+                detected.append(DetectedEvent('health_change', self.resident_ids[code], float(state.onset[code]),
+                                              now, data))
+            else:
+                data['peak_z'] = round(float(state.peak_z[code]), 2)
+                detected.append(DetectedEvent('health_recovered', self.resident_ids[code], float(timestamps[i]),
+                                              now, data))
+                state.direction[code] = 0
+        return detected
+
+    def process(self, metric, resident_ids, timestamps, values):
+        """Scores a batch of samples in any order, each resident's samples in time order.
+
+        Samples are applied in rounds: round k takes the k-th sample of every
+        resident, so every round is one vectorized update.
+        """
+        codes = self.codes(resident_ids) if not isinstance(resident_ids, np.ndarray) else resident_ids
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        values = np.asarray(values, dtype=np.float64)
+        if not len(codes):
+            return []
+        order = np.lexsort((timestamps, codes))
+        sorted_codes = codes[order]
+        starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]])
+        ranks = np.arange(len(order)) - np.repeat(starts, np.diff(np.r_[starts, len(order)]))
+        by_rank = order[np.argsort(ranks, kind='stable')]
+        bounds = np.searchsorted(np.sort(ranks), np.arange(ranks.max() + 2))
+        detected = []
+        for k in range(ranks.max() + 1):
+            chosen = by_rank[bounds[k]:bounds[k + 1]]
+            detected.extend(self.update(metric, codes[chosen], timestamps[chosen], values[chosen]))
+        return detected
+
+    def status(self, metric, resident_id):
+        """Returns the resident's current baseline and alert state for a metric, or None if unknown."""
+        code = self.resident_index.get(resident_id)
+        state = self._states[metric]
+        if code is None or not state.slot_count[code].any():
+            return None
+        warm = state.slot_count[code] >= state.config['warmup']
+        return {
+            'profile': [float(mean) if ok else None for mean, ok in zip(state.profile[code], warm)],
+            'std': float(max(np.sqrt(state.var[code]), state.config['min_std'])),
+            'samples': int(state.slot_count[code].sum()),
+            'alerting': bool(state.active[code]),
+        }
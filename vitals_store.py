@@ -0,0 +1,302 @@
+import fcntl
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import numpy as np
+
+DEFAULT_VITALS_DIR = os.environ.get(
+    "VITALS_STORE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "vitals_data"),
+)
+
+DAY_SECONDS = 86400
+# Residents are grouped into shards so chunk files have a fixed size and new residents never resize them.
+SHARD_SIZE = 256
+
+# Rollup resolutions: (seconds per bucket, first cell in a day's rollup row, cells per day)
+RESOLUTIONS = OrderedDict([
+    ("minute", (60, 0, 1440)),
+    ("hour", (3600, 1440, 24)),
+    ("day", (DAY_SECONDS, 1464, 1)),
+])
+ROLLUP_CELLS = 1465
+STATS = ("min", "max", "mean", "count")
+MIN, MAX, MEAN, COUNT = range(4)
+
+
+def _to_epoch(value):
+    return value.timestamp() if isinstance(value, datetime) else float(value)
+
+
+def _day_name(day):
+    return datetime.fromtimestamp(day * DAY_SECONDS, timezone.utc).strftime("%Y-%m-%d")
+
+
+def _reduce_samples(block):
+    """Rollup stats over the last axis of raw samples; all-zero bits mean "no sample"."""
+    present = block.view(np.uint32) != 0
+    count = present.sum(axis=-1)
+    total = np.where(present, block, 0.0).sum(axis=-1, dtype=np.float64)
+    low = np.where(present, block, np.inf).min(axis=-1)
+    high = np.where(present, block, -np.inf).max(axis=-1)
+    return _stack(low, high, total, count)
+
+
+def _merge_buckets(cells):
+    """Rollup stats over the last axis of finer rollup cells, shaped (4, ..., k)."""
+    count = cells[COUNT]
+    present = count > 0
+    total = (cells[MEAN].astype(np.float64) * count).sum(axis=-1)
+    low = np.where(present, cells[MIN], np.inf).min(axis=-1)
+    high = np.where(present, cells[MAX], -np.inf).max(axis=-1)
+    return _stack(low, high, total, count.sum(axis=-1))
+
+
+def _stack(low, high, total, count):
+    empty = count == 0
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = total / count
+    stats = np.stack([low, high, mean, count]).astype(np.float32)
+    stats[:, empty] = 0.0
+    return stats
+
+
+class VitalsStore:
+    """Append-only per-resident time series of vital signs with minute/hour/day rollups.
+
+    Each metric is stored per UTC day and per shard of SHARD_SIZE residents in
+    two memory-mapped float32 files: a raw grid of one slot per resident per
+    second, and a rollup file holding min/max/mean/count columns for every
+    minute, hour and the day. Empty slots are all-zero bits, so new chunk files
+    stay sparse on disk (a real 0.0 is stored as -0.0). Appends write the raw
+    grid, then recompute only the minute cells they touched and the hour and
+    day cells above them, so rollups are always current and range queries
+    over weeks read only the rollups. `raw_retention_days` deletes raw chunks
+    older than that while keeping their rollups. Several processes may share a
+    directory: resident codes are allocated under a file lock on the registry.
+    """
+
+    REGISTRY_FILE = "residents.json"
+    REGISTRY_LOCK_FILE = "residents.lock"
+
+    def __init__(self, root=DEFAULT_VITALS_DIR, raw_retention_days=None, max_open_chunks=32):
+        self.root = root
+        self.raw_retention_days = raw_retention_days
+        self.max_open_chunks = max_open_chunks
+        self._chunks = OrderedDict()
+        self._lock = threading.RLock()
+        self.resident_ids = []
+        self.resident_index = {}
+        self._load_registry()
+        self._newest_day = {}
+
+    def _load_registry(self):
+        try:
+            with open(os.path.join(self.root, self.REGISTRY_FILE), "r", encoding="utf-8") as f:
+                self.resident_ids = json.load(f)
+        except (OSError, ValueError):
+            return
+        self.resident_index = {resident_id: code for code, resident_id in enumerate(self.resident_ids)}
+
+    @contextmanager
+    def _registry_locked(self):
+        os.makedirs(self.root, exist_ok=True)
+        with open(os.path.join(self.root, self.REGISTRY_LOCK_FILE), "a+") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def codes(self, resident_ids):
+        """Returns the store's integer codes for resident ids, registering new residents."""
+        with self._lock:
+            if any(resident_id not in self.resident_index for resident_id in resident_ids):
+                # Another process may have registered residents since the last load.
+                with self._registry_locked():
+                    self._load_registry()
+                    added = False
+                    for resident_id in resident_ids:
+                        if resident_id not in self.resident_index:
+                            self.resident_index[resident_id] = len(self.resident_ids)
+                            self.resident_ids.append(resident_id)
+                            added = True
+                    if added:
+                        self._save_registry()
+            return np.array([self.resident_index[r] for r in resident_ids], dtype=np.int64)
+
+    def _save_registry(self):
+        os.makedirs(self.root, exist_ok=True)
+        fd, staging = tempfile.mkstemp(prefix=".staging-", dir=self.root)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(self.resident_ids, f)
+        os.replace(staging, os.path.join(self.root, self.REGISTRY_FILE))
+
+    def _path(self, metric, kind, day, shard):
+        return os.path.join(self.root, metric, _day_name(day), f"shard-{shard:04d}.{kind}")
+
+    def _chunk(self, metric, kind, day, shard, create=False):
+        """Returns the memory map of one chunk file, or None if it does not exist and `create` is False."""
+        key = (metric, kind, day, shard)
+        chunk = self._chunks.get(key)
+        if chunk is not None:
+            self._chunks.move_to_end(key)
+            return chunk
+        path = self._path(metric, kind, day, shard)
+        shape = (SHARD_SIZE, DAY_SECONDS) if kind == "raw" else (len(STATS), SHARD_SIZE, ROLLUP_CELLS)
+        if not os.path.exists(path):
+            if not create:
+                return None
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as f:
+                f.truncate(int(np.prod(shape)) * 4)
+            if kind == "raw":
+                self._expire_raw(metric, day)
+        chunk = self._chunks[key] = np.memmap(path, dtype=np.float32, mode="r+", shape=shape)
+        while len(self._chunks) > self.max_open_chunks:
+            _, evicted = self._chunks.popitem(last=False)
+            evicted.flush()
+        return chunk
+
+    def _expire_raw(self, metric, day):
+        """Deletes raw chunks more than `raw_retention_days` older than `day`; their rollups stay."""
+        if self.raw_retention_days is None or day <= self._newest_day.get(metric, -1):
+            return
+        self._newest_day[metric] = day
+        cutoff = day - self.raw_retention_days
+        for key in [k for k in self._chunks if k[:2] == (metric, "raw") and k[2] < cutoff]:
+            del self._chunks[key]
+        metric_dir = os.path.join(self.root, metric)
+        for day_dir in os.listdir(metric_dir):
+            if day_dir < _day_name(cutoff):
+                for name in os.listdir(os.path.join(metric_dir, day_dir)):
+                    if name.endswith(".raw"):
+                        os.remove(os.path.join(metric_dir, day_dir, name))
+
+    def append(self, metric, resident_id, timestamps, values):
+        """Appends samples of one metric for one resident; `timestamps` may be a datetime for a single sample."""
+        timestamps = np.atleast_1d(np.asarray(_to_epoch(timestamps) if isinstance(timestamps, datetime) else timestamps,
+                                              dtype=np.float64))
+        self.append_batch(metric, np.full(len(timestamps), self.codes([resident_id])[0]), timestamps, values)
+
+    def append_batch(self, metric, codes, timestamps, values):
+        """Appends samples of one metric for many residents at once (codes from `codes()`).
+
+        Timestamps are epoch seconds, stored at one-second resolution; a later
+        sample for the same resident and second replaces the earlier one.
+        """
+        codes = np.atleast_1d(np.asarray(codes, dtype=np.int64))
+        seconds = np.floor(np.atleast_1d(np.asarray(timestamps, dtype=np.float64))).astype(np.int64)
+        values = np.atleast_1d(np.asarray(values, dtype=np.float32))
+        keep = np.isfinite(values)
+        if not keep.all():
+            codes, seconds, values = codes[keep], seconds[keep], values[keep]
+        if not len(values):
+            return
+        values = np.where(values == 0, np.float32(-0.0), values)
+        days = seconds // DAY_SECONDS
+        shards = codes // SHARD_SIZE
+        with self._lock:
+            for day in range(days.min(), days.max() + 1):
+                in_day = days == day
+                for shard in range(shards[in_day].min(initial=shards.max()), shards.max() + 1):
+                    mask = in_day & (shards == shard)
+                    if mask.any():
+                        self._write(metric, day, shard, codes[mask] % SHARD_SIZE,
+                                    seconds[mask] % DAY_SECONDS, values[mask])
+
+    def _write(self, metric, day, shard, rows, offsets, values):
+        raw = self._chunk(metric, "raw", day, shard, create=True)
+        rollup = self._chunk(metric, "rollup", day, shard, create=True)
+        raw[rows, offsets] = values
+
+        # Recompute the touched minutes from the raw grid, then the hours and the day above them.
+        rows = np.unique(rows)
+        first, last = offsets.min() // 60, offsets.max() // 60 + 1
+        block = raw[rows, first * 60:last * 60].reshape(len(rows), last - first, 60)
+        rollup[:, rows, first:last] = _reduce_samples(block)
+
+        first_hour, last_hour = first // 60, (last - 1) // 60 + 1
+        minutes = rollup[:, rows, first_hour * 60:last_hour * 60]
+        rollup[:, rows, 1440 + first_hour:1440 + last_hour] = _merge_buckets(
+            minutes.reshape(len(STATS), len(rows), last_hour - first_hour, 60))
+        rollup[:, rows, 1464] = _merge_buckets(rollup[:, rows, 1440:1464])
+
+    def query(self, metric, resident_id, start, end, resolution=None, max_points=1000):
+        """Returns the series of one metric for one resident over [start, end).
+
+        `resolution` is 'raw', 'minute', 'hour' or 'day'; by default the finest
+        one giving at most `max_points` buckets. The result has the chosen
+        `resolution` and arrays `timestamps` (bucket starts) and `min`, `max`,
+        `mean`, `count`, covering only buckets that hold samples.
+        """
+        start, end = int(np.floor(_to_epoch(start))), int(np.ceil(_to_epoch(end)))
+        if resolution is not None and resolution != "raw" and resolution not in RESOLUTIONS:
+            raise ValueError(f"Unknown resolution: {resolution}")
+        if resolution is None:
+            resolution = "raw" if end - start <= max_points else next(
+                (name for name, (step, _, _) in RESOLUTIONS.items() if (end - start) / step <= max_points), "day")
+        parts = []
+        with self._lock:
+            if resident_id not in self.resident_index:
+                # Another process may have registered the resident since this store was opened.
+                self._load_registry()
+            code = self.resident_index.get(resident_id)
+            if code is not None:
+                shard, row = divmod(code, SHARD_SIZE)
+                for day in range(start // DAY_SECONDS, (end - 1) // DAY_SECONDS + 1):
+                    parts.append(self._read_day(metric, day, shard, row, start, end, resolution))
+        parts = [part for part in parts if part is not None]
+        if parts:
+            timestamps = np.concatenate([p[0] for p in parts])
+            stats = np.concatenate([p[1] for p in parts], axis=1)
+        else:
+            timestamps, stats = np.zeros(0, dtype=np.int64), np.zeros((len(STATS), 0), dtype=np.float32)
+        present = stats[COUNT] > 0
+        stats = stats[:, present] + np.float32(0.0)  # stored -0.0 reads back as 0.0
+        series = {"resolution": resolution, "timestamps": timestamps[present]}
+        for index, name in enumerate(STATS):
+            series[name] = stats[index]
+        return series
+
+    def _read_day(self, metric, day, shard, row, start, end, resolution):
+        day_start = day * DAY_SECONDS
+        lo, hi = max(start, day_start) - day_start, min(end, day_start + DAY_SECONDS) - day_start
+        if resolution == "raw":
+            raw = self._chunk(metric, "raw", day, shard)
+            if raw is None:
+                return None
+            values = np.array(raw[row, lo:hi])
+            count = (values.view(np.uint32) != 0).astype(np.float32)
+            return day_start + np.arange(lo, hi), np.stack([values, values, values, count])
+        step, offset, cells = RESOLUTIONS[resolution]
+        rollup = self._chunk(metric, "rollup", day, shard)
+        if rollup is None:
+            return None
+        first, last = lo // step, min(cells, -(-hi // step))
+        return day_start + np.arange(first, last) * step, np.array(rollup[:, row, offset + first:offset + last])
+
+    def summary(self, metric, resident_id, start, end):
+        """Returns overall {min, max, mean, count} of a metric over [start, end), from the coarsest rollups that fit."""
+        series = self.query(metric, resident_id, start, end, max_points=2000)
+        if not len(series["count"]):
+            return {"min": None, "max": None, "mean": None, "count": 0}
+        cells = np.stack([series[name] for name in STATS])[:, None, :]
+        low, high, mean, count = _merge_buckets(cells)[:, 0]
+        return {"min": float(low), "max": float(high), "mean": float(mean), "count": int(count)}
+
+    def flush(self):
+        with self._lock:
+            for chunk in self._chunks.values():
+                if chunk.mode != "r":
+                    chunk.flush()
+
+    def close(self):
+        with self._lock:
+            self.flush()
+            self._chunks.clear()
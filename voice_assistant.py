@@ -1,15 +1,73 @@
 import threading
 from datetime import datetime
 
+from intent_engine import IntentEngine
+from tts_cache import AudioCache, template_parts
+
+# Intent table for process_command. Keywords are matched after Arabic normalization and
+# their weights add up per intent; the best intent reaching its threshold (default 1.0)
+# wins, and priority breaks ties. `{time}` in a response is filled in when spoken.
+INTENTS = [
+    {
+        "name": "emergency",
+        "priority": 3,
+        "keywords": {"مساعدة": 2.0, "طوارئ": 2.0, "النجدة": 2.0, "إسعاف": 2.0, "سقطت": 2.0, "ساعدني": 2.0},
+        # In a real system, this would trigger an emergency alert
+        "response": "جارٍ الاتصال بالمشرفين أو خدمات الطوارئ. ابقَ هادئًا."
+    },
+    {
+        "name": "medication_reminder",
+        "priority": 2,
+        "keywords": {"دواء": 1.0, "علاج": 0.8, "حبوب": 0.8, "تذكير": 0.5, "ذكرني": 0.5},
+        # In a real system, this would trigger a reminder setting function
+        "response": "بالتأكيد، ما هو الدواء الذي تود تذكيري به ومتى؟"
+    },
+    {
+        "name": "greeting",
+        "keywords": {"كيف حالك": 1.0, "مرحبا": 1.0, "السلام عليكم": 1.0, "صباح الخير": 1.0, "مساء الخير": 1.0},
+        "response": "أنا بخير، شكراً لسؤالك. كيف يمكنني مساعدتك اليوم؟"
+    },
+    {
+        "name": "time",
+        "keywords": {"وقت": 1.0, "الساعة": 1.0, "كم الساعة": 0.5},
+        "response": "الساعة الآن {time}"
+    },
+    {
+        "name": "stop",
+        "priority": 1,
+        "keywords": {"توقف": 1.0, "اغلق": 1.0, "إلى اللقاء": 1.0, "مع السلامة": 1.0},
+        "response": "حسناً، سأتوقف الآن. إلى اللقاء.",
+        "action": "stop"
+    },
+]
+
+FALLBACK_RESPONSE = "لم أفهم طلبك. هل يمكنك تكراره؟"
+
+GREETING = "مرحباً بك في منصة رعاية المسنين الذكية. كيف يمكنني مساعدتك؟"
+
+
+def static_phrases():
+    """The fixed text of every reply, which can be synthesized ahead of time."""
+    templates = [GREETING, FALLBACK_RESPONSE] + [intent["response"] for intent in INTENTS]
+    return [part for template in templates for kind, part in template_parts(template) if kind == "text"]
+
 class VoiceAssistant:
-    def __init__(self):
+    def __init__(self, audio_cache=None):
         # Removed pyttsx3 and SpeechRecognition initialization due to sandbox limitations
-        print("Voice Assistant initialized (simulated mode).")
+        # Replies are spoken from pre-rendered audio; only the dynamic parts are synthesized per command.
+        self.audio_cache = audio_cache or AudioCache()
+        rendered = self.audio_cache.prerender(static_phrases())
+        print(f"Voice Assistant initialized (simulated mode, {rendered} phrases pre-rendered).")
         self._command_index = 0 # Initialize command index for simulation
+        # handle_command runs on several worker threads at once; guard the shared counter
+        self._lock = threading.Lock()
+        self.intent_engine = IntentEngine(INTENTS)
 
-    def speak(self, text):
-        """Simulates converting text to speech by printing it."""
-        print(f"Assistant says (simulated): {text}")
+    def speak(self, text, audio=None):
+        """Simulates playing the reply by printing it; `audio` is the rendered AudioClip, if any."""
+        if audio is None:
+            audio = self.audio_cache.phrase(text)
+        print(f"Assistant says (simulated, {audio.duration:.1f}s of audio): {text}")
 
     def listen(self):
         """Simulates listening for voice input and returns a predefined command."""
@@ -21,33 +79,41 @@ class VoiceAssistant:
             "توقف"
         ]
         print("Simulating listening...")
-        command = simulated_commands[self._command_index % len(simulated_commands)]
-        self._command_index += 1
+        with self._lock:
+            command = simulated_commands[self._command_index % len(simulated_commands)]
+            self._command_index += 1
         print(f"Simulated input: {command}")
         return command
 
+    def handle_command(self, command):
+        """Matches the command against the intent table and speaks the reply.
+
+        Safe to call from several threads: the intent engine is read-only once built.
+        """
+        match = self.intent_engine.match(command)
+        if match is None:
+            template, action = FALLBACK_RESPONSE, "continue"
+        else:
+            template, action = match.intent["response"], match.intent.get("action", "continue")
+        values = {"time": datetime.now().strftime('%I:%M %p')}
+        reply = template.format(**values)
+        audio = self.audio_cache.render(template, **values)
+        self.speak(reply, audio)
+        return {
+            "intent": match.name if match else None,
+            "score": match.score if match else 0.0,
+            "reply": reply,
+            "action": action,
+            "audio_seconds": round(audio.duration, 2)
+        }
+
     def process_command(self, command):
         """Processes the recognized command."""
-        if "تذكير" in command and "دواء" in command:
-            self.speak("بالتأكيد، ما هو الدواء الذي تود تذكيري به ومتى؟")
-            # In a real system, this would trigger a reminder setting function
-        elif "مساعدة" in command or "طوارئ" in command:
-            self.speak("جارٍ الاتصال بالمشرفين أو خدمات الطوارئ. ابقَ هادئًا.")
-            # In a real system, this would trigger an emergency alert
-        elif "كيف حالك" in command:
-            self.speak("أنا بخير، شكراً لسؤالك. كيف يمكنني مساعدتك اليوم؟")
-        elif "وقت" in command:
-            self.speak(f"الساعة الآن {datetime.now().strftime('%I:%M %p')}")
-        elif "توقف" in command or "اغلق" in command:
-            self.speak("حسناً، سأتوقف الآن. إلى اللقاء.")
-            return "stop"
-        else:
-            self.speak("لم أفهم طلبك. هل يمكنك تكراره؟")
-        return "continue"
+        return self.handle_command(command)["action"]
 
     def start(self):
         """Starts the voice assistant in a loop."""
-        self.speak("مرحباً بك في منصة رعاية المسنين الذكية. كيف يمكنني مساعدتك؟")
+        self.speak(GREETING)
         while True:
             command = self.listen()
             if command:
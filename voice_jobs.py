@@ -0,0 +1,157 @@
+import itertools
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+
+
+class QueueFullError(Exception):
+    """Raised when the job queue already holds its maximum number of pending jobs."""
+
+
+class VoiceJobQueue:
+    """Runs voice commands on a bounded worker pool, in order per resident.
+
+    Each resident has its own lane of pending jobs. A lane is handed to one
+    worker at a time and goes back to the ready queue after each job, so a
+    resident's commands run strictly in submission order while different
+    residents are served concurrently and fairly. At most `max_pending` jobs
+    may be waiting; finished jobs are kept for `result_ttl` seconds (and at
+    most `max_results`) so clients can poll for them. `on_complete(job)` is
+    called after every job, e.g. to push the result to subscribers.
+    """
+
+    def __init__(self, handler, workers=4, max_pending=256, result_ttl=300, max_results=10000, on_complete=None):
+        self.handler = handler
+        self.max_pending = max_pending
+        self.result_ttl = result_ttl
+        self.max_results = max_results
+        self.on_complete = on_complete
+        self._jobs = OrderedDict()
+        self._lanes = {}
+        self._ready = queue.Queue()
+        self._pending = 0
+        self._seq = itertools.count(1)
+        self._lock = threading.Lock()
+        self._finished = threading.Condition(self._lock)
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self._workers = [threading.Thread(target=self._work, name=f'voice-worker-{i}', daemon=True)
+                         for i in range(workers)]
+        for worker in self._workers:
+            worker.start()
+
+    def submit(self, resident_id, command):
+        """Queues a command and returns its job; raises QueueFullError when the queue is full."""
+        job = {
+            'id': uuid.uuid4().hex,
+            'seq': next(self._seq),
+            'resident_id': resident_id,
+            'command': command,
+            'status': 'queued',
+            'submitted_at': time.time(),
+            'started_at': None,
+            'finished_at': None,
+            'result': None,
+            'error': None
+        }
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.rejected += 1
+                raise QueueFullError(f"{self._pending} voice commands already pending")
+            self._prune()
+            self._jobs[job['id']] = job
+            self._pending += 1
+            self.submitted += 1
+            lane = self._lanes.get(resident_id)
+            if lane is None:
+                # No lane means no worker owns this resident right now.
+                self._lanes[resident_id] = deque([job])
+                self._ready.put(resident_id)
+            else:
+                lane.append(job)
+        return dict(job)
+
+    def _work(self):
+        while True:
+            resident_id = self._ready.get()
+            if resident_id is None:
+                return
+            with self._lock:
+                job = self._lanes[resident_id].popleft()
+                job['status'] = 'running'
+                job['started_at'] = time.time()
+            try:
+                job['result'] = self.handler(job['command'])
+                job['status'] = 'done'
+            except Exception as e:
+                job['error'] = str(e)
+                job['status'] = 'failed'
+            with self._lock:
+                job['finished_at'] = time.time()
+                self._pending -= 1
+                if job['status'] == 'done':
+                    self.completed += 1
+                else:
+                    self.failed += 1
+                if self._lanes[resident_id]:
+                    self._ready.put(resident_id)
+                else:
+                    del self._lanes[resident_id]
+                self._finished.notify_all()
+            if self.on_complete:
+                try:
+                    self.on_complete(dict(job))
+                except Exception as e:
+                    print(f"Voice job completion hook failed: {e}")
+
+    def _prune(self):
+        # Jobs are kept in submission order, so expired or excess finished ones sit at the front.
+        cutoff = time.time() - self.result_ttl
+        while self._jobs:
+            job = next(iter(self._jobs.values()))
+            if job['finished_at'] is None or (job['finished_at'] > cutoff and len(self._jobs) < self.max_results):
+                break
+            self._jobs.popitem(last=False)
+
+    def get(self, job_id):
+        """Returns a snapshot of the job, or None if it is unknown or has expired."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def wait(self, job_id, timeout=None):
+        """Returns the job once it has finished, or as it is when `timeout` runs out (None if unknown)."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            job = self._jobs.get(job_id)
+            while job is not None and job['finished_at'] is None:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    break
+                self._finished.wait(remaining)
+            return dict(job) if job else None
+
+    def stats(self):
+        with self._lock:
+            return {
+                'workers': len(self._workers),
+                'pending': self._pending,
+                'max_pending': self.max_pending,
+                'active_residents': len(self._lanes),
+                'submitted': self.submitted,
+                'completed': self.completed,
+                'failed': self.failed,
+                'rejected': self.rejected,
+                'retained_jobs': len(self._jobs)
+            }
+
+    def shutdown(self, timeout=5.0):
+        for _ in self._workers:
+            self._ready.put(None)
+        for worker in self._workers:
+            worker.join(timeout)
+